@@ -0,0 +1,63 @@
+"""add hnsw indexes on embeddings
+
+Revision ID: 4f383ad54edc
+Revises: 068b47f44d83
+Create Date: 2026-10-18 09:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f383ad54edc'
+down_revision: Union[str, None] = '068b47f44d83'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# keep in sync with EMBEDDING_HNSW_INDEX_PARAMS in sql_models.py
+HNSW_INDEX_PARAMS = {"m": 16, "ef_construction": 64}
+
+
+def upgrade() -> None:
+    # build the indexes without locking the tables against writes, which can't run in a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_functions_embedding_hnsw',
+            'functions',
+            ['embedding'],
+            unique=False,
+            postgresql_using='hnsw',
+            postgresql_with=HNSW_INDEX_PARAMS,
+            postgresql_ops={'embedding': 'vector_cosine_ops'},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_apps_embedding_hnsw',
+            'apps',
+            ['embedding'],
+            unique=False,
+            postgresql_using='hnsw',
+            postgresql_with=HNSW_INDEX_PARAMS,
+            postgresql_ops={'embedding': 'vector_cosine_ops'},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_apps_embedding_hnsw',
+            table_name='apps',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            'ix_functions_embedding_hnsw',
+            table_name='functions',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
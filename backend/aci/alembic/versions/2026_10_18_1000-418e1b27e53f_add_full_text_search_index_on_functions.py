@@ -0,0 +1,50 @@
+"""add full text search index on functions
+
+Revision ID: 418e1b27e53f
+Revises: 4f383ad54edc
+Create Date: 2026-10-18 10:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '418e1b27e53f'
+down_revision: Union[str, None] = '4f383ad54edc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# keep in sync with FUNCTION_SEARCH_DOCUMENT in sql_models.py, queries only use the index if the
+# expressions are the same
+FUNCTION_SEARCH_DOCUMENT = (
+    "(setweight(to_tsvector('english'::regconfig, replace(name, '_', ' ')), 'A') "
+    "|| setweight(to_tsvector('english'::regconfig, description), 'B')) "
+    "|| setweight(array_to_tsvector(tags), 'C')"
+)
+
+
+def upgrade() -> None:
+    # build the index without locking the table against writes, which can't run in a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_functions_search_document',
+            'functions',
+            [sa.text(FUNCTION_SEARCH_DOCUMENT)],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_functions_search_document',
+            table_name='functions',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
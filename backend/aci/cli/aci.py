@@ -8,6 +8,7 @@ from aci.cli.commands import (
     delete_app,
     fuzzy_test_function_execution,
     get_app,
+    reencrypt_security_credentials,
     rename_app,
     update_agent,
     upsert_app,
@@ -30,6 +31,7 @@ cli.add_command(upsert_app.upsert_app)
 cli.add_command(get_app.get_app)
 cli.add_command(rename_app.rename_app)
 cli.add_command(delete_app.delete_app)
+cli.add_command(reencrypt_security_credentials.reencrypt_security_credentials)
 cli.add_command(upsert_functions.upsert_functions)
 cli.add_command(create_random_api_key.create_random_api_key)
 cli.add_command(fuzzy_test_function_execution.fuzzy_test_function_execution)
@@ -85,6 +85,14 @@ def delete_app(
                     del agent.custom_instructions[key]
                     console.print(f"Removed custom instruction '{key}' for agent {agent.id}")
 
+                # Remove custom instruction rules for this app
+                keys_to_remove = [
+                    key for key in agent.custom_instruction_rules if key.startswith(f"{app_name}__")
+                ]
+                for key in keys_to_remove:
+                    del agent.custom_instruction_rules[key]
+                    console.print(f"Removed custom instruction rules '{key}' for agent {agent.id}")
+
             # 2. Delete linked accounts
             for linked_account in linked_accounts:
                 db_session.delete(linked_account)
@@ -0,0 +1,71 @@
+import click
+from rich.console import Console
+from sqlalchemy.orm.attributes import flag_modified
+
+from aci.cli import config
+from aci.common import utils
+from aci.common.db import crud
+
+console = Console()
+
+
+@click.command()
+@click.option(
+    "--batch-size",
+    "batch_size",
+    type=int,
+    default=100,
+    show_default=True,
+    help="Number of linked accounts to re-encrypt per transaction",
+)
+@click.option(
+    "--skip-dry-run",
+    is_flag=True,
+    help="Provide this flag to run the command and apply changes to the database",
+)
+def reencrypt_security_credentials(batch_size: int, skip_dry_run: bool) -> None:
+    """
+    Re-encrypt the security credentials of linked accounts that are still stored in the legacy
+    format (each secret field encrypted separately) in the current format (all secret fields
+    encrypted together). Rows in either format can be read, so this can run while serving traffic:
+    the rows are locked while being re-encrypted, and rows being updated concurrently (e.g., by an
+    OAuth2 token refresh, which writes the current format anyway) are skipped, so the re-encryption
+    never writes back credentials older than the ones of a concurrent update.
+    """
+    with utils.create_db_session(config.DB_FULL_URL) as db_session:
+        if not skip_dry_run:
+            console.rule("[bold yellow]Dry run mode - no changes applied[/bold yellow]")
+            linked_accounts = (
+                crud.linked_accounts.get_linked_accounts_with_legacy_encrypted_credentials(
+                    db_session, limit=batch_size
+                )
+            )
+            console.print(
+                f"Found {len(linked_accounts)} linked accounts in the first batch to re-encrypt"
+            )
+            for linked_account in linked_accounts:
+                console.print(f"Would re-encrypt linked account {linked_account.id}")
+            return
+
+        total = 0
+        while True:
+            # the lock is held until the commit, a concurrent update of the rows waits for it
+            linked_accounts = (
+                crud.linked_accounts.get_linked_accounts_with_legacy_encrypted_credentials(
+                    db_session, limit=batch_size, lock=True
+                )
+            )
+            if not linked_accounts:
+                break
+            for linked_account in linked_accounts:
+                # the credentials were decrypted on load, marking them as modified writes them
+                # back in the current format
+                flag_modified(linked_account, "security_credentials")
+            db_session.commit()
+            total += len(linked_accounts)
+            console.print(f"Re-encrypted {total} linked accounts")
+
+        console.rule(f"[bold green]Re-encrypted {total} linked accounts[/bold green]")
+        console.print(
+            "Rows that were locked by concurrent updates are skipped, run again if needed"
+        )
@@ -136,6 +136,23 @@ def rename_app(
                     )
                 agent.custom_instructions = new_custom_instructions
 
+                # Update custom_instruction_rules if they reference the old app name
+                new_custom_instruction_rules = deepcopy(agent.custom_instruction_rules)
+                keys_to_update = [
+                    key
+                    for key in new_custom_instruction_rules.keys()
+                    if key.startswith(f"{current_name}__")
+                ]
+                for func_name in keys_to_update:
+                    new_func_name = func_name.replace(f"{current_name}__", f"{new_name}__", 1)
+                    new_custom_instruction_rules[new_func_name] = new_custom_instruction_rules.pop(
+                        func_name
+                    )
+                    console.print(
+                        f"Updating custom_instruction_rules from '{func_name}' to '{new_func_name}' for agent {agent.id}"
+                    )
+                agent.custom_instruction_rules = new_custom_instruction_rules
+
             # Commit changes
             if not skip_dry_run:
                 console.rule(
@@ -5,7 +5,6 @@ from uuid import UUID
 import click
 from deepdiff import DeepDiff
 from jinja2 import Environment, FileSystemLoader, StrictUndefined, Template
-from openai import OpenAI
 from rich.console import Console
 from sqlalchemy.orm import Session
 
@@ -17,7 +16,12 @@ from aci.common.schemas.app import AppEmbeddingFields, AppUpsert
 
 console = Console()
 
-openai_client = OpenAI(api_key=config.OPENAI_API_KEY)
+embedding_provider = embeddings.create_embedding_provider(
+    config.EMBEDDING_PROVIDER,
+    config.OPENAI_API_KEY,
+    config.OPENAI_EMBEDDING_MODEL,
+    config.OPENAI_EMBEDDING_DIMENSION,
+)
 
 
 @click.command()
@@ -85,9 +89,7 @@ def create_app_helper(db_session: Session, app_upsert: AppUpsert, skip_dry_run:
     # Generate app embedding using the fields defined in AppEmbeddingFields
     app_embedding = embeddings.generate_app_embedding(
         AppEmbeddingFields.model_validate(app_upsert.model_dump()),
-        openai_client,
-        config.OPENAI_EMBEDDING_MODEL,
-        config.OPENAI_EMBEDDING_DIMENSION,
+        embedding_provider,
     )
 
     # Create the app entry in the database
@@ -123,9 +125,7 @@ def update_app_helper(
     if _need_embedding_regeneration(existing_app_upsert, app_upsert):
         new_embedding = embeddings.generate_app_embedding(
             AppEmbeddingFields.model_validate(app_upsert.model_dump()),
-            openai_client,
-            config.OPENAI_EMBEDDING_MODEL,
-            config.OPENAI_EMBEDDING_DIMENSION,
+            embedding_provider,
         )
 
     # Update the app in the database with the new fields and optional embedding update
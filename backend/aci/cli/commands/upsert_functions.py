@@ -3,7 +3,6 @@ from pathlib import Path
 
 import click
 from deepdiff import DeepDiff
-from openai import OpenAI
 from rich.console import Console
 from rich.table import Table
 from sqlalchemy.orm import Session
@@ -15,7 +14,12 @@ from aci.common.schemas.function import FunctionEmbeddingFields, FunctionUpsert
 
 console = Console()
 
-openai_client = OpenAI(api_key=config.OPENAI_API_KEY)
+embedding_provider = embeddings.create_embedding_provider(
+    config.EMBEDDING_PROVIDER,
+    config.OPENAI_API_KEY,
+    config.OPENAI_EMBEDDING_MODEL,
+    config.OPENAI_EMBEDDING_DIMENSION,
+)
 
 
 @click.command()
@@ -105,14 +109,13 @@ def create_functions_helper(
 ) -> list[str]:
     """
     Batch creates functions in the database.
-    Generates embeddings for each new function and calls the CRUD layer for creation.
+    Generates the embeddings of the new functions with batched requests and calls the CRUD layer
+    for creation.
     Returns a list of created function names.
     """
     functions_embeddings = embeddings.generate_function_embeddings(
         [FunctionEmbeddingFields.model_validate(func.model_dump()) for func in functions_upsert],
-        openai_client,
-        embedding_model=config.OPENAI_EMBEDDING_MODEL,
-        embedding_dimension=config.OPENAI_EMBEDDING_DIMENSION,
+        embedding_provider,
     )
     created_functions = crud.functions.create_functions(
         db_session, functions_upsert, functions_embeddings
@@ -167,9 +170,7 @@ def update_functions_helper(
             FunctionEmbeddingFields.model_validate(func.model_dump())
             for func in functions_with_new_embeddings
         ],
-        openai_client,
-        embedding_model=config.OPENAI_EMBEDDING_MODEL,
-        embedding_dimension=config.OPENAI_EMBEDDING_DIMENSION,
+        embedding_provider,
     )
 
     # Note: the order matters here because the embeddings need to match the functions
@@ -1,9 +1,12 @@
 from dotenv import load_dotenv
 
+from aci.common.enums import EmbeddingProviderType
 from aci.common.utils import check_and_get_env_variable, construct_db_url
 
 load_dotenv()
 
+# "openai", or "hashing" for local embeddings without network access (lexical similarity only)
+EMBEDDING_PROVIDER = EmbeddingProviderType(check_and_get_env_variable("CLI_EMBEDDING_PROVIDER"))
 OPENAI_API_KEY = check_and_get_env_variable("CLI_OPENAI_API_KEY")
 OPENAI_EMBEDDING_MODEL = check_and_get_env_variable("CLI_OPENAI_EMBEDDING_MODEL")
 OPENAI_EMBEDDING_DIMENSION = int(check_and_get_env_variable("CLI_OPENAI_EMBEDDING_DIMENSION"))
@@ -0,0 +1,90 @@
+"""
+Process-local, size-bounded LRU cache with per-entry time-to-live.
+
+Used for short-lived caching of hot, rarely changing data (e.g., api key resolution) to avoid db
+round trips on the request path. Being process-local, a change made by another process is only
+picked up once the entry expires, so callers should keep the ttl short and invalidate explicitly
+when the change happens in the same process.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Generic, TypeVar
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Thread-safe LRU cache whose entries expire ttl seconds after being set.
+    A ttl <= 0 or maxsize <= 0 disables the cache (nothing is stored).
+    """
+
+    def __init__(
+        self, maxsize: int, ttl: float, timer: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._lock = threading.Lock()
+        # key -> (expires_at, value), ordered from least to most recently used
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.maxsize > 0
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= self._timer():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: K, value: V) -> list[V]:
+        """Set the entry, return the values of the least recently used entries evicted for room."""
+        if not self.enabled:
+            return []
+        evicted: list[V] = []
+        with self._lock:
+            self._entries[key] = (self._timer() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                _, (_, evicted_value) = self._entries.popitem(last=False)
+                evicted.append(evicted_value)
+        return evicted
+
+    def pop(self, key: K) -> V | None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return entry[1] if entry is not None else None
+
+    def pop_where(self, predicate: Callable[[K, V], bool]) -> int:
+        """Remove all entries matching predicate, return the number of entries removed."""
+        with self._lock:
+            keys = [key for key, (_, value) in self._entries.items() if predicate(key, value)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def pop_all(self) -> list[V]:
+        """Remove all entries (expired ones included), return their values."""
+        with self._lock:
+            values = [value for _, value in self._entries.values()]
+            self._entries.clear()
+            return values
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
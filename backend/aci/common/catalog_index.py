@@ -0,0 +1,460 @@
+"""
+In-process index of the apps and functions, to serve app and function searches without the db.
+
+The embeddings of all apps and functions are kept in contiguous (L2 normalized, float32) NumPy
+matrices next to metadata arrays (visibility, active, app of each function), so a search is a
+matrix-vector product with boolean filter masks instead of a cosine distance scan in the db.
+
+Function searches can also be ranked lexically (see hybrid_search.py), with an inverted index of
+the tokens of the function names, descriptions and tags.
+
+The catalog only changes through the CLI (upsert-app, upsert-functions, etc.), so the index is
+refreshed incrementally: only the rows updated since the last refresh are read from the db and
+applied. Deleted rows are detected by comparing the row counts, which triggers a full reload.
+
+Each refresh builds a new snapshot and swaps it in, so a search always sees a consistent index.
+"""
+
+import asyncio
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Generic, TypeVar
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from aci.common import hybrid_search, utils
+from aci.common.db import crud
+from aci.common.db.sql_models import EMBEDDING_DIMENSION
+from aci.common.enums import Visibility
+from aci.common.logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+# updated_at is set at the start of the writing transaction, so a row can be committed after a
+# refresh with an updated_at before it. Re-reading this window picks up such rows.
+REFRESH_OVERLAP = timedelta(seconds=60)
+# weights of the tokens of each field of a function in the lexical ranking, as in the db's
+# full-text search document (see FUNCTION_SEARCH_DOCUMENT)
+NAME_WEIGHT = 1.0
+DESCRIPTION_WEIGHT = 0.4
+TAGS_WEIGHT = 0.2
+
+
+@dataclass(frozen=True)
+class IndexedApp:
+    id: UUID
+    name: str
+    description: str
+    categories: list[str]
+    visibility: Visibility
+    active: bool
+    updated_at: datetime
+
+
+@dataclass(frozen=True)
+class IndexedFunction:
+    id: UUID
+    app_id: UUID
+    name: str
+    description: str
+    tags: list[str]
+    parameters: dict
+    visibility: Visibility
+    active: bool
+    updated_at: datetime
+
+
+T = TypeVar("T", IndexedApp, IndexedFunction)
+
+
+def _normalize(embeddings: np.ndarray) -> np.ndarray:
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+    return embeddings / np.where(norms == 0, 1, norms)
+
+
+@dataclass(frozen=True)
+class _Table(Generic[T]):
+    items: list[T]
+    # (number of items, dimension), row i is the normalized embedding of items[i]
+    embeddings: np.ndarray
+    public: np.ndarray
+    active: np.ndarray
+    # position of each row when sorted by name
+    name_ranks: np.ndarray
+    rows_by_id: dict[UUID, int]
+
+    @classmethod
+    def build(cls, items: list[T], embeddings: np.ndarray) -> "_Table[T]":
+        name_ranks = np.empty(len(items), dtype=np.int64)
+        name_ranks[sorted(range(len(items)), key=lambda row: items[row].name)] = np.arange(
+            len(items)
+        )
+        return cls(
+            items=items,
+            embeddings=embeddings,
+            public=np.array([item.visibility == Visibility.PUBLIC for item in items], dtype=bool),
+            active=np.array([item.active for item in items], dtype=bool),
+            name_ranks=name_ranks,
+            rows_by_id={item.id: row for row, item in enumerate(items)},
+        )
+
+    @classmethod
+    def empty(cls, dimension: int) -> "_Table[T]":
+        return cls.build([], np.empty((0, dimension), dtype=np.float32))
+
+    def upsert(self, changes: Sequence[tuple[T, Sequence[float]]]) -> "_Table[T]":
+        """Return a new table with the changed items, or this table if nothing changed."""
+        changes = [
+            (item, embedding)
+            for item, embedding in changes
+            if item.id not in self.rows_by_id
+            or self.items[self.rows_by_id[item.id]].updated_at != item.updated_at
+        ]
+        if not changes:
+            return self
+
+        items = list(self.items)
+        embeddings = self.embeddings.copy()
+        new_items: list[T] = []
+        new_embeddings: list[Sequence[float]] = []
+        for item, embedding in changes:
+            row = self.rows_by_id.get(item.id)
+            if row is None:
+                new_items.append(item)
+                new_embeddings.append(embedding)
+            else:
+                items[row] = item
+                embeddings[row] = _normalize(np.asarray(embedding))
+        if new_items:
+            items.extend(new_items)
+            embeddings = np.vstack([embeddings, _normalize(np.asarray(new_embeddings))])
+
+        return _Table.build(items, embeddings)
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    apps: _Table[IndexedApp]
+    functions: _Table[IndexedFunction]
+    # row of the app of each function, -1 if the app is not indexed
+    function_app_rows: np.ndarray
+    app_rows_by_name: dict[str, int]
+    app_masks_by_category: dict[str, np.ndarray]
+    functions_by_app_id: dict[UUID, list[IndexedFunction]]
+    function_rows_by_name: dict[str, int]
+    # token -> (rows of the functions with the token, weight of the token in each function)
+    function_postings: dict[str, tuple[np.ndarray, np.ndarray]]
+
+    @classmethod
+    def build(cls, apps: _Table[IndexedApp], functions: _Table[IndexedFunction]) -> "_Snapshot":
+        app_masks_by_category: dict[str, np.ndarray] = {}
+        for row, app in enumerate(apps.items):
+            for category in app.categories:
+                app_masks_by_category.setdefault(category, np.zeros(len(apps.items), dtype=bool))
+                app_masks_by_category[category][row] = True
+
+        functions_by_app_id: dict[UUID, list[IndexedFunction]] = {}
+        weights_by_token: dict[str, dict[int, float]] = {}
+        for row, function in enumerate(functions.items):
+            functions_by_app_id.setdefault(function.app_id, []).append(function)
+            # in increasing order of weight, a token keeps the weight of the most important field
+            for weight, field in (
+                (TAGS_WEIGHT, " ".join(function.tags)),
+                (DESCRIPTION_WEIGHT, function.description),
+                (NAME_WEIGHT, function.name),
+            ):
+                for token in hybrid_search.tokenize(field):
+                    weights_by_token.setdefault(token, {})[row] = weight
+
+        return cls(
+            apps=apps,
+            functions=functions,
+            function_app_rows=np.array(
+                [apps.rows_by_id.get(function.app_id, -1) for function in functions.items],
+                dtype=np.int64,
+            ),
+            app_rows_by_name={app.name: row for row, app in enumerate(apps.items)},
+            app_masks_by_category=app_masks_by_category,
+            functions_by_app_id=functions_by_app_id,
+            function_rows_by_name={
+                function.name: row for row, function in enumerate(functions.items)
+            },
+            function_postings={
+                token: (
+                    np.fromiter(weights.keys(), dtype=np.int64, count=len(weights)),
+                    np.fromiter(weights.values(), dtype=np.float32, count=len(weights)),
+                )
+                for token, weights in weights_by_token.items()
+            },
+        )
+
+    def app_names_mask(self, app_names: list[str]) -> np.ndarray:
+        mask = np.zeros(len(self.apps.items), dtype=bool)
+        rows = [self.app_rows_by_name[name] for name in app_names if name in self.app_rows_by_name]
+        mask[rows] = True
+        return mask
+
+
+def _rank(
+    table: _Table[T],
+    mask: np.ndarray,
+    intent_embedding: list[float] | None,
+    limit: int,
+    offset: int,
+) -> tuple[np.ndarray, list[float | None]]:
+    """
+    Return the rows of the page of the items in the mask, with their cosine distance to the
+    intent, sorted by it, or sorted by name (and without distances) if there is no intent.
+    """
+    candidates = np.flatnonzero(mask)
+    if intent_embedding is None:
+        rows = candidates[np.argsort(table.name_ranks[candidates])][offset : offset + limit]
+        return rows, [None] * len(rows)
+
+    # a product with the whole matrix avoids copying the candidate rows out of it
+    similarities = (table.embeddings @ _normalize(np.asarray(intent_embedding)))[candidates]
+    top_k = min(offset + limit, len(candidates))
+    if top_k <= 0:
+        return candidates[:0], []
+    top = np.argpartition(-similarities, top_k - 1)[:top_k]
+    top = top[np.argsort(-similarities[top], kind="stable")][offset:]
+    return candidates[top], [float(1 - similarity) for similarity in similarities[top]]
+
+
+def _rank_lexically(snapshot: _Snapshot, mask: np.ndarray, lexical_query: str) -> np.ndarray | None:
+    """
+    Return the rows of the functions in the mask that have any token of the query, with the
+    function named exactly as the query first, then by the sum of the weights (times the inverse
+    document frequency) of the matched tokens. None if the query has no tokens.
+    """
+    tokens = set(hybrid_search.tokenize(lexical_query))
+    if not tokens:
+        return None
+
+    number_of_functions = len(snapshot.functions.items)
+    scores = np.zeros(number_of_functions, dtype=np.float32)
+    for token in tokens:
+        if token in snapshot.function_postings:
+            rows, weights = snapshot.function_postings[token]
+            scores[rows] += weights * np.log1p(number_of_functions / len(rows))
+
+    name = hybrid_search.as_name(lexical_query)
+    if name is not None and name in snapshot.function_rows_by_name:
+        scores[snapshot.function_rows_by_name[name]] = np.inf
+
+    candidates = np.flatnonzero(mask & (scores > 0))
+    # sorted by score, then by name
+    return candidates[np.lexsort((snapshot.functions.name_ranks[candidates], -scores[candidates]))]
+
+
+class CatalogIndex:
+    def __init__(self, refresh_interval: float, dimension: int = EMBEDDING_DIMENSION):
+        self.refresh_interval = refresh_interval
+        self.dimension = dimension
+        self._snapshot: _Snapshot | None = None
+        # the latest updated_at (db time) of the indexed rows
+        self._watermark: datetime | None = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether the index has been loaded and can serve searches."""
+        return self._snapshot is not None
+
+    def search_functions(
+        self,
+        public_only: bool,
+        active_only: bool,
+        app_names: list[str] | None,
+        intent_embedding: list[float] | None,
+        limit: int,
+        offset: int,
+        lexical_query: str | None = None,
+    ) -> list[IndexedFunction]:
+        """Same as crud.functions.search_functions, sorted by name if there is no intent."""
+        snapshot = self._get_snapshot()
+        if not snapshot.apps.items:
+            return []
+
+        app_rows = snapshot.function_app_rows
+        mask = app_rows >= 0
+        if active_only:
+            mask &= snapshot.functions.active & snapshot.apps.active[app_rows]
+        if public_only:
+            mask &= snapshot.functions.public & snapshot.apps.public[app_rows]
+        if app_names is not None:
+            mask &= snapshot.app_names_mask(app_names)[app_rows]
+
+        lexical_ranking = (
+            _rank_lexically(snapshot, mask, lexical_query) if lexical_query is not None else None
+        )
+        rows: list[int]
+        if lexical_ranking is None:
+            rows = _rank(snapshot.functions, mask, intent_embedding, limit, offset)[0].tolist()
+        elif intent_embedding is None:
+            rows = lexical_ranking[offset : offset + limit].tolist()
+        else:
+            # each ranking contributes its top offset + limit functions to the page
+            vector_ranking, _ = _rank(snapshot.functions, mask, intent_embedding, offset + limit, 0)
+            rows = hybrid_search.reciprocal_rank_fusion(
+                [lexical_ranking[: offset + limit].tolist(), vector_ranking.tolist()],
+                key=lambda row: row,
+            )[offset : offset + limit]
+
+        return [snapshot.functions.items[row] for row in rows]
+
+    def search_apps(
+        self,
+        public_only: bool,
+        active_only: bool,
+        app_names: list[str] | None,
+        categories: list[str] | None,
+        intent_embedding: list[float] | None,
+        limit: int,
+        offset: int,
+    ) -> list[tuple[IndexedApp, float | None]]:
+        """Same as crud.apps.search_apps, sorted by name if there is no intent."""
+        snapshot = self._get_snapshot()
+
+        mask = np.ones(len(snapshot.apps.items), dtype=bool)
+        if public_only:
+            mask &= snapshot.apps.public
+        if active_only:
+            mask &= snapshot.apps.active
+        if app_names is not None:
+            mask &= snapshot.app_names_mask(app_names)
+        if categories is not None:
+            categories_mask = np.zeros(len(snapshot.apps.items), dtype=bool)
+            for category in categories:
+                if category in snapshot.app_masks_by_category:
+                    categories_mask |= snapshot.app_masks_by_category[category]
+            mask &= categories_mask
+
+        rows, distances = _rank(snapshot.apps, mask, intent_embedding, limit, offset)
+        return [
+            (snapshot.apps.items[row], distance)
+            for row, distance in zip(rows, distances, strict=True)
+        ]
+
+    def get_app_functions(self, app_id: UUID) -> list[IndexedFunction]:
+        """All functions of the app (regardless of their visibility and active status)."""
+        return self._get_snapshot().functions_by_app_id.get(app_id, [])
+
+    def apply(
+        self,
+        apps: Sequence[tuple[IndexedApp, Sequence[float]]],
+        functions: Sequence[tuple[IndexedFunction, Sequence[float]]],
+        full_reload: bool = False,
+    ) -> None:
+        """
+        Apply the changed (new or updated) apps and functions with their embeddings.
+        With full_reload, the given apps and functions replace the whole index.
+        """
+        snapshot = self._snapshot
+        if full_reload or snapshot is None:
+            app_table: _Table[IndexedApp] = _Table.empty(self.dimension)
+            function_table: _Table[IndexedFunction] = _Table.empty(self.dimension)
+        else:
+            app_table, function_table = snapshot.apps, snapshot.functions
+
+        app_table = app_table.upsert(apps)
+        function_table = function_table.upsert(functions)
+        if (
+            snapshot is not None
+            and app_table is snapshot.apps
+            and function_table is snapshot.functions
+        ):
+            return
+        self._snapshot = _Snapshot.build(app_table, function_table)
+
+        updated_ats = [app.updated_at for app, _ in apps] + [
+            function.updated_at for function, _ in functions
+        ]
+        if self._watermark is not None and not full_reload:
+            updated_ats.append(self._watermark)
+        self._watermark = max(updated_ats, default=None)
+
+    async def refresh(self, db_session: AsyncSession) -> None:
+        """Apply the apps and functions updated since the last refresh, or load all of them."""
+        full_reload = self._snapshot is None or self._watermark is None
+        await self._refresh(db_session, full_reload)
+
+        snapshot = self._get_snapshot()
+        # deleted rows can't be found by updated_at, but they change the counts
+        if not full_reload and (
+            await crud.apps.count_apps_async(db_session) != len(snapshot.apps.items)
+            or await crud.functions.count_functions_async(db_session)
+            != len(snapshot.functions.items)
+        ):
+            logger.info("catalog index row counts differ from the db, reloading")
+            await self._refresh(db_session, True)
+
+    async def run_periodic_refresh(self, db_url: str) -> None:
+        """Load the index and keep it up to date, until cancelled."""
+        while True:
+            try:
+                async with utils.create_async_db_session(db_url) as db_session:
+                    await self.refresh(db_session)
+            except Exception:
+                logger.exception("failed to refresh catalog index, will retry at next refresh")
+            await asyncio.sleep(self.refresh_interval)
+
+    async def _refresh(self, db_session: AsyncSession, full_reload: bool) -> None:
+        updated_after = (
+            None if full_reload or self._watermark is None else self._watermark - REFRESH_OVERLAP
+        )
+        app_rows = await crud.apps.get_apps_search_data_async(db_session, updated_after)
+        function_rows = await crud.functions.get_functions_search_data_async(
+            db_session, updated_after
+        )
+        self.apply(
+            [
+                (
+                    IndexedApp(
+                        id=row.id,
+                        name=row.name,
+                        description=row.description,
+                        categories=row.categories,
+                        visibility=row.visibility,
+                        active=row.active,
+                        updated_at=row.updated_at,
+                    ),
+                    row.embedding,
+                )
+                for row in app_rows
+            ],
+            [
+                (
+                    IndexedFunction(
+                        id=row.id,
+                        app_id=row.app_id,
+                        name=row.name,
+                        description=row.description,
+                        tags=row.tags,
+                        parameters=row.parameters,
+                        visibility=row.visibility,
+                        active=row.active,
+                        updated_at=row.updated_at,
+                    ),
+                    row.embedding,
+                )
+                for row in function_rows
+            ],
+            full_reload,
+        )
+        logger.info(
+            "refreshed catalog index",
+            extra={
+                "full_reload": full_reload,
+                "number_of_updated_apps": len(app_rows),
+                "number_of_updated_functions": len(function_rows),
+            },
+        )
+
+    def _get_snapshot(self) -> _Snapshot:
+        if self._snapshot is None:
+            raise RuntimeError("catalog index is not loaded yet")
+        return self._snapshot
@@ -3,4 +3,16 @@ from aci.common.utils import check_and_get_env_variable
 AWS_REGION = check_and_get_env_variable("COMMON_AWS_REGION")
 AWS_ENDPOINT_URL = check_and_get_env_variable("COMMON_AWS_ENDPOINT_URL")
 KEY_ENCRYPTION_KEY_ARN = check_and_get_env_variable("COMMON_KEY_ENCRYPTION_KEY_ARN")
+# in-memory cache of the data keys (of KEY_ENCRYPTION_KEY_ARN) used to encrypt and decrypt secrets
+ENCRYPTION_CACHE_ENABLED = (
+    check_and_get_env_variable("COMMON_ENCRYPTION_CACHE_ENABLED").lower() == "true"
+)
+ENCRYPTION_CACHE_CAPACITY = int(check_and_get_env_variable("COMMON_ENCRYPTION_CACHE_CAPACITY"))
+ENCRYPTION_CACHE_MAX_AGE_SECONDS = float(
+    check_and_get_env_variable("COMMON_ENCRYPTION_CACHE_MAX_AGE_SECONDS")
+)
+# max number of messages encrypted with the same data key
+ENCRYPTION_CACHE_MAX_MESSAGES_ENCRYPTED = int(
+    check_and_get_env_variable("COMMON_ENCRYPTION_CACHE_MAX_MESSAGES_ENCRYPTED")
+)
 API_KEY_HASHING_SECRET = check_and_get_env_variable("COMMON_API_KEY_HASHING_SECRET")
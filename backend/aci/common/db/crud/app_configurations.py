@@ -1,6 +1,6 @@
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import Select, select
 from sqlalchemy.orm import Session
 
 from aci.common.db.sql_models import App, AppConfiguration
@@ -99,11 +99,19 @@ def get_app_configuration(
 ) -> AppConfiguration | None:
     """Get an app configuration by project id and app name"""
     app_configuration: AppConfiguration | None = db_session.execute(
+        _get_app_configuration_statement(project_id, app_name)
+    ).scalar_one_or_none()
+    return app_configuration
+
+
+def _get_app_configuration_statement(
+    project_id: UUID, app_name: str
+) -> Select[tuple[AppConfiguration]]:
+    return (
         select(AppConfiguration)
         .join(App, AppConfiguration.app_id == App.id)
         .filter(AppConfiguration.project_id == project_id, App.name == app_name)
-    ).scalar_one_or_none()
-    return app_configuration
+    )
 
 
 def get_app_configurations_by_app_id(db_session: Session, app_id: UUID) -> list[AppConfiguration]:
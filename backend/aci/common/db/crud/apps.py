@@ -2,10 +2,14 @@
 CRUD operations for apps. (not including app_configurations)
 """
 
-from sqlalchemy import select, update
+from datetime import datetime
+
+from sqlalchemy import Row, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from aci.common.db.sql_models import App
+from aci.common.db.vector_search import VectorSearchOptions, set_vector_search_options
 from aci.common.enums import SecurityScheme, Visibility
 from aci.common.logging_setup import get_logger
 from aci.common.schemas.app import AppUpsert
@@ -108,6 +112,7 @@ def search_apps(
     intent_embedding: list[float] | None,
     limit: int,
     offset: int,
+    vector_search_options: VectorSearchOptions | None = None,
 ) -> list[tuple[App, float | None]]:
     """Get a list of apps with optional filtering by categories and sorting by vector similarity to intent. and pagination."""
     statement = select(App)
@@ -131,6 +136,9 @@ def search_apps(
 
     # sort by similarity to intent
     if intent_embedding is not None:
+        if vector_search_options is not None:
+            filtered = public_only or active_only or app_names is not None or categories is not None
+            set_vector_search_options(db_session, vector_search_options, offset, limit, filtered)
         similarity_score = App.embedding.cosine_distance(intent_embedding)
         statement = statement.add_columns(similarity_score.label("similarity_score"))
         statement = statement.order_by("similarity_score")
@@ -147,6 +155,36 @@ def search_apps(
         return [(app, None) for (app,) in results]
 
 
+async def get_apps_search_data_async(
+    db_session: AsyncSession, updated_after: datetime | None
+) -> list[Row]:
+    """
+    Get the columns of apps needed for in-memory search, optionally only of the apps updated after
+    the given time. Rows are (id, name, description, categories, visibility, active, embedding,
+    updated_at). The (encrypted) security schemes and credentials are not loaded.
+    """
+    statement = select(
+        App.id,
+        App.name,
+        App.description,
+        App.categories,
+        App.visibility,
+        App.active,
+        App.embedding,
+        App.updated_at,
+    )
+    if updated_after is not None:
+        statement = statement.filter(App.updated_at > updated_after)
+
+    result = await db_session.execute(statement)
+    return list(result.all())
+
+
+async def count_apps_async(db_session: AsyncSession) -> int:
+    result = await db_session.execute(select(func.count()).select_from(App))
+    return int(result.scalar_one())
+
+
 def set_app_active_status(db_session: Session, app_name: str, active: bool) -> None:
     statement = update(App).filter_by(name=app_name).values(active=active)
     db_session.execute(statement)
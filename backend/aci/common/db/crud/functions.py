@@ -1,17 +1,29 @@
+from datetime import datetime
+from typing import Any, TypeVar
 from uuid import UUID
 
-from sqlalchemy import select, update
-from sqlalchemy.orm import Session
+from sqlalchemy import Row, Select, func, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 
-from aci.common import utils
+from aci.common import hybrid_search, utils
 from aci.common.db import crud
-from aci.common.db.sql_models import App, Function
+from aci.common.db.sql_models import (
+    FUNCTION_SEARCH_DOCUMENT,
+    App,
+    AppConfiguration,
+    Function,
+    LinkedAccount,
+)
+from aci.common.db.vector_search import VectorSearchOptions, set_vector_search_options
 from aci.common.enums import Visibility
 from aci.common.logging_setup import get_logger
 from aci.common.schemas.function import FunctionUpsert
 
 logger = get_logger(__name__)
 
+_T = TypeVar("_T", bound=tuple[Any, ...])
+
 
 def create_functions(
     db_session: Session,
@@ -83,8 +95,15 @@ def search_functions(
     intent_embedding: list[float] | None,
     limit: int,
     offset: int,
+    vector_search_options: VectorSearchOptions | None = None,
+    lexical_query: str | None = None,
 ) -> list[Function]:
-    """Get a list of functions with optional filtering by app names and sorting by vector similarity to intent."""
+    """
+    Get a list of functions with optional filtering by app names, sorted by relevance to the intent:
+    - with intent_embedding only: by vector similarity
+    - with lexical_query only: by full-text match, only the matching functions are returned
+    - with both: by reciprocal rank fusion of the two rankings (see hybrid_search.py)
+    """
     statement = select(Function).join(App, Function.app_id == App.id)
 
     # filter out all functions of inactive apps and all inactive functions
@@ -100,14 +119,81 @@ def search_functions(
     # filter out functions that are not in the specified apps
     if app_names is not None:
         statement = statement.filter(App.name.in_(app_names))
+    filtered = active_only or public_only or app_names is not None
+
+    lexical_statement = (
+        _order_by_lexical_match(statement, lexical_query) if lexical_query is not None else None
+    )
+    if lexical_statement is not None and intent_embedding is not None:
+        # each ranking contributes its top offset + limit functions to the page
+        lexical_ranking = _execute_search(lexical_statement.limit(offset + limit), db_session)
+        vector_ranking = _execute_search(
+            _order_by_similarity(
+                statement,
+                intent_embedding,
+                db_session,
+                vector_search_options,
+                offset,
+                limit,
+                filtered,
+            ).limit(offset + limit),
+            db_session,
+        )
+        functions = hybrid_search.reciprocal_rank_fusion(
+            [lexical_ranking, vector_ranking], key=lambda function: function.id
+        )
+        return functions[offset : offset + limit]
+
+    if lexical_statement is not None:
+        statement = lexical_statement
+    elif intent_embedding is not None:
+        statement = _order_by_similarity(
+            statement, intent_embedding, db_session, vector_search_options, offset, limit, filtered
+        )
 
-    if intent_embedding is not None:
-        similarity_score = Function.embedding.cosine_distance(intent_embedding)
-        statement = statement.order_by(similarity_score)
+    return _execute_search(statement.offset(offset).limit(limit), db_session)
 
-    statement = statement.offset(offset).limit(limit)
-    logger.debug(f"Executing statement: {statement}")
 
+def _order_by_similarity(
+    statement: Select[tuple[Function]],
+    intent_embedding: list[float],
+    db_session: Session,
+    vector_search_options: VectorSearchOptions | None,
+    offset: int,
+    limit: int,
+    filtered: bool,
+) -> Select[tuple[Function]]:
+    if vector_search_options is not None:
+        set_vector_search_options(db_session, vector_search_options, offset, limit, filtered)
+    similarity_score = Function.embedding.cosine_distance(intent_embedding)
+    return statement.order_by(similarity_score)
+
+
+def _order_by_lexical_match(
+    statement: Select[tuple[Function]], lexical_query: str
+) -> Select[tuple[Function]] | None:
+    """
+    Filter to the functions that match any word of the query, with the function named exactly as
+    the query first, then by full-text rank. None if the query has no words.
+    """
+    tokens = hybrid_search.tokenize(lexical_query)
+    if not tokens:
+        return None
+
+    # the tokens are alphanumeric, so the query can't have tsquery syntax errors
+    tsquery = func.to_tsquery(text("'english'::regconfig"), " | ".join(tokens))
+    statement = statement.filter(FUNCTION_SEARCH_DOCUMENT.bool_op("@@")(tsquery))
+
+    name = hybrid_search.as_name(lexical_query)
+    if name is not None:
+        statement = statement.order_by((Function.name == name).desc())
+    return statement.order_by(
+        func.ts_rank_cd(FUNCTION_SEARCH_DOCUMENT, tsquery).desc(), Function.name
+    )
+
+
+def _execute_search(statement: Select[tuple[Function]], db_session: Session) -> list[Function]:
+    logger.debug(f"Executing statement: {statement}")
     return list(db_session.execute(statement).scalars().all())
 
 
@@ -139,6 +225,38 @@ def get_functions(
     return list(db_session.execute(statement).scalars().all())
 
 
+async def get_functions_search_data_async(
+    db_session: AsyncSession, updated_after: datetime | None
+) -> list[Row]:
+    """
+    Get the columns of functions needed for in-memory search, optionally only of the functions
+    updated after the given time. Rows are (id, app_id, name, description, tags, parameters,
+    visibility, active, embedding, updated_at).
+    """
+    statement = select(
+        Function.id,
+        Function.app_id,
+        Function.name,
+        Function.description,
+        Function.tags,
+        Function.parameters,
+        Function.visibility,
+        Function.active,
+        Function.embedding,
+        Function.updated_at,
+    )
+    if updated_after is not None:
+        statement = statement.filter(Function.updated_at > updated_after)
+
+    result = await db_session.execute(statement)
+    return list(result.all())
+
+
+async def count_functions_async(db_session: AsyncSession) -> int:
+    result = await db_session.execute(select(func.count()).select_from(Function))
+    return int(result.scalar_one())
+
+
 def get_functions_by_app_id(db_session: Session, app_id: UUID) -> list[Function]:
     statement = select(Function).filter(Function.app_id == app_id)
 
@@ -148,16 +266,84 @@ def get_functions_by_app_id(db_session: Session, app_id: UUID) -> list[Function]
 def get_function(
     db_session: Session, function_name: str, public_only: bool, active_only: bool
 ) -> Function | None:
-    statement = select(Function).filter(Function.name == function_name)
+    statement = _get_function_statement(function_name, public_only, active_only)
 
+    return db_session.execute(statement).scalar_one_or_none()
+
+
+async def get_function_async(
+    db_session: AsyncSession, function_name: str, public_only: bool, active_only: bool
+) -> Function | None:
+    """Async variant of get_function, with function.app eagerly loaded."""
+    statement = _get_function_statement(function_name, public_only, active_only).options(
+        joinedload(Function.app)
+    )
+
+    result = await db_session.execute(statement)
+    return result.scalar_one_or_none()
+
+
+async def get_function_execution_rows_async(
+    db_session: AsyncSession,
+    project_id: UUID,
+    function_name: str,
+    public_only: bool,
+    active_only: bool,
+    linked_account_owner_id: str,
+) -> tuple[UUID, datetime, datetime, AppConfiguration | None, LinkedAccount | None] | None:
+    """
+    Get what executing a function needs from the db in one round trip: the function's id, the
+    versions (updated_at) of the function and its app, and the project's configuration of the app
+    and the owner's linked account of the app (None if they don't exist).
+    Note: the app relationships of the app configuration and linked account are not loaded.
+    """
+    statement = _filter_function_statement(
+        select(
+            Function.id,
+            Function.updated_at,
+            App.updated_at,
+            AppConfiguration,
+            LinkedAccount,
+        )
+        .select_from(Function)
+        .join(App, Function.app_id == App.id)
+        .outerjoin(
+            AppConfiguration,
+            (AppConfiguration.app_id == App.id) & (AppConfiguration.project_id == project_id),
+        )
+        .outerjoin(
+            LinkedAccount,
+            (LinkedAccount.app_id == App.id)
+            & (LinkedAccount.project_id == project_id)
+            & (LinkedAccount.linked_account_owner_id == linked_account_owner_id),
+        )
+        .filter(Function.name == function_name),
+        public_only,
+        active_only,
+    )
+
+    result = await db_session.execute(statement)
+    return result.tuples().one_or_none()
+
+
+def _get_function_statement(
+    function_name: str, public_only: bool, active_only: bool
+) -> Select[tuple[Function]]:
+    statement = (
+        select(Function).join(App, Function.app_id == App.id).filter(Function.name == function_name)
+    )
+
+    return _filter_function_statement(statement, public_only, active_only)
+
+
+def _filter_function_statement(
+    statement: Select[_T], public_only: bool, active_only: bool
+) -> Select[_T]:
+    """Filter a statement of functions joined with apps by active status and visibility."""
     # filter out all functions of inactive apps and all inactive functions
     # (where app is active buy specific functions can be inactive)
     if active_only:
-        statement = (
-            statement.join(App, Function.app_id == App.id)
-            .filter(App.active)
-            .filter(Function.active)
-        )
+        statement = statement.filter(App.active).filter(Function.active)
     # if the corresponding project (api key belongs to) can only access public apps and functions,
     # filter out all functions of private apps and all private functions (where app is public but specific function is private)
     if public_only:
@@ -165,7 +351,7 @@ def get_function(
             Function.visibility == Visibility.PUBLIC
         )
 
-    return db_session.execute(statement).scalar_one_or_none()
+    return statement
 
 
 def set_function_active_status(db_session: Session, function_name: str, active: bool) -> None:
@@ -1,11 +1,14 @@
+from collections.abc import Collection
 from datetime import datetime
 from uuid import UUID
 
-from sqlalchemy import distinct, func, select
-from sqlalchemy.orm import Session
+from sqlalchemy import Select, distinct, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 
 from aci.common import validators
-from aci.common.db.sql_models import App, LinkedAccount, Project
+from aci.common.db.custom_sql_types import ENCRYPTED_FIELDS_KEY
+from aci.common.db.sql_models import App, AppConfiguration, LinkedAccount, Project
 from aci.common.enums import SecurityScheme
 from aci.common.logging_setup import get_logger
 from aci.common.schemas.linked_accounts import LinkedAccountUpdate
@@ -39,7 +42,16 @@ def get_linked_accounts(
 def get_linked_account(
     db_session: Session, project_id: UUID, app_name: str, linked_account_owner_id: str
 ) -> LinkedAccount | None:
-    statement = (
+    statement = _get_linked_account_statement(project_id, app_name, linked_account_owner_id)
+    linked_account: LinkedAccount | None = db_session.execute(statement).scalar_one_or_none()
+
+    return linked_account
+
+
+def _get_linked_account_statement(
+    project_id: UUID, app_name: str, linked_account_owner_id: str
+) -> Select[tuple[LinkedAccount]]:
+    return (
         select(LinkedAccount)
         .join(App, LinkedAccount.app_id == App.id)
         .filter(
@@ -48,9 +60,6 @@ def get_linked_account(
             LinkedAccount.linked_account_owner_id == linked_account_owner_id,
         )
     )
-    linked_account: LinkedAccount | None = db_session.execute(statement).scalar_one_or_none()
-
-    return linked_account
 
 
 def get_linked_accounts_by_app_id(db_session: Session, app_id: UUID) -> list[LinkedAccount]:
@@ -195,3 +204,81 @@ def linked_account_owner_id_exists_in_org(
         LinkedAccount.project_id.in_(select(Project.id).filter(Project.org_id == org_id)),
     )
     return db_session.execute(statement).scalar_one_or_none() is not None
+
+
+def get_linked_accounts_with_legacy_encrypted_credentials(
+    db_session: Session, limit: int, lock: bool = False
+) -> list[LinkedAccount]:
+    """
+    Get linked accounts whose security credentials are still in the legacy format, where each
+    secret field is encrypted separately (see EncryptedSecurityCredentials).
+    With lock, the rows are locked (FOR UPDATE) until the end of the transaction, and rows locked by
+    other transactions (e.g., a concurrent credentials update) are skipped.
+    """
+    statement = (
+        select(LinkedAccount)
+        .filter(
+            or_(
+                LinkedAccount.security_credentials.has_key("secret_key"),
+                LinkedAccount.security_credentials.has_key("access_token"),
+            ),
+            ~LinkedAccount.security_credentials.has_key(ENCRYPTED_FIELDS_KEY),
+        )
+        .order_by(LinkedAccount.created_at)
+        .limit(limit)
+    )
+    if lock:
+        statement = statement.with_for_update(skip_locked=True)
+    return list(db_session.execute(statement).scalars().all())
+
+
+async def get_linked_account_by_id_async(
+    db_session: AsyncSession, linked_account_id: UUID
+) -> LinkedAccount | None:
+    result = await db_session.execute(select(LinkedAccount).filter_by(id=linked_account_id))
+    linked_account: LinkedAccount | None = result.scalar_one_or_none()
+    return linked_account
+
+
+async def lock_linked_account_async(db_session: AsyncSession, linked_account_id: UUID) -> None:
+    """
+    Acquire a transaction level advisory lock on the linked account, waiting if another transaction
+    holds it. The lock is released when the transaction ends (commit or rollback).
+    """
+    lock_key = int.from_bytes(linked_account_id.bytes[:8], "big", signed=True)
+    await db_session.execute(select(func.pg_advisory_xact_lock(lock_key)))
+
+
+async def get_oauth2_linked_accounts_expiring_before_async(
+    db_session: AsyncSession,
+    expires_before: int,
+    used_after: datetime,
+    limit: int,
+    excluded_ids: Collection[UUID] = (),
+) -> list[tuple[LinkedAccount, AppConfiguration]]:
+    """
+    Get the enabled OAuth2 linked accounts (with their app loaded) whose access token expires
+    before the given timestamp, and that have been used after the given time, with the app
+    configurations they belong to. expires_at is stored in clear, so it can be filtered on.
+    Linked accounts in excluded_ids are skipped.
+    """
+    statement = (
+        select(LinkedAccount, AppConfiguration)
+        .join(
+            AppConfiguration,
+            (AppConfiguration.project_id == LinkedAccount.project_id)
+            & (AppConfiguration.app_id == LinkedAccount.app_id),
+        )
+        .options(joinedload(LinkedAccount.app))
+        .filter(
+            LinkedAccount.security_scheme == SecurityScheme.OAUTH2,
+            LinkedAccount.enabled.is_(True),
+            LinkedAccount.last_used_at > used_after,
+            LinkedAccount.security_credentials["expires_at"].as_integer() < expires_before,
+            LinkedAccount.id.not_in(excluded_ids),
+        )
+        .order_by(LinkedAccount.security_credentials["expires_at"].as_integer())
+        .limit(limit)
+    )
+    result = await db_session.execute(statement)
+    return list(result.tuples().all())
@@ -7,14 +7,16 @@ import secrets
 from datetime import UTC, datetime, timedelta
 from uuid import UUID
 
-from sqlalchemy import func, select, update
+from sqlalchemy import Integer, Select, case, column, func, select, update, values
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from aci.common import encryption
 from aci.common.db.sql_models import Agent, APIKey, Project
 from aci.common.enums import APIKeyStatus, Visibility
 from aci.common.logging_setup import get_logger
-from aci.common.schemas.agent import AgentUpdate, ValidInstruction
+from aci.common.schemas.agent import AgentUpdate, InputRule, ValidInstruction
 
 logger = get_logger(__name__)
 
@@ -53,6 +55,15 @@ def get_project(db_session: Session, project_id: UUID) -> Project | None:
     return project
 
 
+async def get_project_async(db_session: AsyncSession, project_id: UUID) -> Project | None:
+    """
+    Async variant of get_project.
+    """
+    result = await db_session.execute(select(Project).filter_by(id=project_id))
+    project: Project | None = result.scalar_one_or_none()
+    return project
+
+
 def get_projects_by_org(db_session: Session, org_id: UUID) -> list[Project]:
     projects = list(db_session.execute(select(Project).filter_by(org_id=org_id)).scalars().all())
     return projects
@@ -111,6 +122,49 @@ def increase_project_quota_usage(db_session: Session, project: Project) -> None:
     db_session.execute(statement)
 
 
+async def get_projects_async(db_session: AsyncSession, project_ids: list[UUID]) -> list[Project]:
+    result = await db_session.execute(select(Project).filter(Project.id.in_(project_ids)))
+    return list(result.scalars().all())
+
+
+async def increase_projects_quota_usage_async(
+    db_session: AsyncSession, quota_usage_by_project_id: dict[UUID, int]
+) -> None:
+    """
+    Add aggregated quota usage to multiple projects in a single UPDATE statement.
+    The daily quota of a project is reset first if it's due for reset.
+    """
+    if not quota_usage_by_project_id:
+        return
+
+    now: datetime = datetime.now(UTC)
+    usage = values(
+        column("project_id", PGUUID(as_uuid=True)),
+        column("quota_used", Integer),
+        name="quota_usage",
+    ).data(list(quota_usage_by_project_id.items()))
+    need_reset = Project.daily_quota_reset_at <= now - timedelta(days=1)
+
+    statement = (
+        update(Project)
+        .where(Project.id == usage.c.project_id)
+        .values(
+            {
+                Project.daily_quota_used: case(
+                    (need_reset, usage.c.quota_used),
+                    else_=Project.daily_quota_used + usage.c.quota_used,
+                ),
+                Project.daily_quota_reset_at: case(
+                    (need_reset, now), else_=Project.daily_quota_reset_at
+                ),
+                Project.total_quota_used: Project.total_quota_used + usage.c.quota_used,
+            }
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db_session.execute(statement)
+
+
 def create_agent(
     db_session: Session,
     project_id: UUID,
@@ -118,6 +172,7 @@ def create_agent(
     description: str,
     allowed_apps: list[str],
     custom_instructions: dict[str, ValidInstruction],
+    custom_instruction_rules: dict[str, list[InputRule]] | None = None,
 ) -> Agent:
     """
     Create a new agent under a project, and create a new API key for the agent.
@@ -129,6 +184,7 @@ def create_agent(
         description=description,
         allowed_apps=allowed_apps,
         custom_instructions=custom_instructions,
+        custom_instruction_rules=_dump_input_rules(custom_instruction_rules or {}),
     )
     db_session.add(agent)
 
@@ -162,6 +218,8 @@ def update_agent(
         agent.allowed_apps = update.allowed_apps
     if update.custom_instructions is not None:
         agent.custom_instructions = update.custom_instructions
+    if update.custom_instruction_rules is not None:
+        agent.custom_instruction_rules = _dump_input_rules(update.custom_instruction_rules)
 
     db_session.flush()
     db_session.refresh(agent)
@@ -169,6 +227,13 @@ def update_agent(
     return agent
 
 
+def _dump_input_rules(input_rules: dict[str, list[InputRule]]) -> dict[str, list[dict]]:
+    return {
+        function_name: [rule.model_dump(mode="json", exclude_none=True) for rule in rules]
+        for function_name, rules in input_rules.items()
+    }
+
+
 def delete_agent(db_session: Session, agent: Agent) -> None:
     db_session.delete(agent)
     db_session.flush()
@@ -194,9 +259,18 @@ def get_agent_by_id(db_session: Session, agent_id: UUID) -> Agent | None:
 
 
 def get_agent_by_api_key_id(db_session: Session, api_key_id: UUID) -> Agent | None:
-    return db_session.execute(
+    return db_session.execute(_get_agent_by_api_key_id_statement(api_key_id)).scalar_one_or_none()
+
+
+async def get_agent_by_api_key_id_async(db_session: AsyncSession, api_key_id: UUID) -> Agent | None:
+    result = await db_session.execute(_get_agent_by_api_key_id_statement(api_key_id))
+    return result.scalar_one_or_none()
+
+
+def _get_agent_by_api_key_id_statement(api_key_id: UUID) -> Select[tuple[Agent]]:
+    return (
         select(Agent).join(APIKey, Agent.id == APIKey.agent_id).filter(APIKey.id == str(api_key_id))
-    ).scalar_one_or_none()
+    )
 
 
 def get_agents_whose_allowed_apps_contains(db_session: Session, app_name: str) -> list[Agent]:
@@ -213,6 +287,12 @@ def get_api_key(db_session: Session, key: str) -> APIKey | None:
     return db_session.execute(select(APIKey).filter_by(key_hmac=key_hmac)).scalar_one_or_none()
 
 
+async def get_api_key_async(db_session: AsyncSession, key: str) -> APIKey | None:
+    key_hmac = encryption.hmac_sha256(key)
+    result = await db_session.execute(select(APIKey).filter_by(key_hmac=key_hmac))
+    return result.scalar_one_or_none()
+
+
 def get_all_api_key_ids_for_project(db_session: Session, project_id: UUID) -> list[UUID]:
     agents = get_agents_by_project(db_session, project_id)
     project_api_key_ids = []
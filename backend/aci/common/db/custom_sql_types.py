@@ -81,7 +81,28 @@ class EncryptedSecurityScheme(TypeDecorator[dict]):
         return None
 
 
+# Key of the encrypted sub-document holding all secret fields of a security credentials row.
+# Rows written before it was introduced have each secret field encrypted separately instead.
+ENCRYPTED_FIELDS_KEY = "encrypted_fields"
+# TODO: if we add a new secret field or rename a field in the future, update these
+_API_KEY_SECRET_FIELDS: tuple[str, ...] = ("secret_key",)
+_OAUTH2_SECRET_FIELDS: tuple[str, ...] = (
+    "client_secret",
+    "access_token",
+    "refresh_token",
+    "raw_token_response",
+)
+
+
 class EncryptedSecurityCredentials(TypeDecorator[dict]):
+    """
+    The secret fields of a credentials row are encrypted together as one json sub-document (stored
+    under ENCRYPTED_FIELDS_KEY), so that each row carries a single message header and data key.
+    The non-secret fields (e.g., client_id, scope, expires_at) are stored in clear.
+    Rows in the legacy per-field format are still read, and are rewritten in the new format when
+    they are next updated.
+    """
+
     impl = JSONB
     cache_ok = True
 
@@ -89,35 +110,22 @@ class EncryptedSecurityCredentials(TypeDecorator[dict]):
         if value is not None:
             encrypted_value = copy.deepcopy(value)  # Avoid modifying the original dict
 
-            # TODO: if we add a new field or rename a field in the future,
-            # we need to update the process_result_value method to handle the new field
-
             # APIKeySchemeCredentials
             if "secret_key" in encrypted_value:
-                secret_key = encrypted_value["secret_key"]
-                if isinstance(secret_key, str):
-                    encrypted_value["secret_key"] = _encrypt_value(secret_key)
-
+                secret_fields = _API_KEY_SECRET_FIELDS
             # OAuth2SchemeCredentials
             elif "access_token" in encrypted_value:
-                client_secret = encrypted_value.get("client_secret")
-                if isinstance(client_secret, str):
-                    encrypted_value["client_secret"] = _encrypt_value(client_secret)
-
-                access_token = encrypted_value.get("access_token")
-                if isinstance(access_token, str):
-                    encrypted_value["access_token"] = _encrypt_value(access_token)
-
-                refresh_token = encrypted_value.get("refresh_token")
-                if isinstance(refresh_token, str):
-                    encrypted_value["refresh_token"] = _encrypt_value(refresh_token)
-
-                raw_token_response = encrypted_value.get("raw_token_response")
-                if isinstance(raw_token_response, dict):
-                    raw_token_response_str = json.dumps(raw_token_response)
-                    encrypted_value["raw_token_response"] = _encrypt_value(raw_token_response_str)
-
+                secret_fields = _OAUTH2_SECRET_FIELDS
             # NoAuthSchemeCredentials (empty dict) - do nothing
+            else:
+                return encrypted_value
+
+            secrets = {
+                field: encrypted_value.pop(field)
+                for field in secret_fields
+                if field in encrypted_value
+            }
+            encrypted_value[ENCRYPTED_FIELDS_KEY] = _encrypt_value(json.dumps(secrets))
 
             return encrypted_value
         return None
@@ -126,13 +134,17 @@ class EncryptedSecurityCredentials(TypeDecorator[dict]):
         if value is not None:
             decrypted_value = copy.deepcopy(value)  # Avoid modifying the original dict
 
-            # APIKeySchemeCredentials
-            if "secret_key" in decrypted_value:
+            if ENCRYPTED_FIELDS_KEY in decrypted_value:
+                encrypted_fields_b64 = decrypted_value.pop(ENCRYPTED_FIELDS_KEY)
+                decrypted_value.update(json.loads(_decrypt_value(encrypted_fields_b64)))
+
+            # Legacy format: APIKeySchemeCredentials
+            elif "secret_key" in decrypted_value:
                 secret_key_b64 = decrypted_value["secret_key"]
                 if isinstance(secret_key_b64, str):
                     decrypted_value["secret_key"] = _decrypt_value(secret_key_b64)
 
-            # OAuth2SchemeCredentials
+            # Legacy format: OAuth2SchemeCredentials
             elif "access_token" in decrypted_value:
                 client_secret_b64 = decrypted_value.get("client_secret")
                 if isinstance(client_secret_b64, str):
@@ -0,0 +1,199 @@
+"""
+Process-wide registry of SQLAlchemy engines.
+
+Creating an engine sets up a new connection pool, so we keep exactly one engine per db url per
+process and share it between the server, the app connectors and the cli.
+Pool settings can be registered per db url (e.g., by the server at startup) before the engine is
+first used; otherwise the defaults of DBPoolConfig are used.
+The same settings apply to the async engine (psycopg async driver) of the db url, which has its
+own pool.
+"""
+
+import threading
+import time
+from typing import Any
+
+from pydantic import BaseModel
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry, QueuePool
+
+from aci.common.logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+
+class DBPoolConfig(BaseModel):
+    pool_size: int = 5
+    max_overflow: int = 10
+    # seconds to wait for a connection before giving up
+    pool_timeout: float = 30.0
+    # seconds after which a connection is recycled, -1 means never
+    pool_recycle: int = 1800
+    # test connections for liveness on checkout
+    pool_pre_ping: bool = True
+
+
+class DBPoolStats(BaseModel):
+    is_async: bool
+    pool_size: int
+    checked_out: int
+    checked_in: int
+    overflow: int
+    total_checkouts: int
+    total_wait_seconds: float
+    max_wait_seconds: float
+
+
+class _PoolWaitStats:
+    """Accumulated time spent waiting for a connection to be checked out of the pool."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.total_checkouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record(self, wait_seconds: float) -> None:
+        with self._lock:
+            self.total_checkouts += 1
+            self.total_wait_seconds += wait_seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+
+
+class _InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.wait_stats = _PoolWaitStats()
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.wait_stats.record(time.perf_counter() - start)
+
+    def recreate(self) -> QueuePool:
+        # keep the stats across engine.dispose()
+        pool = super().recreate()
+        if isinstance(pool, _InstrumentedQueuePool):
+            pool.wait_stats = self.wait_stats
+        return pool
+
+
+class _InstrumentedAsyncAdaptedQueuePool(_InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """Asyncio flavour of _InstrumentedQueuePool, used by async engines."""
+
+
+_lock = threading.Lock()
+_engines: dict[str, Engine] = {}
+_async_engines: dict[str, AsyncEngine] = {}
+_pool_configs: dict[str, DBPoolConfig] = {}
+
+
+def configure_db_pool(db_url: str, pool_config: DBPoolConfig) -> None:
+    """
+    Register the pool settings to use for db_url. Has no effect on an engine that was already
+    created for db_url, so it should be called before the first session is opened.
+    """
+    with _lock:
+        if db_url in _engines or db_url in _async_engines:
+            logger.warning("db engine already created, new pool config is ignored")
+            return
+        _pool_configs[db_url] = pool_config
+
+
+def get_db_engine(db_url: str) -> Engine:
+    """Get the process-wide engine for db_url, creating it on first use."""
+    engine = _engines.get(db_url)
+    if engine is not None:
+        return engine
+
+    with _lock:
+        # double-checked, another thread might have created the engine while we waited for the lock
+        engine = _engines.get(db_url)
+        if engine is None:
+            engine = create_engine(
+                db_url, poolclass=_InstrumentedQueuePool, **_get_pool_kwargs(db_url)
+            )
+            _engines[db_url] = engine
+            logger.info(
+                "created db engine",
+                extra={"db_url": engine.url.render_as_string(hide_password=True)},
+            )
+        return engine
+
+
+def get_async_db_engine(db_url: str) -> AsyncEngine:
+    """
+    Get the process-wide async engine for db_url, creating it on first use.
+    For "postgresql+psycopg" urls SQLAlchemy picks the async variant of the psycopg dialect.
+    """
+    engine = _async_engines.get(db_url)
+    if engine is not None:
+        return engine
+
+    with _lock:
+        engine = _async_engines.get(db_url)
+        if engine is None:
+            engine = create_async_engine(
+                db_url, poolclass=_InstrumentedAsyncAdaptedQueuePool, **_get_pool_kwargs(db_url)
+            )
+            _async_engines[db_url] = engine
+            logger.info(
+                "created async db engine",
+                extra={"db_url": engine.url.render_as_string(hide_password=True)},
+            )
+        return engine
+
+
+def _get_pool_kwargs(db_url: str) -> dict[str, Any]:
+    pool_config = _pool_configs.get(db_url, DBPoolConfig())
+    return {
+        "pool_size": pool_config.pool_size,
+        "max_overflow": pool_config.max_overflow,
+        "pool_timeout": pool_config.pool_timeout,
+        "pool_recycle": pool_config.pool_recycle,
+        "pool_pre_ping": pool_config.pool_pre_ping,
+    }
+
+
+def get_db_pool_stats() -> list[DBPoolStats]:
+    """Connection pool metrics of all engines created in this process."""
+    stats: list[DBPoolStats] = []
+    engines = [*_engines.values(), *(engine.sync_engine for engine in _async_engines.values())]
+    for engine in engines:
+        pool = engine.pool
+        if not isinstance(pool, _InstrumentedQueuePool):
+            continue
+        stats.append(
+            DBPoolStats(
+                is_async=isinstance(pool, _InstrumentedAsyncAdaptedQueuePool),
+                pool_size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=pool.overflow(),
+                total_checkouts=pool.wait_stats.total_checkouts,
+                total_wait_seconds=pool.wait_stats.total_wait_seconds,
+                max_wait_seconds=pool.wait_stats.max_wait_seconds,
+            )
+        )
+    return stats
+
+
+def dispose_db_engines() -> None:
+    """Close all pooled connections, e.g., at server shutdown. The engines stay usable."""
+    with _lock:
+        for engine in _engines.values():
+            engine.dispose()
+
+
+async def dispose_async_db_engines() -> None:
+    """
+    Close all pooled connections of the async engines. Async connections are bound to the event
+    loop they were created in, so this must run in that loop, e.g., at server shutdown.
+    """
+    for engine in list(_async_engines.values()):
+        await engine.dispose()
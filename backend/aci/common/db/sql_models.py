@@ -5,11 +5,12 @@ Note: at the time of writing, it's still too early to do optimizations on the da
 but we should keep an eye on it and be prepared for potential future optimizations.
 for example,
 1. should enum where possible, such as Plan, Visibility, etc
-2. create index on embedding and other fields that are frequently used for filtering
+2. create index on fields that are frequently used for filtering
 3. materialized views for frequently queried data
 4. limit string length for fields that have string type
-5. Note we might need to set up index for embedding manually for customizing the similarity search algorithm
-   (https://github.com/pgvector/pgvector)
+Note: the embeddings have HNSW indexes for the cosine distance (https://github.com/pgvector/pgvector),
+see EMBEDDING_HNSW_INDEX_PARAMS and VectorSearchOptions for the build and query time parameters.
+Note: functions have a GIN index on their full-text search document, see FUNCTION_SEARCH_DOCUMENT.
 """
 
 # TODO: ideally shouldn't need it in python 3.12 for forward reference?
@@ -23,11 +24,13 @@ from sqlalchemy import (
     Boolean,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
     UniqueConstraint,
     func,
+    text,
 )
 from sqlalchemy import Enum as SqlEnum
 
@@ -52,6 +55,8 @@ from aci.common.enums import (
 )
 
 EMBEDDING_DIMENSION = 1024
+# build parameters of the HNSW indexes on the embeddings (pgvector's defaults)
+EMBEDDING_HNSW_INDEX_PARAMS = {"m": 16, "ef_construction": 64}
 APP_DEFAULT_VERSION = "1.0.0"
 # need app to be shorter because it's used as prefix for function name
 APP_NAME_MAX_LENGTH = 100
@@ -140,6 +145,14 @@ class Agent(Base):
         MutableDict.as_mutable(JSONB),
         nullable=False,
     )
+    # Structured rules on the function inputs, checked locally before the custom instructions.
+    # The key is the function name, and the value is the list of rules (see schemas.agent.InputRule).
+    custom_instruction_rules: Mapped[dict[str, list[dict]]] = mapped_column(
+        MutableDict.as_mutable(JSONB),
+        nullable=False,
+        default_factory=dict,
+        server_default="{}",
+    )
 
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=False), server_default=func.now(), nullable=False, init=False
@@ -245,6 +258,37 @@ class Function(Base):
     def app_name(self) -> str:
         return str(self.app.name)
 
+    __table_args__ = (
+        Index(
+            "ix_functions_embedding_hnsw",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with=EMBEDDING_HNSW_INDEX_PARAMS,
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        ),
+    )
+
+
+# full-text search document of a function, for the lexical ranking of function search. The name's
+# words weigh the most, then the description's and the tags'. Note: the literals are not bound
+# parameters so that queries match the expression of the index.
+FUNCTION_SEARCH_DOCUMENT = (
+    func.setweight(
+        func.to_tsvector(
+            text("'english'::regconfig"), func.replace(Function.name, text("'_'"), text("' '"))
+        ),
+        text("'A'"),
+    )
+    .op("||")(
+        func.setweight(
+            func.to_tsvector(text("'english'::regconfig"), Function.description), text("'B'")
+        )
+    )
+    .op("||")(func.setweight(func.array_to_tsvector(Function.tags), text("'C'")))
+)
+
+Index("ix_functions_search_document", FUNCTION_SEARCH_DOCUMENT, postgresql_using="gin")
+
 
 class App(Base):
     __tablename__ = "apps"
@@ -298,6 +342,16 @@ class App(Base):
         init=False,
     )
 
+    __table_args__ = (
+        Index(
+            "ix_apps_embedding_hnsw",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with=EMBEDDING_HNSW_INDEX_PARAMS,
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        ),
+    )
+
 
 # TODO: We make the decision to only allow one configuration per app per project to avoid unjustified
 # complexity and mental overhead on client side. (simplify apis and sdks) But we can revisit this decision
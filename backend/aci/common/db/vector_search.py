@@ -0,0 +1,75 @@
+"""
+Query time parameters of the similarity searches that use the HNSW indexes on the embeddings.
+
+- ef_search: size of the candidate list of the index scan, higher is better recall but slower.
+  The index scan returns at most ef_search rows, so it's raised to offset + limit if needed.
+- iterative_scan: with filters (e.g., app names, visibility), the rows filtered out of the
+  ef_search candidates would be missing from the results. "strict_order" or "relaxed_order" make
+  the index scan continue until enough rows pass the filters, "off" disables it. The setting only
+  exists in pgvector >= 0.8.0 (setting it on older versions is an error), so it's ignored, with a
+  warning, when the installed pgvector is older.
+
+Filtered searches must not lose results, so when iterative scan is off or unsupported, the index
+scans are disabled for them (enable_indexscan=off), i.e., they fall back to an exact scan.
+
+The parameters are set for the current transaction only (set_config(..., is_local=true)).
+"""
+
+from pydantic import BaseModel
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from aci.common.logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+# the maximum allowed by pgvector
+HNSW_EF_SEARCH_MAX = 1000
+HNSW_ITERATIVE_SCAN_MIN_PGVECTOR_VERSION = (0, 8, 0)
+
+# whether the installed pgvector supports iterative scans, checked once per process
+_iterative_scan_supported: bool | None = None
+
+
+class VectorSearchOptions(BaseModel):
+    ef_search: int
+    iterative_scan: str
+
+
+def set_vector_search_options(
+    db_session: Session, options: VectorSearchOptions, offset: int, limit: int, filtered: bool
+) -> None:
+    """filtered: whether the search has filters (e.g., app names, visibility, active only)."""
+    ef_search = min(max(options.ef_search, offset + limit), HNSW_EF_SEARCH_MAX)
+    settings = {"hnsw.ef_search": str(ef_search)}
+    if options.iterative_scan != "off" and _is_iterative_scan_supported(db_session):
+        settings["hnsw.iterative_scan"] = options.iterative_scan
+    elif filtered:
+        settings["enable_indexscan"] = "off"
+
+    db_session.execute(
+        select(*(func.set_config(name, value, True) for name, value in settings.items()))
+    )
+
+
+def _is_iterative_scan_supported(db_session: Session) -> bool:
+    global _iterative_scan_supported
+    if _iterative_scan_supported is None:
+        pgvector_version: str | None = db_session.execute(
+            text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+        ).scalar_one_or_none()
+        _iterative_scan_supported = (
+            pgvector_version is not None
+            and _parse_version(pgvector_version) >= HNSW_ITERATIVE_SCAN_MIN_PGVECTOR_VERSION
+        )
+        if not _iterative_scan_supported:
+            logger.warning(
+                "hnsw.iterative_scan requires pgvector >= 0.8.0, ignoring it",
+                extra={"pgvector_version": pgvector_version},
+            )
+    return _iterative_scan_supported
+
+
+def _parse_version(version: str) -> tuple[int, ...]:
+    # e.g., "0.8.0" -> (0, 8, 0)
+    return tuple(int(part) for part in version.split(".") if part.isdigit())
@@ -0,0 +1,196 @@
+"""
+Cache of text embeddings, e.g., of the search intents sent by agents, which tend to be repeated
+verbatim or with minor differences in whitespace/casing.
+
+Entries are keyed on the normalized text, the embedding model and the embedding dimension, and
+kept in two tiers:
+- memory: process-local LRU with ttl (see TTLCache)
+- disk (optional): a sqlite file shared by the processes of a host and surviving restarts, with
+  the same ttl and its own max size. Expired entries, then the oldest ones beyond the max size,
+  are deleted on every write. Disk reads/writes run in a worker thread to not block the event loop.
+
+Concurrent misses on the same key are coalesced into a single embedding generation.
+"""
+
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from collections.abc import Awaitable, Callable
+
+from pydantic import BaseModel
+
+from aci.common.cache import TTLCache
+from aci.common.logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+
+class EmbeddingCacheStats(BaseModel):
+    size: int
+    memory_hits: int
+    disk_hits: int
+    misses: int
+    disk_enabled: bool
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace and casefold, so that trivially different texts share an entry."""
+    return " ".join(text.split()).casefold()
+
+
+class _DiskTier:
+    def __init__(self, path: str, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings "
+                "(key TEXT PRIMARY KEY, embedding BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS embeddings_expires_at ON embeddings (expires_at)"
+            )
+            self._prune()
+
+    def get(self, key: str) -> list[float] | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT embedding FROM embeddings WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        if row is None:
+            return None
+        return array("d", row[0]).tolist()
+
+    def set(self, key: str, embedding: list[float]) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO embeddings (key, embedding, expires_at) VALUES (?, ?, ?)",
+                (key, array("d", embedding).tobytes(), time.time() + self.ttl),
+            )
+            self._prune()
+
+    def _prune(self) -> None:
+        # entries all have the same ttl, so the ones expiring first are the oldest
+        self._connection.execute(
+            "DELETE FROM embeddings WHERE expires_at <= ? OR key IN "
+            "(SELECT key FROM embeddings ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (time.time(), self.maxsize),
+        )
+
+    def clear(self) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM embeddings")
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class EmbeddingCache:
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        disk_path: str | None = None,
+        disk_maxsize: int = 100_000,
+    ):
+        self._memory: TTLCache[str, list[float]] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._disk = (
+            _DiskTier(disk_path, ttl, disk_maxsize)
+            if disk_path and ttl > 0 and disk_maxsize > 0
+            else None
+        )
+        self._in_flight: dict[str, asyncio.Task[list[float]]] = {}
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(text: str, embedding_model: str, embedding_dimension: int) -> str:
+        text_hash = hashlib.sha256(normalize_text(text).encode()).hexdigest()
+        return f"{embedding_model}:{embedding_dimension}:{text_hash}"
+
+    async def get_or_generate(
+        self,
+        text: str,
+        embedding_model: str,
+        embedding_dimension: int,
+        generate: Callable[[str], Awaitable[list[float]]],
+    ) -> list[float]:
+        """
+        Get the embedding of text from the cache, or generate it with generate(text) on a miss.
+        The returned list is shared with the cache and must not be mutated.
+        """
+        key = self.make_key(text, embedding_model, embedding_dimension)
+
+        embedding = self._memory.get(key)
+        if embedding is not None:
+            self.memory_hits += 1
+            return embedding
+
+        # the generation runs in its own task, so that a cancelled request doesn't fail the
+        # concurrent requests waiting for the same embedding
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._get_from_disk_or_generate(key, text, generate))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _get_from_disk_or_generate(
+        self, key: str, text: str, generate: Callable[[str], Awaitable[list[float]]]
+    ) -> list[float]:
+        if self._disk is not None:
+            embedding = await self._get_from_disk(self._disk, key)
+            if embedding is not None:
+                self.disk_hits += 1
+                self._memory.set(key, embedding)
+                return embedding
+
+        self.misses += 1
+        embedding = await generate(text)
+        self._memory.set(key, embedding)
+        if self._disk is not None:
+            await self._set_on_disk(self._disk, key, embedding)
+        return embedding
+
+    # the disk tier is best effort, errors are logged and treated as misses
+
+    async def _get_from_disk(self, disk: _DiskTier, key: str) -> list[float] | None:
+        try:
+            return await asyncio.to_thread(disk.get, key)
+        except sqlite3.Error:
+            logger.exception("failed to read embedding from disk cache")
+            return None
+
+    async def _set_on_disk(self, disk: _DiskTier, key: str, embedding: list[float]) -> None:
+        try:
+            await asyncio.to_thread(disk.set, key, embedding)
+        except sqlite3.Error:
+            logger.exception("failed to write embedding to disk cache")
+
+    def stats(self) -> EmbeddingCacheStats:
+        return EmbeddingCacheStats(
+            size=len(self._memory),
+            memory_hits=self.memory_hits,
+            disk_hits=self.disk_hits,
+            misses=self.misses,
+            disk_enabled=self._disk is not None,
+        )
+
+    def clear(self) -> None:
+        self._memory.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+    def close(self) -> None:
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
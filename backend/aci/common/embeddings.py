@@ -1,17 +1,152 @@
-from openai import OpenAI
+import asyncio
+import hashlib
+import math
+import random
+import re
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 
+import openai
+from openai import AsyncOpenAI, OpenAI
+from openai.types import CreateEmbeddingResponse
+
+from aci.common.db.sql_models import EMBEDDING_DIMENSION
+from aci.common.enums import EmbeddingProviderType
 from aci.common.logging_setup import get_logger
 from aci.common.schemas.app import AppEmbeddingFields
 from aci.common.schemas.function import FunctionEmbeddingFields
 
 logger = get_logger(__name__)
 
+# limits of a single embeddings request are 2048 inputs and 300k tokens, keep a safety margin
+EMBEDDING_BATCH_MAX_SIZE = 512
+EMBEDDING_BATCH_MAX_TOKENS = 100_000
+EMBEDDING_MAX_CONCURRENT_BATCHES = 4
+EMBEDDING_MAX_RETRIES = 5
+EMBEDDING_RETRY_BASE_DELAY_SECONDS = 1.0
+_RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+
+
+class EmbeddingProvider(ABC):
+    """
+    Generates the embeddings stored with apps/functions and the embeddings of search intents.
+    The same provider (model and dimension) must be used for both for the search to make sense.
+    """
+
+    model: str
+    dimension: int
+
+    @abstractmethod
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        """Embeddings of texts, in the same order as texts."""
+        pass
+
+    async def embed_async(self, texts: list[str]) -> list[list[float]]:
+        """Same as embed, without blocking the event loop. Runs embed in a worker thread by default."""
+        return await asyncio.to_thread(self.embed, texts)
+
+    async def aclose(self) -> None:
+        """Release the provider's resources, e.g., at server shutdown."""
+        return None
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    def __init__(self, api_key: str, model: str, dimension: int):
+        self.api_key = api_key
+        self.model = model
+        self.dimension = dimension
+        # created on first use, the async client is re-created after aclose()
+        self._client: OpenAI | None = None
+        self._async_client: AsyncOpenAI | None = None
+
+    # retries are done by generate_embeddings(_async), with backoff, not by the openai clients
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        if self._client is None:
+            self._client = OpenAI(api_key=self.api_key, max_retries=0)
+        return generate_embeddings(self._client, self.model, self.dimension, texts)
+
+    async def embed_async(self, texts: list[str]) -> list[list[float]]:
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(api_key=self.api_key, max_retries=0)
+        return await generate_embeddings_async(
+            self._async_client, self.model, self.dimension, texts
+        )
+
+    async def aclose(self) -> None:
+        if self._async_client is not None:
+            client, self._async_client = self._async_client, None
+            await client.close()
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """
+    Local, deterministic and CPU-only embeddings using the hashing trick: every word and character
+    trigram of the (casefolded) text is hashed to a signed position of the vector, and the vector
+    is L2 normalized.
+    The similarity is purely lexical (no understanding of synonyms or paraphrases), it's meant for
+    running the test suite offline and for air-gapped deployments without an embedding model.
+    """
+
+    model = "hashing-v1"
+
+    _WORD_WEIGHT = 1.0
+    _TRIGRAM_WEIGHT = 0.5
+
+    def __init__(self, dimension: int = EMBEDDING_DIMENSION):
+        self.dimension = dimension
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text) for text in texts]
+
+    async def embed_async(self, texts: list[str]) -> list[list[float]]:
+        # cheap enough to not need a worker thread
+        return self.embed(texts)
+
+    def _embed(self, text: str) -> list[float]:
+        vector = [0.0] * self.dimension
+        for word in re.findall(r"\w+", text.casefold()):
+            self._add_feature(vector, word, self._WORD_WEIGHT)
+            padded_word = f"<{word}>"
+            for i in range(len(padded_word) - 2):
+                self._add_feature(vector, padded_word[i : i + 3], self._TRIGRAM_WEIGHT)
+
+        norm = math.sqrt(sum(value * value for value in vector))
+        if norm == 0:
+            # the cosine distance to a zero vector is undefined
+            vector[0] = 1.0
+            return vector
+        return [value / norm for value in vector]
+
+    def _add_feature(self, vector: list[float], feature: str, weight: float) -> None:
+        digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "big")
+        sign = 1.0 if digest & 1 else -1.0
+        vector[(digest >> 1) % self.dimension] += sign * weight
+
+
+def create_embedding_provider(
+    provider_type: EmbeddingProviderType,
+    openai_api_key: str,
+    openai_embedding_model: str,
+    openai_embedding_dimension: int,
+) -> EmbeddingProvider:
+    match provider_type:
+        case EmbeddingProviderType.OPENAI:
+            return OpenAIEmbeddingProvider(
+                openai_api_key, openai_embedding_model, openai_embedding_dimension
+            )
+        case EmbeddingProviderType.HASHING:
+            return HashingEmbeddingProvider(EMBEDDING_DIMENSION)
+
 
 def generate_app_embedding(
     app: AppEmbeddingFields,
-    openai_client: OpenAI,
-    embedding_model: str,
-    embedding_dimension: int,
+    embedding_provider: EmbeddingProvider,
 ) -> list[float]:
     """
     Generate embedding for app.
@@ -21,62 +156,162 @@ def generate_app_embedding(
     # generate app embeddings based on app config's name, display_name, provider, description, categories
     text_for_embedding = app.model_dump_json()
     logger.debug(f"Text for app embedding: {text_for_embedding}")
-    return generate_embedding(
-        openai_client, embedding_model, embedding_dimension, text_for_embedding
-    )
+    return embedding_provider.embed([text_for_embedding])[0]
 
 
-# TODO: batch generate function embeddings
 # TODO: update app embedding to include function embeddings whenever functions are added/updated?
 def generate_function_embeddings(
     functions: list[FunctionEmbeddingFields],
+    embedding_provider: EmbeddingProvider,
+) -> list[list[float]]:
+    logger.debug(f"Generating embeddings for {len(functions)} functions...")
+    return embedding_provider.embed([function.model_dump_json() for function in functions])
+
+
+def generate_embeddings(
     openai_client: OpenAI,
     embedding_model: str,
     embedding_dimension: int,
+    texts: list[str],
+    max_batch_size: int = EMBEDDING_BATCH_MAX_SIZE,
+    max_batch_tokens: int = EMBEDDING_BATCH_MAX_TOKENS,
+    max_concurrent_batches: int = EMBEDDING_MAX_CONCURRENT_BATCHES,
 ) -> list[list[float]]:
-    logger.debug(f"Generating embeddings for {len(functions)} functions...")
-    function_embeddings: list[list[float]] = []
-    for function in functions:
-        function_embeddings.append(
-            generate_function_embedding(
-                function, openai_client, embedding_model, embedding_dimension
-            )
+    """
+    Generate the embeddings of texts with batched requests, returned in the same order as texts.
+    The texts are split into batches of at most max_batch_size texts and (an estimate of)
+    max_batch_tokens tokens, and up to max_concurrent_batches batches are requested concurrently.
+    Failed requests are retried with exponential backoff if the error is transient, so the client
+    should be created with max_retries=0 to not multiply the attempts.
+    """
+    batches = _split_into_batches(texts, max_batch_size, max_batch_tokens)
+    logger.debug(f"Generating embeddings for {len(texts)} texts in {len(batches)} batches...")
+
+    def generate_batch(batch: list[str]) -> list[list[float]]:
+        return _generate_embeddings_batch_with_retries(
+            openai_client, embedding_model, embedding_dimension, batch
         )
 
-    return function_embeddings
+    if len(batches) <= 1 or max_concurrent_batches <= 1:
+        batches_embeddings = [generate_batch(batch) for batch in batches]
+    else:
+        with ThreadPoolExecutor(max_workers=max_concurrent_batches) as executor:
+            # map() yields the results in the order of the batches
+            batches_embeddings = list(executor.map(generate_batch, batches))
 
+    return [embedding for batch_embeddings in batches_embeddings for embedding in batch_embeddings]
 
-def generate_function_embedding(
-    function: FunctionEmbeddingFields,
-    openai_client: OpenAI,
+
+async def generate_embeddings_async(
+    openai_client: AsyncOpenAI,
     embedding_model: str,
     embedding_dimension: int,
-) -> list[float]:
-    logger.debug(f"Generating embedding for function: {function.name}...")
-    text_for_embedding = function.model_dump_json()
-    logger.debug(f"Text for function embedding: {text_for_embedding}")
-    return generate_embedding(
-        openai_client, embedding_model, embedding_dimension, text_for_embedding
-    )
+    texts: list[str],
+    max_batch_size: int = EMBEDDING_BATCH_MAX_SIZE,
+    max_batch_tokens: int = EMBEDDING_BATCH_MAX_TOKENS,
+    max_concurrent_batches: int = EMBEDDING_MAX_CONCURRENT_BATCHES,
+) -> list[list[float]]:
+    """
+    Same as generate_embeddings, with an async client to not block the event loop on the request
+    path.
+    """
+    batches = _split_into_batches(texts, max_batch_size, max_batch_tokens)
+    logger.debug(f"Generating embeddings for {len(texts)} texts in {len(batches)} batches...")
+    semaphore = asyncio.Semaphore(max(max_concurrent_batches, 1))
+
+    async def generate_batch(batch: list[str]) -> list[list[float]]:
+        async with semaphore:
+            return await _generate_embeddings_batch_with_retries_async(
+                openai_client, embedding_model, embedding_dimension, batch
+            )
 
+    # gather() returns the results in the order of the batches
+    batches_embeddings = await asyncio.gather(*(generate_batch(batch) for batch in batches))
+    return [embedding for batch_embeddings in batches_embeddings for embedding in batch_embeddings]
 
-# TODO: allow different inference providers
-# TODO: exponential backoff?
-def generate_embedding(
-    openai_client: OpenAI, embedding_model: str, embedding_dimension: int, text: str
-) -> list[float]:
+
+def _estimate_tokens(text: str) -> int:
+    # a conservative estimate (a token is ~4 bytes of english text), avoids depending on tiktoken
+    return len(text.encode("utf-8")) // 3 + 1
+
+
+def _split_into_batches(
+    texts: list[str], max_batch_size: int, max_batch_tokens: int
+) -> list[list[str]]:
+    batches: list[list[str]] = []
+    batch: list[str] = []
+    batch_tokens = 0
+    for text in texts:
+        text_tokens = _estimate_tokens(text)
+        # a single text over max_batch_tokens still gets its own batch
+        if batch and (
+            len(batch) >= max_batch_size or batch_tokens + text_tokens > max_batch_tokens
+        ):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(text)
+        batch_tokens += text_tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _generate_embeddings_batch_with_retries(
+    openai_client: OpenAI, embedding_model: str, embedding_dimension: int, texts: list[str]
+) -> list[list[float]]:
+    attempt = 0
+    while True:
+        try:
+            response = openai_client.embeddings.create(
+                input=texts,
+                model=embedding_model,
+                dimensions=embedding_dimension,
+            )
+            return _get_ordered_embeddings(response)
+        except Exception as e:
+            time.sleep(_get_retry_delay_or_raise(e, attempt))
+            attempt += 1
+
+
+async def _generate_embeddings_batch_with_retries_async(
+    openai_client: AsyncOpenAI, embedding_model: str, embedding_dimension: int, texts: list[str]
+) -> list[list[float]]:
+    attempt = 0
+    while True:
+        try:
+            response = await openai_client.embeddings.create(
+                input=texts,
+                model=embedding_model,
+                dimensions=embedding_dimension,
+            )
+            return _get_ordered_embeddings(response)
+        except Exception as e:
+            await asyncio.sleep(_get_retry_delay_or_raise(e, attempt))
+            attempt += 1
+
+
+def _get_ordered_embeddings(response: CreateEmbeddingResponse) -> list[list[float]]:
+    # the embeddings are returned with the index of their input
+    return [data.embedding for data in sorted(response.data, key=lambda data: data.index)]
+
+
+def _get_retry_delay_or_raise(error: Exception, attempt: int) -> float:
     """
-    Generate an embedding for the given text using OpenAI's model.
+    Retry policy of the (sync and async) embeddings requests, given the error of the attempt-th
+    retry (0 for the first request). Transient errors are retried up to EMBEDDING_MAX_RETRIES times
+    with exponential backoff and jitter: returns the delay before the next attempt. Otherwise the
+    error is raised.
     """
-    logger.debug(f"Generating embedding for text: {text}")
-    try:
-        response = openai_client.embeddings.create(
-            input=[text],
-            model=embedding_model,
-            dimensions=embedding_dimension,
-        )
-        embedding: list[float] = response.data[0].embedding
-        return embedding
-    except Exception:
-        logger.error("Error generating embedding", exc_info=True)
-        raise
+    if not isinstance(error, _RETRYABLE_ERRORS):
+        logger.error("Error generating embeddings", exc_info=error)
+        raise error
+    if attempt >= EMBEDDING_MAX_RETRIES:
+        logger.error("Error generating embeddings, giving up", exc_info=error)
+        raise error
+
+    delay = EMBEDDING_RETRY_BASE_DELAY_SECONDS * 2.0**attempt * random.uniform(0.5, 1.5)
+    logger.warning(
+        f"Error generating embeddings, retrying in {delay:.1f}s",
+        extra={"attempt": attempt + 1, "error": str(error)},
+    )
+    return delay
@@ -1,6 +1,6 @@
 import hashlib
 import hmac
-from typing import cast
+from typing import Any, cast
 
 import aws_encryption_sdk  # type: ignore
 import boto3  # type: ignore
@@ -10,7 +10,12 @@ from aws_cryptographic_material_providers.mpl import (  # type: ignore
 from aws_cryptographic_material_providers.mpl.config import MaterialProvidersConfig  # type: ignore
 from aws_cryptographic_material_providers.mpl.models import CreateAwsKmsKeyringInput  # type: ignore
 from aws_cryptographic_material_providers.mpl.references import IKeyring  # type: ignore
-from aws_encryption_sdk import CommitmentPolicy
+from aws_encryption_sdk import (
+    CachingCryptoMaterialsManager,
+    CommitmentPolicy,
+    LocalCryptoMaterialsCache,
+)
+from aws_encryption_sdk.key_providers.kms import KMSMasterKey  # type: ignore
 
 from aci.common import config
 
@@ -37,15 +42,61 @@ keyring_input: CreateAwsKmsKeyringInput = CreateAwsKmsKeyringInput(
 kms_keyring: IKeyring = mat_prov.create_aws_kms_keyring(input=keyring_input)
 
 
+def create_caching_materials_manager(
+    kms_client: Any,
+    kms_key_arn: str,
+    capacity: int,
+    max_age: float,
+    max_messages_encrypted: int,
+) -> CachingCryptoMaterialsManager:
+    """
+    Create a caching cryptographic materials manager backed by the KMS key.
+    Data keys are cached in process memory, so that:
+    - encryptions reuse a data key (generated with one KMS call) for up to max_messages_encrypted
+      messages and max_age seconds
+    - decryptions of messages encrypted with a cached data key (or decrypted before) don't call KMS
+    The messages are compatible with the ones of the KMS keyring, either can decrypt the other's.
+    """
+    return CachingCryptoMaterialsManager(
+        master_key_provider=KMSMasterKey(key_id=kms_key_arn, client=kms_client),
+        cache=LocalCryptoMaterialsCache(capacity=capacity),
+        max_age=float(max_age),
+        max_messages_encrypted=max_messages_encrypted,
+    )
+
+
+caching_materials_manager: CachingCryptoMaterialsManager | None = (
+    create_caching_materials_manager(
+        kms_client,
+        config.KEY_ENCRYPTION_KEY_ARN,
+        capacity=config.ENCRYPTION_CACHE_CAPACITY,
+        max_age=config.ENCRYPTION_CACHE_MAX_AGE_SECONDS,
+        max_messages_encrypted=config.ENCRYPTION_CACHE_MAX_MESSAGES_ENCRYPTED,
+    )
+    if config.ENCRYPTION_CACHE_ENABLED
+    else None
+)
+
+
 def encrypt(plain_data: bytes) -> bytes:
     # TODO: ignore encryptor_header for now
-    my_ciphertext, _ = client.encrypt(source=plain_data, keyring=kms_keyring)
+    if caching_materials_manager is not None:
+        my_ciphertext, _ = client.encrypt(
+            source=plain_data, materials_manager=caching_materials_manager
+        )
+    else:
+        my_ciphertext, _ = client.encrypt(source=plain_data, keyring=kms_keyring)
     return cast(bytes, my_ciphertext)
 
 
 def decrypt(cipher_data: bytes) -> bytes:
     # TODO: ignore decryptor_header for now
-    my_plaintext, _ = client.decrypt(source=cipher_data, keyring=kms_keyring)
+    if caching_materials_manager is not None:
+        my_plaintext, _ = client.decrypt(
+            source=cipher_data, materials_manager=caching_materials_manager
+        )
+    else:
+        my_plaintext, _ = client.decrypt(source=cipher_data, keyring=kms_keyring)
     return cast(bytes, my_plaintext)
 
 
@@ -109,3 +109,9 @@ class StripeSubscriptionInterval(StrEnum):
 
     MONTH = "month"
     YEAR = "year"
+
+
+class EmbeddingProviderType(StrEnum):
+    OPENAI = "openai"
+    # local, deterministic and CPU-only, see HashingEmbeddingProvider
+    HASHING = "hashing"
@@ -443,3 +443,16 @@ class MaxUniqueLinkedAccountOwnerIdsReached(ACIException):
             message=message,
             error_code=status.HTTP_403_FORBIDDEN,
         )
+
+
+class RateLimitExceeded(ACIException):
+    """
+    Exception raised when a rate limit is exceeded
+    """
+
+    def __init__(self, message: str | None = None):
+        super().__init__(
+            title="Rate limit exceeded",
+            message=message,
+            error_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        )
@@ -0,0 +1,58 @@
+"""
+Hybrid (lexical + vector) ranking of function search results.
+
+The lexical ranking (full-text match on the function name, description and tags) catches exact
+names and keywords, e.g., "GITHUB create issue", that the embedding similarity alone can rank
+poorly. The two rankings are combined with reciprocal rank fusion (RRF), which only uses the
+positions of the results in each ranking, so the scores of the two don't need to be comparable.
+
+Short intents and intents that look like a function/app name are searched lexically only, which
+doesn't need an embedding of the intent.
+"""
+
+import re
+from collections.abc import Callable, Hashable, Sequence
+from typing import TypeVar
+
+T = TypeVar("T")
+
+# the usual constant of RRF, dampens the weight of the top ranks
+RRF_K = 60
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+# e.g., "GITHUB", "GITHUB__CREATE_ISSUE"
+_NAME_PATTERN = re.compile(r"[A-Za-z0-9]+(_+[A-Za-z0-9]+)*")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased alphanumeric tokens of the text, split at underscores too (as in names)."""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def as_name(intent: str) -> str | None:
+    """The function/app name the intent could be, if it looks like one, e.g., "gmail__send"."""
+    intent = intent.strip()
+    return intent.upper() if _NAME_PATTERN.fullmatch(intent) else None
+
+
+def is_lexical_intent(intent: str, max_words: int) -> bool:
+    """Whether the intent is short (at most max_words words) or looks like a function/app name."""
+    return as_name(intent) is not None or len(intent.split()) <= max_words
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[T]], key: Callable[[T], Hashable], k: int = RRF_K
+) -> list[T]:
+    """
+    Fuse the rankings (each sorted from most to least relevant) by the sum of 1 / (k + rank) of
+    each item over the rankings it appears in. Ties keep the order of first appearance.
+    """
+    scores: dict[Hashable, float] = {}
+    items: dict[Hashable, T] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            item_key = key(item)
+            items.setdefault(item_key, item)
+            scores[item_key] = scores.get(item_key, 0.0) + 1.0 / (k + rank)
+
+    return [items[item_key] for item_key in sorted(items, key=lambda x: -scores[x])]
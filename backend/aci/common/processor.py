@@ -1,4 +1,3 @@
-import copy
 from typing import Any
 
 from aci.common.logging_setup import get_logger
@@ -11,41 +10,36 @@ def filter_visible_properties(parameters_schema: dict) -> dict:
     """
     Filter the schema to include only visible properties and remove the 'visible' field itself.
     Ideally, visible and required should be defined for type "object", but we don't make that assumption here.
+    The original schema is not modified. Only the object schemas are copied (without deep copying),
+    the other schemas are shared with the original, so the result should not be modified either.
     """
 
-    # create a separate function to avoid deep copying the schema at each recursive call
     def filter(schema: dict) -> dict:
         # if the schema is not an object return the schema as is
         if schema.get("type") != "object":
             return schema
 
-        visible: list[str] = schema.pop("visible", [])  # remove visible field itself
+        visible: list[str] = schema.get("visible", [])
         properties: dict | None = schema.get("properties")
         required: list[str] | None = schema.get("required")
 
+        # copy without the visible field itself
+        filtered_schema = {key: value for key, value in schema.items() if key != "visible"}
+
         # only continue if properties are defined
         if properties is not None:
-            # Filter properties to include only visible properties
-            filtered_properties = {
-                key: value for key, value in properties.items() if key in visible
-            }
-
             # if required is defined, update the required list to include only visible properties
             if required is not None:
-                schema["required"] = [key for key in required if key in visible]
+                filtered_schema["required"] = [key for key in required if key in visible]
 
-            # Recursively filter nested properties
-            for key, value in filtered_properties.items():
-                filtered_properties[key] = filter(value)
-
-            # Update the schema with filtered properties
-            schema["properties"] = filtered_properties
+            # Filter properties to include only visible properties, recursively
+            filtered_schema["properties"] = {
+                key: filter(value) for key, value in properties.items() if key in visible
+            }
 
-        return schema
+        return filtered_schema
 
-    # Create a deep copy of the schema once
-    filtered_parameters_schema = copy.deepcopy(parameters_schema)
-    return filter(filtered_parameters_schema)
+    return filter(parameters_schema)
 
 
 def inject_required_but_invisible_defaults(parameters_schema: dict, input_data: dict) -> dict:
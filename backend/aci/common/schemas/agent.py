@@ -1,8 +1,17 @@
 from datetime import datetime
-from typing import Annotated
+from typing import Annotated, Any, Self
 from uuid import UUID
 
-from pydantic import BaseModel, BeforeValidator, ConfigDict, Field
+import re2
+from pydantic import (
+    AfterValidator,
+    BaseModel,
+    BeforeValidator,
+    ConfigDict,
+    Field,
+    field_validator,
+    model_validator,
+)
 
 from aci.common.schemas.apikey import APIKeyPublic
 
@@ -21,6 +30,93 @@ def validate_instruction(v: str) -> str:
 
 ValidInstruction = Annotated[str, BeforeValidator(validate_instruction)]
 
+MAX_INPUT_RULES_PER_FUNCTION = 20
+
+
+def compile_input_rule_pattern(pattern: str) -> Any:
+    """
+    Compile the regex of an InputRule with RE2, whose matching time is linear in the input, so a
+    user-provided regex can't backtrack catastrophically on the request path.
+
+    Raises:
+        re2.error: If the pattern is not a valid RE2 regex
+    """
+    options = re2.Options()
+    # the error is raised, no need to log it too
+    options.log_errors = False
+    return re2.compile(pattern, options)
+
+
+class InputRule(BaseModel):
+    """
+    A structured constraint on a function's input, evaluated locally instead of by the LLM judge of
+    the (free-text) custom instructions. The value(s) at path must satisfy all the given constraints,
+    e.g., {"path": "body.to", "pattern": ".*@ourcompany\\.com"}.
+    """
+
+    path: str = Field(
+        description="Dot separated path of the value in the function input, e.g., 'body.to'. "
+        "Lists along the path are traversed element-wise, and the rule doesn't apply if the path "
+        "is not present.",
+    )
+    allow: list[str | int | float | bool] | None = Field(
+        default=None, description="The value must be one of these values."
+    )
+    deny: list[str | int | float | bool] | None = Field(
+        default=None, description="The value must not be one of these values."
+    )
+    pattern: str | None = Field(
+        default=None,
+        description="The value must be a string fully matching this regex, in RE2 syntax (e.g., "
+        "no backreferences or lookarounds).",
+    )
+    minimum: float | None = Field(
+        default=None, description="The value must be a number greater than or equal to this."
+    )
+    maximum: float | None = Field(
+        default=None, description="The value must be a number less than or equal to this."
+    )
+    description: str | None = Field(
+        default=None, description="Human readable rule, included in the rejection message."
+    )
+
+    @field_validator("path")
+    def validate_path(cls, v: str) -> str:
+        if not v or any(not key for key in v.split(".")):
+            raise ValueError("path must be dot separated non-empty keys, e.g., 'body.to'")
+        return v
+
+    @field_validator("pattern")
+    def validate_pattern(cls, v: str | None) -> str | None:
+        if v is not None:
+            try:
+                compile_input_rule_pattern(v)
+            except re2.error as e:
+                # the message of the RE2 errors is bytes
+                message = e.args[0].decode() if isinstance(e.args[0], bytes) else str(e)
+                raise ValueError(f"invalid regex pattern: {message}") from e
+        return v
+
+    @model_validator(mode="after")
+    def validate_has_constraint(self) -> Self:
+        if all(
+            constraint is None
+            for constraint in (self.allow, self.deny, self.pattern, self.minimum, self.maximum)
+        ):
+            raise ValueError("at least one of allow, deny, pattern, minimum, maximum is required")
+        return self
+
+
+def validate_input_rules(v: list[InputRule]) -> list[InputRule]:
+    if len(v) > MAX_INPUT_RULES_PER_FUNCTION:
+        raise ValueError(
+            f"Cannot have more than {MAX_INPUT_RULES_PER_FUNCTION} input rules per function"
+        )
+    return v
+
+
+ValidInputRules = Annotated[list[InputRule], AfterValidator(validate_input_rules)]
+
 
 # TODO: validate when creating or updating agent that allowed_apps only contains apps that are configured
 # for the project
@@ -29,6 +125,8 @@ class AgentCreate(BaseModel):
     description: str
     allowed_apps: list[str] = []
     custom_instructions: dict[str, ValidInstruction] = Field(default_factory=dict)
+    # function name -> rules checked locally before the custom instruction (if any) of the function
+    custom_instruction_rules: dict[str, ValidInputRules] = Field(default_factory=dict)
 
 
 class AgentUpdate(BaseModel):
@@ -36,6 +134,7 @@ class AgentUpdate(BaseModel):
     description: str | None = None
     allowed_apps: list[str] | None = None
     custom_instructions: dict[str, ValidInstruction] | None = None
+    custom_instruction_rules: dict[str, ValidInputRules] | None = None
 
 
 class AgentPublic(BaseModel):
@@ -45,6 +144,7 @@ class AgentPublic(BaseModel):
     description: str
     allowed_apps: list[str] = []
     custom_instructions: dict[str, ValidInstruction] = Field(default_factory=dict)
+    custom_instruction_rules: dict[str, list[InputRule]] = Field(default_factory=dict)
 
     created_at: datetime
     updated_at: datetime
@@ -18,6 +18,8 @@ from aci.common.validator import (
     validate_function_parameters_schema_rest_protocol,
 )
 
+MAX_FUNCTION_EXECUTE_BATCH_SIZE = 20
+
 
 class RestMetadata(BaseModel):
     method: HttpMethod
@@ -155,6 +157,21 @@ class FunctionExecute(BaseModel):
     )
 
 
+class FunctionExecuteBatchItem(FunctionExecute):
+    function_name: str = Field(
+        ..., max_length=MAX_STRING_LENGTH, description="The name of the function to execute."
+    )
+
+
+class FunctionExecuteBatch(BaseModel):
+    items: list[FunctionExecuteBatchItem] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_FUNCTION_EXECUTE_BATCH_SIZE,
+        description="The functions to execute, the results are returned in the same order.",
+    )
+
+
 class FunctionDetails(BaseModel):
     id: UUID
     app_name: str
@@ -0,0 +1,88 @@
+from aci.common.cache import TTLCache
+
+
+class FakeTimer:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_get_and_set() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=60)
+    assert cache.get("a") is None
+
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert len(cache) == 1
+
+
+def test_entry_expires_after_ttl() -> None:
+    timer = FakeTimer()
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=60, timer=timer)
+    cache.set("a", 1)
+
+    timer.now = 59.9
+    assert cache.get("a") == 1
+
+    timer.now = 60.0
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    # touch "a" so that "b" becomes the least recently used
+    assert cache.get("a") == 1
+
+    assert cache.set("c", 3) == [2]
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_pop_where() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=60)
+    for i, key in enumerate(["a", "b", "c", "d"]):
+        cache.set(key, i)
+
+    assert cache.pop_where(lambda _, value: value % 2 == 0) == 2
+    assert cache.get("a") is None
+    assert cache.get("b") == 1
+    assert cache.get("c") is None
+    assert cache.get("d") == 3
+
+
+def test_pop_and_clear() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.pop("a") == 1
+    assert cache.pop("a") is None
+
+    cache.clear()
+    assert cache.get("b") is None
+
+
+def test_pop_all_includes_expired_entries() -> None:
+    timer = FakeTimer()
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=60, timer=timer)
+    cache.set("a", 1)
+    timer.now = 30.0
+    cache.set("b", 2)
+
+    timer.now = 60.0
+    assert sorted(cache.pop_all()) == [1, 2]
+    assert len(cache) == 0
+
+
+def test_zero_ttl_disables_cache() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=0)
+    assert not cache.enabled
+
+    cache.set("a", 1)
+    assert cache.get("a") is None
@@ -0,0 +1,125 @@
+from dataclasses import replace
+from datetime import datetime, timedelta
+from uuid import UUID, uuid4
+
+from aci.common.catalog_index import CatalogIndex, IndexedApp, IndexedFunction
+from aci.common.enums import Visibility
+
+NOW = datetime(2026, 1, 1)
+
+
+def _app(
+    name: str, categories: list[str], visibility: Visibility = Visibility.PUBLIC
+) -> IndexedApp:
+    return IndexedApp(
+        id=uuid4(),
+        name=name,
+        description=f"{name} app",
+        categories=categories,
+        visibility=visibility,
+        active=True,
+        updated_at=NOW,
+    )
+
+
+def _function(
+    app_id: UUID,
+    name: str,
+    description: str = "",
+    active: bool = True,
+    updated_at: datetime = NOW,
+) -> IndexedFunction:
+    return IndexedFunction(
+        id=uuid4(),
+        app_id=app_id,
+        name=name,
+        description=description,
+        tags=[],
+        parameters={},
+        visibility=Visibility.PUBLIC,
+        active=active,
+        updated_at=updated_at,
+    )
+
+
+def _build_index() -> tuple[CatalogIndex, IndexedApp, IndexedApp, list[IndexedFunction]]:
+    gmail = _app("GMAIL", ["email"])
+    github = _app("GITHUB", ["dev"], Visibility.PRIVATE)
+    functions = [
+        _function(gmail.id, "GMAIL__SEND_EMAIL", "Send an email to a recipient"),
+        _function(gmail.id, "GMAIL__READ_EMAIL", "Read an email by its id"),
+        _function(github.id, "GITHUB__CREATE_ISSUE", "Create an issue in a repository"),
+    ]
+    index = CatalogIndex(refresh_interval=60, dimension=3)
+    index.apply(
+        [(gmail, [1.0, 0.0, 0.0]), (github, [0.0, 1.0, 0.0])],
+        [
+            (functions[0], [1.0, 0.1, 0.0]),
+            (functions[1], [1.0, 0.0, 0.5]),
+            (functions[2], [0.0, 1.0, 0.0]),
+        ],
+    )
+    return index, gmail, github, functions
+
+
+def test_search_functions_by_similarity_with_filters() -> None:
+    index, _, _, functions = _build_index()
+
+    results = index.search_functions(False, True, None, [2.0, 0.0, 0.1], 10, 0)
+    assert [function.name for function in results] == [
+        "GMAIL__SEND_EMAIL",
+        "GMAIL__READ_EMAIL",
+        "GITHUB__CREATE_ISSUE",
+    ]
+
+    # functions of private apps are filtered out
+    results = index.search_functions(True, True, None, [0.0, 1.0, 0.0], 10, 0)
+    assert "GITHUB__CREATE_ISSUE" not in [function.name for function in results]
+
+    results = index.search_functions(False, True, ["GITHUB"], None, 10, 0)
+    assert results == [functions[2]]
+
+    # pagination
+    results = index.search_functions(False, True, None, [2.0, 0.0, 0.1], 1, 1)
+    assert [function.name for function in results] == ["GMAIL__READ_EMAIL"]
+
+
+def test_search_apps_by_categories_and_similarity() -> None:
+    index, gmail, github, _ = _build_index()
+
+    results = index.search_apps(False, True, None, None, [0.0, 1.0, 0.0], 10, 0)
+    assert [app for app, _ in results] == [github, gmail]
+    assert results[0][1] == 0.0
+
+    assert index.search_apps(False, True, None, ["email"], None, 10, 0) == [(gmail, None)]
+    assert index.search_apps(True, True, None, None, None, 10, 0) == [(gmail, None)]
+    assert [function.name for function in index.get_app_functions(gmail.id)] == [
+        "GMAIL__SEND_EMAIL",
+        "GMAIL__READ_EMAIL",
+    ]
+
+
+def test_incremental_apply_updates_and_adds_rows() -> None:
+    index, gmail, _, functions = _build_index()
+
+    deactivated = replace(functions[0], active=False, updated_at=NOW + timedelta(seconds=1))
+    added = _function(gmail.id, "GMAIL__DELETE_EMAIL", updated_at=NOW + timedelta(seconds=1))
+    index.apply([], [(deactivated, [1.0, 0.1, 0.0]), (added, [0.0, 0.0, 1.0])])
+
+    results = index.search_functions(False, True, ["GMAIL"], [0.0, 0.0, 1.0], 10, 0)
+    assert [function.name for function in results] == ["GMAIL__DELETE_EMAIL", "GMAIL__READ_EMAIL"]
+    assert len(index.get_app_functions(gmail.id)) == 3
+
+
+def test_lexical_and_hybrid_search_functions() -> None:
+    index, _, _, functions = _build_index()
+
+    # lexical only: exact name first, then only the functions matching any token
+    results = index.search_functions(False, True, None, None, 10, 0, "gmail__read_email")
+    assert [function.name for function in results] == ["GMAIL__READ_EMAIL", "GMAIL__SEND_EMAIL"]
+    assert index.search_functions(False, True, None, None, 10, 0, "repository") == [functions[2]]
+    assert index.search_functions(False, True, None, None, 10, 0, "calendar") == []
+
+    # hybrid: the lexical match outranks the closest embedding
+    results = index.search_functions(False, True, None, [0.0, 1.0, 0.0], 2, 0, "send email")
+    assert [function.name for function in results] == ["GMAIL__SEND_EMAIL", "GITHUB__CREATE_ISSUE"]
@@ -0,0 +1,117 @@
+import asyncio
+from pathlib import Path
+
+from aci.common.embedding_cache import EmbeddingCache
+
+
+class FakeEmbedder:
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+
+    async def __call__(self, text: str) -> list[float]:
+        self.calls.append(text)
+        # let concurrent callers pile up on the same miss
+        await asyncio.sleep(0.01)
+        return [float(len(text)), 0.5]
+
+
+def test_repeated_text_is_served_from_memory() -> None:
+    async def run() -> None:
+        cache = EmbeddingCache(maxsize=10, ttl=60)
+        embedder = FakeEmbedder()
+
+        first = await cache.get_or_generate("send an email", "model", 2, embedder)
+        # normalized to the same key
+        second = await cache.get_or_generate("  Send   an EMAIL ", "model", 2, embedder)
+
+        assert first == second == [13.0, 0.5]
+        assert embedder.calls == ["send an email"]
+        stats = cache.stats()
+        assert (stats.memory_hits, stats.disk_hits, stats.misses) == (1, 0, 1)
+
+    asyncio.run(run())
+
+
+def test_model_and_dimension_are_part_of_the_key() -> None:
+    async def run() -> None:
+        cache = EmbeddingCache(maxsize=10, ttl=60)
+        embedder = FakeEmbedder()
+
+        await cache.get_or_generate("send an email", "model", 2, embedder)
+        await cache.get_or_generate("send an email", "other-model", 2, embedder)
+        await cache.get_or_generate("send an email", "model", 3, embedder)
+
+        assert len(embedder.calls) == 3
+
+    asyncio.run(run())
+
+
+def test_concurrent_misses_generate_once() -> None:
+    async def run() -> None:
+        cache = EmbeddingCache(maxsize=10, ttl=60)
+        embedder = FakeEmbedder()
+
+        embeddings = await asyncio.gather(
+            *(cache.get_or_generate("send an email", "model", 2, embedder) for _ in range(5))
+        )
+
+        assert all(embedding == [13.0, 0.5] for embedding in embeddings)
+        assert len(embedder.calls) == 1
+
+    asyncio.run(run())
+
+
+def test_disk_tier_survives_a_new_cache(tmp_path: Path) -> None:
+    disk_path = str(tmp_path / "embeddings.sqlite3")
+
+    async def run() -> None:
+        embedder = FakeEmbedder()
+
+        cache = EmbeddingCache(maxsize=10, ttl=60, disk_path=disk_path)
+        await cache.get_or_generate("send an email", "model", 2, embedder)
+        cache.close()
+
+        # e.g., after a restart
+        cache = EmbeddingCache(maxsize=10, ttl=60, disk_path=disk_path)
+        assert await cache.get_or_generate("send an email", "model", 2, embedder) == [13.0, 0.5]
+        assert len(embedder.calls) == 1
+        assert cache.stats().disk_hits == 1
+        cache.close()
+
+    asyncio.run(run())
+
+
+def test_disk_tier_keeps_the_newest_entries_up_to_its_max_size(tmp_path: Path) -> None:
+    disk_path = str(tmp_path / "embeddings.sqlite3")
+
+    async def run() -> None:
+        embedder = FakeEmbedder()
+
+        cache = EmbeddingCache(maxsize=10, ttl=60, disk_path=disk_path, disk_maxsize=2)
+        for text in ("send an email", "read an email", "delete an email"):
+            await cache.get_or_generate(text, "model", 2, embedder)
+        cache.close()
+
+        cache = EmbeddingCache(maxsize=10, ttl=60, disk_path=disk_path, disk_maxsize=2)
+        for text in ("read an email", "delete an email", "send an email"):
+            await cache.get_or_generate(text, "model", 2, embedder)
+        stats = cache.stats()
+        assert (stats.disk_hits, stats.misses) == (2, 1)
+        assert embedder.calls[-1] == "send an email"
+        cache.close()
+
+    asyncio.run(run())
+
+
+def test_zero_ttl_disables_cache(tmp_path: Path) -> None:
+    async def run() -> None:
+        cache = EmbeddingCache(maxsize=10, ttl=0, disk_path=str(tmp_path / "embeddings.sqlite3"))
+        embedder = FakeEmbedder()
+
+        await cache.get_or_generate("send an email", "model", 2, embedder)
+        await cache.get_or_generate("send an email", "model", 2, embedder)
+
+        assert len(embedder.calls) == 2
+        assert not cache.stats().disk_enabled
+
+    asyncio.run(run())
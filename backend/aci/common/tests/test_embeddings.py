@@ -0,0 +1,158 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+from typing import cast
+
+import httpx
+import openai
+import pytest
+from openai import AsyncOpenAI, OpenAI
+
+from aci.common import embeddings
+
+
+class FakeEmbeddings:
+    def __init__(self, failures: int = 0) -> None:
+        self.requests: list[list[str]] = []
+        self.failures = failures
+        self._lock = threading.Lock()
+
+    def create(self, input: list[str], model: str, dimensions: int) -> SimpleNamespace:
+        with self._lock:
+            self.requests.append(input)
+            if self.failures:
+                self.failures -= 1
+                raise openai.RateLimitError(
+                    "rate limited",
+                    response=httpx.Response(429, request=httpx.Request("POST", "https://x")),
+                    body=None,
+                )
+        # returned out of order on purpose, the index must be used to restore the order
+        data = [
+            SimpleNamespace(index=index, embedding=[float(len(text))] * dimensions)
+            for index, text in enumerate(input)
+        ]
+        return SimpleNamespace(data=list(reversed(data)))
+
+
+class FakeAsyncEmbeddings:
+    def __init__(self, fake_embeddings: FakeEmbeddings) -> None:
+        self.fake_embeddings = fake_embeddings
+
+    async def create(self, input: list[str], model: str, dimensions: int) -> SimpleNamespace:
+        return self.fake_embeddings.create(input, model, dimensions)
+
+
+def _fake_client(fake_embeddings: FakeEmbeddings) -> OpenAI:
+    return cast(OpenAI, SimpleNamespace(embeddings=fake_embeddings))
+
+
+def _fake_async_client(fake_embeddings: FakeEmbeddings) -> AsyncOpenAI:
+    return cast(AsyncOpenAI, SimpleNamespace(embeddings=FakeAsyncEmbeddings(fake_embeddings)))
+
+
+def test_embeddings_are_batched_and_returned_in_input_order() -> None:
+    fake_embeddings = FakeEmbeddings()
+    texts = ["a" * i for i in range(1, 11)]
+
+    result = embeddings.generate_embeddings(
+        _fake_client(fake_embeddings), "model", 2, texts, max_batch_size=3
+    )
+
+    assert result == [[float(i)] * 2 for i in range(1, 11)]
+    assert [len(request) for request in fake_embeddings.requests] == [3, 3, 3, 1]
+
+
+def test_batches_are_split_by_estimated_tokens() -> None:
+    fake_embeddings = FakeEmbeddings()
+    # ~34 estimated tokens each
+    texts = ["a" * 100] * 4
+
+    embeddings.generate_embeddings(
+        _fake_client(fake_embeddings),
+        "model",
+        2,
+        texts,
+        max_batch_tokens=70,
+        max_concurrent_batches=1,
+    )
+
+    assert [len(request) for request in fake_embeddings.requests] == [2, 2]
+
+
+def test_transient_errors_are_retried(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(embeddings.time, "sleep", lambda _: None)
+    fake_embeddings = FakeEmbeddings(failures=2)
+
+    result = embeddings.generate_embeddings(_fake_client(fake_embeddings), "model", 2, ["a"])
+
+    assert result == [[1.0, 1.0]]
+    assert len(fake_embeddings.requests) == 3
+
+
+def test_retries_give_up(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(embeddings.time, "sleep", lambda _: None)
+    fake_embeddings = FakeEmbeddings(failures=embeddings.EMBEDDING_MAX_RETRIES + 1)
+
+    with pytest.raises(openai.RateLimitError):
+        embeddings.generate_embeddings(_fake_client(fake_embeddings), "model", 2, ["a"])
+
+
+def test_retry_policy() -> None:
+    rate_limit_error = openai.RateLimitError(
+        "rate limited",
+        response=httpx.Response(429, request=httpx.Request("POST", "https://x")),
+        body=None,
+    )
+    bad_request_error = openai.BadRequestError(
+        "bad request",
+        response=httpx.Response(400, request=httpx.Request("POST", "https://x")),
+        body=None,
+    )
+
+    # exponential backoff with jitter of +/- 50%
+    for attempt in range(embeddings.EMBEDDING_MAX_RETRIES):
+        delay = embeddings._get_retry_delay_or_raise(rate_limit_error, attempt)
+        base_delay = embeddings.EMBEDDING_RETRY_BASE_DELAY_SECONDS * 2**attempt
+        assert 0.5 * base_delay <= delay <= 1.5 * base_delay
+
+    with pytest.raises(openai.RateLimitError):
+        embeddings._get_retry_delay_or_raise(rate_limit_error, embeddings.EMBEDDING_MAX_RETRIES)
+    # not transient, not retried
+    with pytest.raises(openai.BadRequestError):
+        embeddings._get_retry_delay_or_raise(bad_request_error, 0)
+
+
+def test_no_texts() -> None:
+    fake_embeddings = FakeEmbeddings()
+    assert embeddings.generate_embeddings(_fake_client(fake_embeddings), "model", 2, []) == []
+    assert fake_embeddings.requests == []
+
+
+def test_async_embeddings_are_batched_and_returned_in_input_order() -> None:
+    fake_embeddings = FakeEmbeddings()
+    texts = ["a" * i for i in range(1, 11)]
+
+    result = asyncio.run(
+        embeddings.generate_embeddings_async(
+            _fake_async_client(fake_embeddings), "model", 2, texts, max_batch_size=3
+        )
+    )
+
+    assert result == [[float(i)] * 2 for i in range(1, 11)]
+    assert sorted(len(request) for request in fake_embeddings.requests) == [1, 3, 3, 3]
+
+
+def test_async_transient_errors_are_retried(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def no_sleep(_: float) -> None:
+        return None
+
+    monkeypatch.setattr(embeddings.asyncio, "sleep", no_sleep)
+    fake_embeddings = FakeEmbeddings(failures=2)
+
+    result = asyncio.run(
+        embeddings.generate_embeddings_async(_fake_async_client(fake_embeddings), "model", 2, ["a"])
+    )
+
+    assert result == [[1.0, 1.0]]
+    assert len(fake_embeddings.requests) == 3
@@ -0,0 +1,130 @@
+import json
+import os
+from typing import Any
+
+import boto3  # type: ignore
+from botocore.awsrequest import AWSResponse  # type: ignore
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from aci.common import encryption
+
+KMS_KEY_ARN = "arn:aws:kms:us-east-2:000000000000:key/00000000-0000-0000-0000-000000000001"
+
+
+class LocalKMS:
+    """
+    Local stand-in of KMS for a boto3 kms client: GenerateDataKey, Encrypt and Decrypt are served
+    in memory (with a local AES-GCM key) instead of over the network, and the calls are recorded.
+    """
+
+    def __init__(self, key_arn: str) -> None:
+        self.key_arn = key_arn
+        self.calls: list[str] = []
+        self._aesgcm = AESGCM(AESGCM.generate_key(256))
+
+    def create_client(self) -> Any:
+        client = boto3.client(
+            "kms",
+            region_name="us-east-2",
+            aws_access_key_id="dummy",
+            aws_secret_access_key="dummy",
+        )
+        client.meta.events.register("before-parameter-build.kms.*", self._keep_params)
+        client.meta.events.register("before-call.kms.*", self._handle)
+        return client
+
+    def _keep_params(self, params: dict, context: dict, **kwargs: Any) -> None:
+        context["local_kms_params"] = params
+
+    def _handle(self, model: Any, context: dict, **kwargs: Any) -> tuple[AWSResponse, dict]:
+        # returning a response from before-call skips the http request
+        self.calls.append(model.name)
+        params = context["local_kms_params"]
+        aad = json.dumps(params.get("EncryptionContext", {}), sort_keys=True).encode()
+        match model.name:
+            case "GenerateDataKey":
+                plaintext = os.urandom(params.get("NumberOfBytes", 32))
+                response = {
+                    "KeyId": self.key_arn,
+                    "Plaintext": plaintext,
+                    "CiphertextBlob": self._encrypt(plaintext, aad),
+                }
+            case "Encrypt":
+                response = {
+                    "KeyId": self.key_arn,
+                    "CiphertextBlob": self._encrypt(params["Plaintext"], aad),
+                }
+            case "Decrypt":
+                blob = params["CiphertextBlob"]
+                response = {
+                    "KeyId": self.key_arn,
+                    "Plaintext": self._aesgcm.decrypt(blob[:12], blob[12:], aad),
+                }
+            case _:
+                raise NotImplementedError(model.name)
+        return AWSResponse("", 200, {}, None), response
+
+    def _encrypt(self, plaintext: bytes, aad: bytes) -> bytes:
+        nonce = os.urandom(12)
+        return nonce + self._aesgcm.encrypt(nonce, plaintext, aad)
+
+
+def _encrypt(materials_manager: Any, plain_data: bytes) -> bytes:
+    ciphertext, _ = encryption.client.encrypt(
+        source=plain_data, materials_manager=materials_manager
+    )
+    return bytes(ciphertext)
+
+
+def _decrypt(materials_manager: Any, cipher_data: bytes) -> bytes:
+    plaintext, _ = encryption.client.decrypt(
+        source=cipher_data, materials_manager=materials_manager
+    )
+    return bytes(plaintext)
+
+
+def test_data_key_is_reused_for_encryption_and_decryption() -> None:
+    kms = LocalKMS(KMS_KEY_ARN)
+    materials_manager = encryption.create_caching_materials_manager(
+        kms.create_client(), KMS_KEY_ARN, capacity=10, max_age=60, max_messages_encrypted=100
+    )
+
+    # e.g., the client_secret, access_token, refresh_token and raw_token_response of an account
+    values = [f"secret-{i}".encode() for i in range(4)]
+    ciphertexts = [_encrypt(materials_manager, value) for value in values]
+    assert kms.calls == ["GenerateDataKey"]
+
+    for _ in range(3):
+        assert [_decrypt(materials_manager, ciphertext) for ciphertext in ciphertexts] == values
+    assert kms.calls == ["GenerateDataKey", "Decrypt"]
+
+
+def test_data_key_is_not_reused_beyond_max_messages_encrypted() -> None:
+    kms = LocalKMS(KMS_KEY_ARN)
+    materials_manager = encryption.create_caching_materials_manager(
+        kms.create_client(), KMS_KEY_ARN, capacity=10, max_age=60, max_messages_encrypted=2
+    )
+
+    for i in range(5):
+        _encrypt(materials_manager, f"secret-{i}".encode())
+    assert kms.calls.count("GenerateDataKey") == 3
+
+
+def test_messages_are_compatible_with_the_kms_keyring() -> None:
+    kms = LocalKMS(KMS_KEY_ARN)
+    kms_client = kms.create_client()
+    materials_manager = encryption.create_caching_materials_manager(
+        kms_client, KMS_KEY_ARN, capacity=10, max_age=60, max_messages_encrypted=100
+    )
+    kms_keyring = encryption.mat_prov.create_aws_kms_keyring(
+        input=encryption.CreateAwsKmsKeyringInput(kms_key_id=KMS_KEY_ARN, kms_client=kms_client)
+    )
+
+    # existing secrets were encrypted with the kms keyring
+    ciphertext, _ = encryption.client.encrypt(source=b"old secret", keyring=kms_keyring)
+    assert _decrypt(materials_manager, bytes(ciphertext)) == b"old secret"
+
+    plaintext, _ = encryption.client.decrypt(
+        source=_encrypt(materials_manager, b"new secret"), keyring=kms_keyring
+    )
+    assert bytes(plaintext) == b"new secret"
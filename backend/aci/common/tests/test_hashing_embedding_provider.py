@@ -0,0 +1,36 @@
+import math
+
+from aci.common.db.sql_models import EMBEDDING_DIMENSION
+from aci.common.embeddings import HashingEmbeddingProvider
+
+
+def _cosine_similarity(a: list[float], b: list[float]) -> float:
+    return sum(x * y for x, y in zip(a, b, strict=True))
+
+
+def test_embeddings_are_normalized_and_have_the_db_dimension() -> None:
+    provider = HashingEmbeddingProvider()
+    [embedding, empty_embedding] = provider.embed(["create a github repository", ""])
+
+    assert len(embedding) == EMBEDDING_DIMENSION
+    assert math.isclose(math.sqrt(sum(value * value for value in embedding)), 1.0)
+    assert math.isclose(math.sqrt(sum(value * value for value in empty_embedding)), 1.0)
+
+
+def test_embeddings_are_deterministic() -> None:
+    assert HashingEmbeddingProvider().embed(["send an email"]) == HashingEmbeddingProvider().embed(
+        ["Send an EMAIL"]
+    )
+
+
+def test_lexically_similar_texts_are_closer() -> None:
+    provider = HashingEmbeddingProvider()
+    [intent, repository, calendar] = provider.embed(
+        [
+            "create a new repository",
+            "GITHUB__CREATE_REPOSITORY: create a repository for the authenticated user",
+            "GOOGLE_CALENDAR__CREATE_EVENT: add an event to a calendar",
+        ]
+    )
+
+    assert _cosine_similarity(intent, repository) > _cosine_similarity(intent, calendar)
@@ -0,0 +1,30 @@
+from aci.common.hybrid_search import as_name, is_lexical_intent, reciprocal_rank_fusion, tokenize
+
+
+def test_tokenize_splits_names() -> None:
+    assert tokenize("GITHUB__CREATE_ISSUE on my-repo") == [
+        "github",
+        "create",
+        "issue",
+        "on",
+        "my",
+        "repo",
+    ]
+
+
+def test_lexical_intent() -> None:
+    assert as_name(" github__create_issue ") == "GITHUB__CREATE_ISSUE"
+    assert as_name("create an issue") is None
+
+    assert is_lexical_intent("GITHUB__CREATE_ISSUE", max_words=0)
+    assert is_lexical_intent("GITHUB create issue", max_words=3)
+    assert not is_lexical_intent("i want to create a new issue on github", max_words=3)
+
+
+def test_reciprocal_rank_fusion() -> None:
+    lexical = ["a", "b", "c"]
+    vector = ["c", "d", "b"]
+
+    # b and c are in both rankings, c has the better ranks
+    assert reciprocal_rank_fusion([lexical, vector], key=lambda item: item) == ["c", "b", "a", "d"]
+    assert reciprocal_rank_fusion([[], vector], key=lambda item: item) == vector
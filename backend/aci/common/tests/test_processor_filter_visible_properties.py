@@ -92,3 +92,21 @@ def test_no_modification_of_original() -> None:
     original_schema = deepcopy(schema)
     filter_visible_properties(schema)
     assert schema == original_schema
+
+
+def test_no_modification_of_nested_original() -> None:
+    schema = {
+        "type": "object",
+        "properties": {
+            "a": {
+                "type": "object",
+                "properties": {"b": {"type": "string"}, "c": {"type": "integer"}},
+                "required": ["b", "c"],
+                "visible": ["b"],
+            },
+        },
+        "visible": ["a"],
+    }
+    original_schema = deepcopy(schema)
+    filter_visible_properties(schema)
+    assert schema == original_schema
@@ -2,9 +2,10 @@ import os
 import re
 from uuid import UUID
 
-from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import Session, sessionmaker
 
+from aci.common.db.engine import get_async_db_engine, get_db_engine
 from aci.common.logging_setup import get_logger
 
 logger = get_logger(__name__)
@@ -43,10 +44,26 @@ def format_to_screaming_snake_case(name: str) -> str:
 
 
 def create_db_session(db_url: str) -> Session:
-    SessionMaker = sessionmaker(autocommit=False, autoflush=False, bind=create_engine(db_url))
+    """
+    Create a new db session bound to the process-wide pooled engine of db_url.
+    Closing the session returns its connection to the pool.
+    """
+    SessionMaker = sessionmaker(autocommit=False, autoflush=False, bind=get_db_engine(db_url))
     return SessionMaker()
 
 
+def create_async_db_session(db_url: str) -> AsyncSession:
+    """
+    Create a new async db session bound to the process-wide pooled async engine of db_url.
+    Note: expire_on_commit is disabled because reloading expired attributes is implicit io,
+    which is not allowed with AsyncSession.
+    """
+    AsyncSessionMaker = async_sessionmaker(
+        autoflush=False, expire_on_commit=False, bind=get_async_db_engine(db_url)
+    )
+    return AsyncSessionMaker()
+
+
 def parse_app_name_from_function_name(function_name: str) -> str:
     """
     Parse the app name from a function name.
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import ClassVar
 
 from aci.common.db.sql_models import LinkedAccount
 from aci.common.exceptions import NoImplementationFound
@@ -21,6 +22,13 @@ class AppConnectorBase(ABC):
     Base class for all app connectors.
     """
 
+    # Instances of reusable connectors are pooled and shared by the executions (possibly concurrent,
+    # on different threads) of the same linked account with the same credentials, see
+    # function_executors.connector_instance_pool. So they must be thread-safe, not keep state of an
+    # execution, and not use the linked account beyond its id (it's the orm object of the request
+    # that created the instance).
+    reusable: ClassVar[bool] = False
+
     # Note: security_scheme might not be necessary in most cases because we probably use some sdks
     # that handles credentials differently per App. It can be useful if inside the connector we still
     # need to construct the raw http request object.
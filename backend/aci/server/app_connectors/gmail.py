@@ -1,9 +1,12 @@
 import base64
+import functools
+import threading
 from email.mime.text import MIMEText
-from typing import override
+from typing import TYPE_CHECKING, cast, override
 
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
 
 from aci.common.db.sql_models import LinkedAccount
 from aci.common.logging_setup import get_logger
@@ -13,9 +16,24 @@ from aci.common.schemas.security_scheme import (
 )
 from aci.server.app_connectors.base import AppConnectorBase
 
+if TYPE_CHECKING:
+    from googleapiclient._apis.gmail.v1 import GmailResource
+
 logger = get_logger(__name__)
 
 
+@functools.cache
+def _get_discovery_document() -> str:
+    """
+    The Gmail API discovery document bundled with the client library, read from disk once per
+    process instead of on every service build.
+    """
+    document: str | None = get_static_doc("gmail", "v1")
+    if document is None:
+        raise RuntimeError("gmail v1 discovery document not found in the client library")
+    return document
+
+
 # TODO: how should we handle args are passed as flattened? separated by double underscore?
 # e.g. person__name, person__title. maybe need to preprocess the args before passing to the method?
 class Gmail(AppConnectorBase):
@@ -23,6 +41,9 @@ class Gmail(AppConnectorBase):
     Gmail Connector.
     """
 
+    # the credentials and services only depend on the access token, see the connector instance pool
+    reusable = True
+
     def __init__(
         self,
         linked_account: LinkedAccount,
@@ -34,6 +55,9 @@ class Gmail(AppConnectorBase):
             token=security_credentials.access_token,
             refresh_token=security_credentials.refresh_token,
         )
+        # the service objects (and their http connections) are not thread-safe, so an instance shared
+        # by concurrent executions keeps one service per connector thread
+        self._thread_local = threading.local()
 
     @override
     def _before_execute(self) -> None:
@@ -44,6 +68,16 @@ class Gmail(AppConnectorBase):
         # (which was built for generic oauht2/api_key rest apis)
         pass
 
+    def _get_service(self) -> "GmailResource":
+        service: GmailResource | None = getattr(self._thread_local, "service", None)
+        if service is None:
+            service = cast(
+                "GmailResource",
+                build_from_document(_get_discovery_document(), credentials=self.credentials),
+            )
+            self._thread_local.service = service
+        return service
+
     # TODO: support HTML type for body
     def send_email(
         self,
@@ -84,7 +118,7 @@ class Gmail(AppConnectorBase):
         # Create the final message body
         message_body = {"raw": base64.urlsafe_b64encode(message.as_bytes()).decode()}
 
-        service = build("gmail", "v1", credentials=self.credentials)
+        service = self._get_service()
 
         sent_message = service.users().messages().send(userId=sender, body=message_body).execute()  # type: ignore
 
@@ -133,7 +167,7 @@ class Gmail(AppConnectorBase):
         # Create the message body
         message_body = {"message": {"raw": base64.urlsafe_b64encode(message.as_bytes()).decode()}}
 
-        service = build("gmail", "v1", credentials=self.credentials)
+        service = self._get_service()
 
         # Create the draft
         draft = service.users().drafts().create(userId=sender, body=message_body).execute()  # type: ignore
@@ -187,7 +221,7 @@ class Gmail(AppConnectorBase):
             "message": {"raw": base64.urlsafe_b64encode(message.as_bytes()).decode()},
         }
 
-        service = build("gmail", "v1", credentials=self.credentials)
+        service = self._get_service()
 
         # Update the draft
         updated_draft = (
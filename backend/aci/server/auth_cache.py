@@ -0,0 +1,58 @@
+"""
+Process-local cache of api key resolution (api key -> agent -> project), keyed by the api key's
+hmac, so that authenticating a request doesn't need db round trips on a cache hit.
+
+Only active api keys are cached. Entries must be invalidated when the agent or its project changes
+in a way that affects authentication or the agent's permissions (deleting an agent also deletes
+its api keys). The server has no route that changes the status of an api key, so disabling or
+deleting one directly in the db, like any change made by other processes, is only picked up once
+the entry expires (SERVER_AUTH_CACHE_TTL_SECONDS).
+"""
+
+from dataclasses import dataclass
+from uuid import UUID
+
+from aci.common.cache import TTLCache
+from aci.common.db.sql_models import Agent, Project
+from aci.common.logging_setup import get_logger
+from aci.server import config
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class ResolvedAPIKey:
+    api_key_id: UUID
+    # agent and project are detached from the db session that loaded them, must be treated as
+    # read-only. The project's quota counters are not kept up to date (see project_quota.py).
+    agent: Agent
+    project: Project
+
+
+_cache: TTLCache[str, ResolvedAPIKey] = TTLCache(
+    maxsize=config.AUTH_CACHE_MAX_SIZE, ttl=config.AUTH_CACHE_TTL_SECONDS
+)
+
+
+def get(key_hmac: str) -> ResolvedAPIKey | None:
+    return _cache.get(key_hmac)
+
+
+def put(key_hmac: str, resolved_api_key: ResolvedAPIKey) -> None:
+    _cache.set(key_hmac, resolved_api_key)
+
+
+def invalidate_agent(agent_id: UUID) -> None:
+    """Call when an agent is updated or deleted."""
+    removed = _cache.pop_where(lambda _, resolved: resolved.agent.id == agent_id)
+    logger.info("invalidated auth cache", extra={"agent_id": agent_id, "removed": removed})
+
+
+def invalidate_project(project_id: UUID) -> None:
+    """Call when a change affects all agents of a project, e.g., removing an app from them."""
+    removed = _cache.pop_where(lambda _, resolved: resolved.project.id == project_id)
+    logger.info("invalidated auth cache", extra={"project_id": project_id, "removed": removed})
+
+
+def clear() -> None:
+    _cache.clear()
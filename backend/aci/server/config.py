@@ -1,11 +1,47 @@
+from aci.common.enums import EmbeddingProviderType
 from aci.common.utils import check_and_get_env_variable, construct_db_url
 
 ENVIRONMENT = check_and_get_env_variable("SERVER_ENVIRONMENT")
 
 # LLM
+# "openai", or "hashing" for local embeddings without network access (lexical similarity only)
+EMBEDDING_PROVIDER = EmbeddingProviderType(check_and_get_env_variable("SERVER_EMBEDDING_PROVIDER"))
 OPENAI_API_KEY = check_and_get_env_variable("SERVER_OPENAI_API_KEY")
 OPENAI_EMBEDDING_MODEL = check_and_get_env_variable("SERVER_OPENAI_EMBEDDING_MODEL")
 OPENAI_EMBEDDING_DIMENSION = int(check_and_get_env_variable("SERVER_OPENAI_EMBEDDING_DIMENSION"))
+# cache of the embeddings of search intents, 0 ttl disables the cache
+EMBEDDING_CACHE_TTL_SECONDS = float(
+    check_and_get_env_variable("SERVER_EMBEDDING_CACHE_TTL_SECONDS")
+)
+EMBEDDING_CACHE_MAX_SIZE = int(check_and_get_env_variable("SERVER_EMBEDDING_CACHE_MAX_SIZE"))
+# optional on-disk (sqlite) tier of the cache, shared by the server processes of a host
+EMBEDDING_CACHE_DISK_ENABLED = (
+    check_and_get_env_variable("SERVER_EMBEDDING_CACHE_DISK_ENABLED").lower() == "true"
+)
+EMBEDDING_CACHE_DISK_PATH = check_and_get_env_variable("SERVER_EMBEDDING_CACHE_DISK_PATH")
+# max number of entries of the on-disk tier, the oldest ones are deleted beyond
+EMBEDDING_CACHE_DISK_MAX_SIZE = int(
+    check_and_get_env_variable("SERVER_EMBEDDING_CACHE_DISK_MAX_SIZE")
+)
+# query time parameters of the HNSW index scans of app/function search, see vector_search.py
+# iterative scan ("off", "strict_order" or "relaxed_order") requires pgvector >= 0.8.0; when it's off
+# or unsupported, filtered searches use an exact scan instead of the index, to not lose results
+VECTOR_SEARCH_HNSW_EF_SEARCH = int(
+    check_and_get_env_variable("SERVER_VECTOR_SEARCH_HNSW_EF_SEARCH")
+)
+VECTOR_SEARCH_HNSW_ITERATIVE_SCAN = check_and_get_env_variable(
+    "SERVER_VECTOR_SEARCH_HNSW_ITERATIVE_SCAN"
+)
+# in-process index of apps and functions, to search without the db (see catalog_index.py)
+CATALOG_INDEX_ENABLED = check_and_get_env_variable("SERVER_CATALOG_INDEX_ENABLED").lower() == "true"
+CATALOG_INDEX_REFRESH_INTERVAL_SECONDS = float(
+    check_and_get_env_variable("SERVER_CATALOG_INDEX_REFRESH_INTERVAL_SECONDS")
+)
+# function search intents of at most this many words (or that look like a name) are searched
+# lexically only, without an embedding, see hybrid_search.py
+FUNCTION_SEARCH_LEXICAL_MAX_WORDS = int(
+    check_and_get_env_variable("SERVER_FUNCTION_SEARCH_LEXICAL_MAX_WORDS")
+)
 
 # JWT
 SIGNING_KEY = check_and_get_env_variable("SERVER_SIGNING_KEY")
@@ -26,6 +62,45 @@ DB_PORT = check_and_get_env_variable("SERVER_DB_PORT")
 DB_NAME = check_and_get_env_variable("SERVER_DB_NAME")
 # need to use "+psycopg" to use psycopg3 instead of psycopg2 (default)
 DB_FULL_URL = construct_db_url(DB_SCHEME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME)
+# connection pool of the process-wide db engine
+DB_POOL_SIZE = int(check_and_get_env_variable("SERVER_DB_POOL_SIZE"))
+DB_POOL_MAX_OVERFLOW = int(check_and_get_env_variable("SERVER_DB_POOL_MAX_OVERFLOW"))
+DB_POOL_TIMEOUT = float(check_and_get_env_variable("SERVER_DB_POOL_TIMEOUT"))
+DB_POOL_RECYCLE = int(check_and_get_env_variable("SERVER_DB_POOL_RECYCLE"))
+DB_POOL_PRE_PING = check_and_get_env_variable("SERVER_DB_POOL_PRE_PING").lower() == "true"
+
+# HTTP CLIENTS
+# limits and timeouts of the long-lived http clients (one per upstream host) used by REST functions
+HTTP_CLIENT_MAX_CONNECTIONS_PER_HOST = int(
+    check_and_get_env_variable("SERVER_HTTP_CLIENT_MAX_CONNECTIONS_PER_HOST")
+)
+HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS_PER_HOST = int(
+    check_and_get_env_variable("SERVER_HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS_PER_HOST")
+)
+HTTP_CLIENT_KEEPALIVE_EXPIRY = float(
+    check_and_get_env_variable("SERVER_HTTP_CLIENT_KEEPALIVE_EXPIRY")
+)
+HTTP_CLIENT_TIMEOUT = float(check_and_get_env_variable("SERVER_HTTP_CLIENT_TIMEOUT"))
+HTTP_CLIENT_READ_TIMEOUT = float(check_and_get_env_variable("SERVER_HTTP_CLIENT_READ_TIMEOUT"))
+HTTP_CLIENT_POOL_TIMEOUT = float(check_and_get_env_variable("SERVER_HTTP_CLIENT_POOL_TIMEOUT"))
+HTTP_CLIENT_HTTP2 = check_and_get_env_variable("SERVER_HTTP_CLIENT_HTTP2").lower() == "true"
+# max number of upstream hosts with a pooled client, the least recently used ones are closed beyond
+HTTP_CLIENT_POOL_MAX_CLIENTS = int(
+    check_and_get_env_variable("SERVER_HTTP_CLIENT_POOL_MAX_CLIENTS")
+)
+
+# CONNECTORS
+# max number of concurrent blocking connector calls of each app, run in a thread pool per app
+CONNECTOR_THREAD_POOL_MAX_WORKERS_PER_APP = int(
+    check_and_get_env_variable("SERVER_CONNECTOR_THREAD_POOL_MAX_WORKERS_PER_APP")
+)
+# pooled instances of reusable app connectors, keyed by linked account and credentials version
+CONNECTOR_INSTANCE_POOL_MAX_SIZE = int(
+    check_and_get_env_variable("SERVER_CONNECTOR_INSTANCE_POOL_MAX_SIZE")
+)
+CONNECTOR_INSTANCE_POOL_TTL_SECONDS = int(
+    check_and_get_env_variable("SERVER_CONNECTOR_INSTANCE_POOL_TTL_SECONDS")
+)
 
 # PropelAuth
 PROPELAUTH_AUTH_URL = check_and_get_env_variable("SERVER_PROPELAUTH_AUTH_URL")
@@ -37,10 +112,97 @@ SVIX_SIGNING_SECRET = check_and_get_env_variable("SERVER_SVIX_SIGNING_SECRET")
 # RATE LIMITS
 RATE_LIMIT_IP_PER_SECOND = int(check_and_get_env_variable("SERVER_RATE_LIMIT_IP_PER_SECOND"))
 RATE_LIMIT_IP_PER_DAY = int(check_and_get_env_variable("SERVER_RATE_LIMIT_IP_PER_DAY"))
+RATE_LIMIT_API_KEY_PER_SECOND = int(
+    check_and_get_env_variable("SERVER_RATE_LIMIT_API_KEY_PER_SECOND")
+)
+RATE_LIMIT_PROJECT_PER_SECOND = int(
+    check_and_get_env_variable("SERVER_RATE_LIMIT_PROJECT_PER_SECOND")
+)
+# e.g., "async+memory://" (per process) or "async+redis://redis:6379" (shared by all processes)
+RATE_LIMIT_STORAGE_URI = check_and_get_env_variable("SERVER_RATE_LIMIT_STORAGE_URI")
+# max number of rate limit keys (ips, api keys, projects) kept by the in-process storage
+RATE_LIMIT_MEMORY_STORAGE_MAX_KEYS = int(
+    check_and_get_env_variable("SERVER_RATE_LIMIT_MEMORY_STORAGE_MAX_KEYS")
+)
 AOPOLABS_API_KEY_NAME = "X-API-KEY"
+# internal metrics routes (e.g., db pool stats) are only served to requests with this token
+METRICS_TOKEN_HEADER_NAME = "X-METRICS-TOKEN"
+METRICS_TOKEN = check_and_get_env_variable("SERVER_METRICS_TOKEN")
+
+# AUTH CACHE
+# process-local cache of api key -> agent -> project resolution, 0 ttl disables the cache.
+# an api key disabled or deleted outside of this server is still accepted for up to the ttl
+AUTH_CACHE_TTL_SECONDS = float(check_and_get_env_variable("SERVER_AUTH_CACHE_TTL_SECONDS"))
+AUTH_CACHE_MAX_SIZE = int(check_and_get_env_variable("SERVER_AUTH_CACHE_MAX_SIZE"))
+
+# FUNCTION DEFINITIONS
+# number of cached function definitions (and visible parameters schemas) of function versions
+FUNCTION_DEFINITION_CACHE_MAX_SIZE = int(
+    check_and_get_env_variable("SERVER_FUNCTION_DEFINITION_CACHE_MAX_SIZE")
+)
+# number of cached function rows (with their app) of function versions, for function execution
+FUNCTION_CACHE_MAX_SIZE = int(check_and_get_env_variable("SERVER_FUNCTION_CACHE_MAX_SIZE"))
+
+# FUNCTION EXECUTION
+# max number of functions of a /functions/execute-batch request executed at the same time
+FUNCTION_EXECUTE_BATCH_MAX_CONCURRENCY = int(
+    check_and_get_env_variable("SERVER_FUNCTION_EXECUTE_BATCH_MAX_CONCURRENCY")
+)
+
+# CUSTOM INSTRUCTIONS
+# verdicts of custom instruction violation checks are cached per agent, function, instruction and
+# input, 0 ttl disables the cache
+CUSTOM_INSTRUCTION_VERDICT_CACHE_TTL_SECONDS = float(
+    check_and_get_env_variable("SERVER_CUSTOM_INSTRUCTION_VERDICT_CACHE_TTL_SECONDS")
+)
+CUSTOM_INSTRUCTION_VERDICT_CACHE_MAX_SIZE = int(
+    check_and_get_env_variable("SERVER_CUSTOM_INSTRUCTION_VERDICT_CACHE_MAX_SIZE")
+)
+# number of agents whose compiled custom instruction rules are cached, per agent version
+CUSTOM_INSTRUCTION_RULES_CACHE_MAX_SIZE = int(
+    check_and_get_env_variable("SERVER_CUSTOM_INSTRUCTION_RULES_CACHE_MAX_SIZE")
+)
+# run the custom instruction check of /functions/{function_name}/execute concurrently with the
+# resolution (and refresh) of the security credentials, instead of after it
+CUSTOM_INSTRUCTION_CHECK_CONCURRENTLY = (
+    check_and_get_env_variable("SERVER_CUSTOM_INSTRUCTION_CHECK_CONCURRENTLY").lower() == "true"
+)
+
+# OAUTH2 TOKENS
+# access tokens are refreshed on use if they expire within this many seconds
+OAUTH2_TOKEN_REFRESH_LEEWAY_SECONDS = float(
+    check_and_get_env_variable("SERVER_OAUTH2_TOKEN_REFRESH_LEEWAY_SECONDS")
+)
+# the access tokens of linked accounts used within the max idle time are renewed in the background
+# (every interval) when they expire within the renewal window, at most batch size per interval
+OAUTH2_TOKEN_RENEWAL_INTERVAL_SECONDS = float(
+    check_and_get_env_variable("SERVER_OAUTH2_TOKEN_RENEWAL_INTERVAL_SECONDS")
+)
+OAUTH2_TOKEN_RENEWAL_WINDOW_SECONDS = float(
+    check_and_get_env_variable("SERVER_OAUTH2_TOKEN_RENEWAL_WINDOW_SECONDS")
+)
+OAUTH2_TOKEN_RENEWAL_MAX_IDLE_SECONDS = float(
+    check_and_get_env_variable("SERVER_OAUTH2_TOKEN_RENEWAL_MAX_IDLE_SECONDS")
+)
+OAUTH2_TOKEN_RENEWAL_BATCH_SIZE = int(
+    check_and_get_env_variable("SERVER_OAUTH2_TOKEN_RENEWAL_BATCH_SIZE")
+)
+# a linked account whose renewal fails is retried after a backoff that doubles up to this maximum
+OAUTH2_TOKEN_RENEWAL_MAX_BACKOFF_SECONDS = float(
+    check_and_get_env_variable("SERVER_OAUTH2_TOKEN_RENEWAL_MAX_BACKOFF_SECONDS")
+)
+# pooled oauth2 clients (one per oauth2 client of an app), evicted when unused for the ttl
+OAUTH2_CLIENT_POOL_MAX_SIZE = int(check_and_get_env_variable("SERVER_OAUTH2_CLIENT_POOL_MAX_SIZE"))
+OAUTH2_CLIENT_POOL_TTL_SECONDS = float(
+    check_and_get_env_variable("SERVER_OAUTH2_CLIENT_POOL_TTL_SECONDS")
+)
 
 # QUOTA
 PROJECT_DAILY_QUOTA = int(check_and_get_env_variable("SERVER_PROJECT_DAILY_QUOTA"))
+# usage is counted in memory and written to the db in batches at this interval
+PROJECT_QUOTA_FLUSH_INTERVAL_SECONDS = float(
+    check_and_get_env_variable("SERVER_PROJECT_QUOTA_FLUSH_INTERVAL_SECONDS")
+)
 MAX_PROJECTS_PER_ORG = int(check_and_get_env_variable("SERVER_MAX_PROJECTS_PER_ORG"))
 MAX_AGENTS_PER_PROJECT = int(check_and_get_env_variable("SERVER_MAX_AGENTS_PER_PROJECT"))
 APPLICATION_LOAD_BALANCER_DNS = check_and_get_env_variable("SERVER_APPLICATION_LOAD_BALANCER_DNS")
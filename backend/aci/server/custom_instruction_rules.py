@@ -0,0 +1,130 @@
+"""
+Local evaluation of the agents' custom instruction rules: structured constraints on function inputs
+(allow/deny lists, regexes, numeric ranges on paths of the input, see schemas.agent.InputRule).
+
+They are checked before the (free-text) custom instructions, whose LLM judge is then only asked
+about what the rules can't express. The rules of an agent are compiled (paths split, regexes
+compiled, allow/deny lists turned into sets) once per agent version, so checking them takes
+microseconds. The regexes are RE2 ones, matched in linear time whatever the pattern and input.
+"""
+
+import math
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from aci.common.cache import TTLCache
+from aci.common.db.sql_models import Agent, Function
+from aci.common.exceptions import CustomInstructionViolation
+from aci.common.logging_setup import get_logger
+from aci.common.schemas.agent import InputRule, compile_input_rule_pattern
+from aci.server import config
+
+logger = get_logger(__name__)
+
+# hashable form of a json scalar for the allow/deny sets, where True and 1 are different values
+_ScalarKey = tuple[bool, str | int | float]
+
+
+@dataclass(frozen=True)
+class _CompiledInputRule:
+    path: tuple[str, ...]
+    allow: frozenset[_ScalarKey | None] | None
+    deny: frozenset[_ScalarKey | None] | None
+    # compiled RE2 regex
+    pattern: Any | None
+    minimum: float | None
+    maximum: float | None
+    # included in the rejection message
+    description: str
+
+    def is_violated_by(self, value: Any) -> bool:
+        scalar_key = _scalar_key(value)
+        if self.allow is not None and scalar_key not in self.allow:
+            return True
+        if self.deny is not None and scalar_key in self.deny:
+            return True
+        if self.pattern is not None and (
+            not isinstance(value, str) or self.pattern.fullmatch(value) is None
+        ):
+            return True
+        if self.minimum is not None or self.maximum is not None:
+            if isinstance(value, bool) or not isinstance(value, int | float):
+                return True
+            if self.minimum is not None and value < self.minimum:
+                return True
+            if self.maximum is not None and value > self.maximum:
+                return True
+        return False
+
+
+# keyed by (agent id, agent updated_at), so the entries never expire
+_compiled_rules_cache: TTLCache[tuple[UUID, datetime], dict[str, list[_CompiledInputRule]]] = (
+    TTLCache(maxsize=config.CUSTOM_INSTRUCTION_RULES_CACHE_MAX_SIZE, ttl=math.inf)
+)
+
+
+def check_for_violation(agent: Agent, function: Function, function_input: dict) -> None:
+    """
+    Check the function input against the agent's rules for the function.
+
+    Raises:
+        CustomInstructionViolation: If the function input violates any of the rules
+    """
+    if not agent.custom_instruction_rules.get(function.name):
+        return
+
+    for rule in _get_compiled_rules(agent).get(function.name, []):
+        for value in _find_values(function_input, rule.path):
+            if rule.is_violated_by(value):
+                logger.error(
+                    "custom instruction rule violated",
+                    extra={"function_name": function.name, "rule": rule.description},
+                )
+                raise CustomInstructionViolation(
+                    f"{function.name} execution has been rejected because of custom instruction rule: {rule.description}"
+                )
+
+
+def _get_compiled_rules(agent: Agent) -> dict[str, list[_CompiledInputRule]]:
+    key = (agent.id, agent.updated_at)
+    compiled_rules = _compiled_rules_cache.get(key)
+    if compiled_rules is None:
+        compiled_rules = {
+            function_name: [_compile(InputRule.model_validate(rule)) for rule in rules]
+            for function_name, rules in agent.custom_instruction_rules.items()
+        }
+        _compiled_rules_cache.set(key, compiled_rules)
+    return compiled_rules
+
+
+def _compile(rule: InputRule) -> _CompiledInputRule:
+    return _CompiledInputRule(
+        path=tuple(rule.path.split(".")),
+        allow=frozenset(map(_scalar_key, rule.allow)) if rule.allow is not None else None,
+        deny=frozenset(map(_scalar_key, rule.deny)) if rule.deny is not None else None,
+        pattern=compile_input_rule_pattern(rule.pattern) if rule.pattern is not None else None,
+        minimum=rule.minimum,
+        maximum=rule.maximum,
+        description=rule.description
+        or rule.model_dump_json(exclude_none=True, exclude={"description"}),
+    )
+
+
+def _scalar_key(value: Any) -> _ScalarKey | None:
+    if isinstance(value, str | int | float):
+        return (isinstance(value, bool), value)
+    return None
+
+
+def _find_values(value: Any, path: tuple[str, ...]) -> Iterator[Any]:
+    """Yield the values at path, traversing the lists along the path (and at its end) element-wise."""
+    if isinstance(value, list):
+        for item in value:
+            yield from _find_values(item, path)
+    elif not path:
+        yield value
+    elif isinstance(value, dict) and path[0] in value:
+        yield from _find_values(value[path[0]], path[1:])
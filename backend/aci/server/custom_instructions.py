@@ -1,11 +1,15 @@
+import hashlib
 import json
+from uuid import UUID
 
-from openai import OpenAI
+from openai import AsyncOpenAI
 from pydantic import BaseModel
 
+from aci.common.cache import TTLCache
 from aci.common.db.sql_models import Function
 from aci.common.exceptions import CustomInstructionViolation
 from aci.common.logging_setup import get_logger
+from aci.server import config
 
 logger = get_logger(__name__)
 
@@ -15,9 +19,32 @@ class ViolationCheckResult(BaseModel):
     justification: str
 
 
+# verdicts keyed by (agent id, function name, custom instruction hash, canonicalized input hash),
+# so that an agent sending the same input again doesn't wait on (and pay for) another inference
+_verdicts_cache: TTLCache[tuple[UUID, str, str, str], ViolationCheckResult] = TTLCache(
+    maxsize=config.CUSTOM_INSTRUCTION_VERDICT_CACHE_MAX_SIZE,
+    ttl=config.CUSTOM_INSTRUCTION_VERDICT_CACHE_TTL_SECONDS,
+)
+
+
+def _sha256(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def _verdict_cache_key(
+    agent_id: UUID, function_name: str, custom_instruction: str, function_input: dict
+) -> tuple[UUID, str, str, str]:
+    # inputs that only differ in key order or whitespace share a verdict
+    canonical_input = json.dumps(
+        function_input, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+    )
+    return (agent_id, function_name, _sha256(custom_instruction), _sha256(canonical_input))
+
+
 # TODO: consider adding function schema to the context
-def check_for_violation(
-    openai_client: OpenAI,
+async def check_for_violation(
+    openai_client: AsyncOpenAI,
+    agent_id: UUID,
     function: Function,
     function_input: dict,
     custom_instructions: dict[str, str],
@@ -26,10 +53,12 @@ def check_for_violation(
 ) -> None:
     """
     Check if the function request violates the custom instruction.
+    The verdicts are cached per agent, function, custom instruction and input.
     TODO: For external requests failure such as inference calls, we let the request pass.
 
     Args:
-        openai_client: OpenAI client
+        openai_client: Async OpenAI client
+        agent_id: ID of the agent the custom instructions belong to
         function: Function object
         function_input: Function input
         custom_instructions: Custom instructions
@@ -47,6 +76,53 @@ def check_for_violation(
         )
         return
 
+    cache_key = _verdict_cache_key(agent_id, function.name, custom_instruction, function_input)
+    result = _verdicts_cache.get(cache_key)
+    if result is None:
+        result = await _infer_violation(
+            openai_client, function, function_input, custom_instruction, model, temperature
+        )
+        # for inference failure, we let the request pass (and don't cache it)
+        if result is None:
+            return
+        _verdicts_cache.set(cache_key, result)
+    else:
+        logger.info(
+            "using cached custom instruction verdict",
+            extra={"function_name": function.name, "is_violated": result.is_violated},
+        )
+
+    if result.is_violated:
+        logger.error(
+            "custom instruction violated",
+            extra={
+                "function_name": function.name,
+                "justification": result.justification,
+            },
+        )
+        raise CustomInstructionViolation(
+            f"{function.name} execution has been rejected because of custom instruction: {custom_instructions[function.name]}."
+            f"justification: {result.justification}"
+        )
+    else:
+        logger.info(
+            "custom instruction not violated",
+            extra={
+                "function_name": function.name,
+                "justification": result.justification,
+            },
+        )
+
+
+async def _infer_violation(
+    openai_client: AsyncOpenAI,
+    function: Function,
+    function_input: dict,
+    custom_instruction: str,
+    model: str,
+    temperature: float,
+) -> ViolationCheckResult | None:
+    """Ask the model whether the function request violates the custom instruction."""
     logger.info(
         "Checking for violation of custom instruction",
         extra={"function_name": function.name, "custom_instruction": custom_instruction},
@@ -80,35 +156,14 @@ def check_for_violation(
     # TODO: retry.
     # TODO: if the violation check didn't happen due to inference failure, should we let the request pass?
     try:
-        response = openai_client.beta.chat.completions.parse(
+        response = await openai_client.beta.chat.completions.parse(
             model=model,
             messages=messages,  # type: ignore
             response_format=ViolationCheckResult,
             temperature=temperature,
         )
     except Exception:
-        # for inference failure, we should let the request pass
         logger.exception("failed inference for violation check, letting the request pass")
+        return None
 
-    result = response.choices[0].message.parsed
-
-    if result and result.is_violated:
-        logger.error(
-            "custom instruction violated",
-            extra={
-                "function_name": function.name,
-                "justification": result.justification,
-            },
-        )
-        raise CustomInstructionViolation(
-            f"{function.name} execution has been rejected because of custom instruction: {custom_instructions[function.name]}."
-            f"justification: {result.justification}"
-        )
-    else:
-        logger.info(
-            "custom instruction not violated",
-            extra={
-                "function_name": function.name,
-                "justification": result.justification if result else "unknown",
-            },
-        )
+    return response.choices[0].message.parsed
@@ -1,24 +1,28 @@
-from collections.abc import Generator
-from datetime import UTC, datetime, timedelta
+import hmac
+from collections.abc import AsyncGenerator, Generator
 from typing import Annotated
 from uuid import UUID
 
 from fastapi import Depends, Security
 from fastapi.security import APIKeyHeader, HTTPBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from aci.common import utils
+from aci.common import encryption, utils
 from aci.common.db import crud
 from aci.common.db.sql_models import Agent, Project
 from aci.common.enums import APIKeyStatus
 from aci.common.exceptions import (
     AgentNotFound,
-    DailyQuotaExceeded,
+    AuthenticationError,
     InvalidAPIKey,
     ProjectNotFound,
+    RateLimitExceeded,
 )
 from aci.common.logging_setup import get_logger
-from aci.server import config
+from aci.server import auth_cache, config, rate_limiter
+from aci.server.auth_cache import ResolvedAPIKey
+from aci.server.project_quota import project_quota_counter
 
 logger = get_logger(__name__)
 http_bearer = HTTPBearer(auto_error=True, description="login to receive a JWT token")
@@ -27,10 +31,35 @@ api_key_header = APIKeyHeader(
     description="API key for authentication",
     auto_error=True,
 )
+metrics_token_header = APIKeyHeader(
+    name=config.METRICS_TOKEN_HEADER_NAME,
+    description="token for the internal metrics routes",
+    auto_error=False,
+)
 
 
 class RequestContext:
-    def __init__(self, db_session: Session, api_key_id: UUID, project: Project, agent: Agent):
+    def __init__(
+        self,
+        db_session: Session,
+        api_key_id: UUID,
+        project: Project,
+        agent: Agent,
+    ):
+        self.db_session = db_session
+        self.api_key_id = api_key_id
+        self.project = project
+        self.agent = agent
+
+
+class AsyncRequestContext:
+    def __init__(
+        self,
+        db_session: AsyncSession,
+        api_key_id: UUID,
+        project: Project,
+        agent: Agent,
+    ):
         self.db_session = db_session
         self.api_key_id = api_key_id
         self.project = project
@@ -45,12 +74,40 @@ def yield_db_session() -> Generator[Session, None, None]:
         db_session.close()
 
 
-def validate_api_key(
-    db_session: Annotated[Session, Depends(yield_db_session)],
+async def yield_async_db_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async db session for the routes of the hot request path (function execution), so that db io
+    doesn't block the event loop.
+    """
+    db_session = utils.create_async_db_session(config.DB_FULL_URL)
+    try:
+        yield db_session
+    finally:
+        await db_session.close()
+
+
+async def resolve_api_key(
     api_key_key: Annotated[str, Security(api_key_header)],
-) -> UUID:
-    """Validate API key and return the API key ID. (not the actual API key string)"""
-    api_key = crud.projects.get_api_key(db_session, api_key_key)
+) -> ResolvedAPIKey:
+    """
+    Resolve the API key to its agent and project, served from the auth cache when possible.
+    Raises if the API key is not found, disabled or deleted.
+    """
+    key_hmac = encryption.hmac_sha256(api_key_key)
+    resolved_api_key = auth_cache.get(key_hmac)
+    if resolved_api_key is not None:
+        return resolved_api_key
+
+    # a short-lived session, so that its connection isn't held along with the one of the route's
+    # (sync or async) session for the rest of the request
+    async with utils.create_async_db_session(config.DB_FULL_URL) as db_session:
+        resolved_api_key = await _resolve_api_key(db_session, api_key_key)
+    auth_cache.put(key_hmac, resolved_api_key)
+    return resolved_api_key
+
+
+async def _resolve_api_key(db_session: AsyncSession, api_key_key: str) -> ResolvedAPIKey:
+    api_key = await crud.projects.get_api_key_async(db_session, api_key_key)
     if api_key is None:
         logger.error(
             "api key not found",
@@ -66,57 +123,70 @@ def validate_api_key(
         logger.error("api key is deleted", extra={"api_key_id": api_key.id})
         raise InvalidAPIKey("API key is deleted")
 
-    else:
-        api_key_id: UUID = api_key.id
-        logger.info("api key validation successful", extra={"api_key_id": api_key_id})
-        return api_key_id
+    agent = await crud.projects.get_agent_by_api_key_id_async(db_session, api_key.id)
+    if not agent:
+        raise AgentNotFound(f"agent not found for api_key_id={api_key.id}")
 
+    project = await crud.projects.get_project_async(db_session, agent.project_id)
+    if not project:
+        logger.error("project not found", extra={"api_key_id": api_key.id})
+        raise ProjectNotFound(f"project not found for api_key_id={api_key.id}")
 
-def validate_agent(
-    db_session: Annotated[Session, Depends(yield_db_session)],
-    api_key_id: Annotated[UUID, Depends(validate_api_key)],
-) -> Agent:
-    agent = crud.projects.get_agent_by_api_key_id(db_session, api_key_id)
-    if not agent:
-        raise AgentNotFound(f"agent not found for api_key_id={api_key_id}")
+    return ResolvedAPIKey(api_key_id=api_key.id, agent=agent, project=project)
 
-    return agent
 
+async def validate_api_key(
+    resolved_api_key: Annotated[ResolvedAPIKey, Depends(resolve_api_key)],
+) -> UUID:
+    """Validate API key and return the API key ID. (not the actual API key string)"""
+    logger.info("api key validation successful", extra={"api_key_id": resolved_api_key.api_key_id})
+    return resolved_api_key.api_key_id
+
+
+async def validate_metrics_token(
+    metrics_token: Annotated[str | None, Security(metrics_token_header)],
+) -> None:
+    """Only allow internal callers (e.g., monitoring) to read the process metrics."""
+    if metrics_token is None or not hmac.compare_digest(metrics_token, config.METRICS_TOKEN):
+        raise AuthenticationError("invalid metrics token")
+
+
+async def validate_rate_limits(
+    resolved_api_key: Annotated[ResolvedAPIKey, Depends(resolve_api_key)],
+) -> None:
+    """Enforce the per api key and per project rate limits (per ip ones are in the middleware)."""
+    rate_limits_and_keys = [
+        (rate_limiter.api_key_rate_limits, f"api_key:{resolved_api_key.api_key_id}"),
+        (rate_limiter.project_rate_limits, f"project:{resolved_api_key.project.id}"),
+    ]
+    for rate_limits, rate_limit_key in rate_limits_and_keys:
+        exceeded_rate_limit_name = await rate_limiter.hit(rate_limits, rate_limit_key)
+        if exceeded_rate_limit_name:
+            logger.warning(
+                "rate limit exceeded",
+                extra={
+                    "rate_limit_name": exceeded_rate_limit_name,
+                    "rate_limit_key": rate_limit_key,
+                },
+            )
+            raise RateLimitExceeded(exceeded_rate_limit_name)
+
+
+async def validate_agent(
+    resolved_api_key: Annotated[ResolvedAPIKey, Depends(resolve_api_key)],
+) -> Agent:
+    return resolved_api_key.agent
 
-# TODO: use cache (redis)
-# TODO: better way to handle replace(tzinfo=datetime.timezone.utc) ?
-# TODO: context return api key object instead of api_key_id
-def validate_project_quota(
-    db_session: Annotated[Session, Depends(yield_db_session)],
-    api_key_id: Annotated[UUID, Depends(validate_api_key)],
-) -> Project:
-    logger.debug("validating project quota", extra={"api_key_id": api_key_id})
 
-    project = crud.projects.get_project_by_api_key_id(db_session, api_key_id)
-    if not project:
-        logger.error("project not found", extra={"api_key_id": api_key_id})
-        raise ProjectNotFound(f"project not found for api_key_id={api_key_id}")
-
-    now: datetime = datetime.now(UTC)
-    need_reset = now >= project.daily_quota_reset_at.replace(tzinfo=UTC) + timedelta(days=1)
-
-    if not need_reset and project.daily_quota_used >= config.PROJECT_DAILY_QUOTA:
-        logger.warning(
-            "daily quota exceeded",
-            extra={
-                "project_id": project.id,
-                "daily_quota_used": project.daily_quota_used,
-                "daily_quota": config.PROJECT_DAILY_QUOTA,
-            },
-        )
-        raise DailyQuotaExceeded(
-            f"daily quota exceeded for project={project.id}, daily quota used={project.daily_quota_used}, "
-            f"daily quota={config.PROJECT_DAILY_QUOTA}"
-        )
+async def validate_project_quota(
+    resolved_api_key: Annotated[ResolvedAPIKey, Depends(resolve_api_key)],
+) -> Project:
+    project = resolved_api_key.project
+    logger.debug("validating project quota", extra={"project_id": project.id})
 
-    crud.projects.increase_project_quota_usage(db_session, project)
-    # TODO: commit here with the same db_session or should create a separate db_session?
-    db_session.commit()
+    # the session is only used (to load the project's counters) the first time the project is seen
+    async with utils.create_async_db_session(config.DB_FULL_URL) as db_session:
+        await project_quota_counter.consume(db_session, project.id)
 
     logger.info("project quota validation successful", extra={"project_id": project.id})
     return project
@@ -125,6 +195,7 @@ def validate_project_quota(
 def get_request_context(
     db_session: Annotated[Session, Depends(yield_db_session)],
     api_key_id: Annotated[UUID, Depends(validate_api_key)],
+    _: Annotated[None, Depends(validate_rate_limits)],
     agent: Annotated[Agent, Depends(validate_agent)],
     project: Annotated[Project, Depends(validate_project_quota)],
 ) -> RequestContext:
@@ -142,3 +213,26 @@ def get_request_context(
         project=project,
         agent=agent,
     )
+
+
+def get_async_request_context(
+    db_session: Annotated[AsyncSession, Depends(yield_async_db_session)],
+    api_key_id: Annotated[UUID, Depends(validate_api_key)],
+    _: Annotated[None, Depends(validate_rate_limits)],
+    agent: Annotated[Agent, Depends(validate_agent)],
+    project: Annotated[Project, Depends(validate_project_quota)],
+) -> AsyncRequestContext:
+    """
+    Same as get_request_context, with an async DB session, for the routes of the hot request path
+    (e.g., function execution).
+    """
+    logger.info(
+        "populating request context",
+        extra={"api_key_id": api_key_id, "project_id": project.id, "agent_id": agent.id},
+    )
+    return AsyncRequestContext(
+        db_session=db_session,
+        api_key_id=api_key_id,
+        project=project,
+        agent=agent,
+    )
@@ -0,0 +1,80 @@
+"""
+Loading of the rows a function execution needs (the function, its app, the project's app
+configuration and the owner's linked account) in a single round trip.
+
+Catalog data rarely changes between calls, so the query only fetches the versions (updated_at) of
+the function and its app, and the function and app rows are cached in process memory per version.
+The cached rows are detached from any session and are merged into the request's session without
+emitting sql, so every request works with its own copies, which can be modified as usual.
+"""
+
+import math
+from dataclasses import dataclass
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from aci.common.cache import TTLCache
+from aci.common.db import crud
+from aci.common.db.sql_models import AppConfiguration, Function, LinkedAccount
+from aci.server import config
+
+# keyed by (function id, function updated_at, app updated_at), so the entries never expire
+_functions_cache: TTLCache[tuple[UUID, datetime, datetime], Function] = TTLCache(
+    maxsize=config.FUNCTION_CACHE_MAX_SIZE, ttl=math.inf
+)
+
+
+@dataclass
+class ExecutionContext:
+    function: Function
+    app_configuration: AppConfiguration | None
+    linked_account: LinkedAccount | None
+
+
+async def load_execution_context(
+    db_session: AsyncSession,
+    project_id: UUID,
+    function_name: str,
+    public_only: bool,
+    linked_account_owner_id: str,
+) -> ExecutionContext | None:
+    """
+    Load the active function (with function.app) and the project's app configuration and linked
+    account of its app, with their app relationships set to function.app.
+    Returns None if the function is not found.
+    """
+    rows = await crud.functions.get_function_execution_rows_async(
+        db_session, project_id, function_name, public_only, True, linked_account_owner_id
+    )
+    if rows is None:
+        return None
+    function_id, function_updated_at, app_updated_at, app_configuration, linked_account = rows
+
+    key = (function_id, function_updated_at, app_updated_at)
+    cached_function = _functions_cache.get(key)
+    if cached_function is None:
+        function = await crud.functions.get_function_async(
+            db_session, function_name, public_only, True
+        )
+        # deactivated in between
+        if function is None:
+            return None
+        db_session.expunge(function)
+        db_session.expunge(function.app)
+        cached_function = function
+        _functions_cache.set(
+            (function.id, function.updated_at, function.app.updated_at), cached_function
+        )
+
+    function = await db_session.merge(cached_function, load=False)
+    if app_configuration is not None:
+        set_committed_value(app_configuration, "app", function.app)
+    if linked_account is not None:
+        set_committed_value(linked_account, "app", function.app)
+
+    return ExecutionContext(
+        function=function, app_configuration=app_configuration, linked_account=linked_account
+    )
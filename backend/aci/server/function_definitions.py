@@ -0,0 +1,132 @@
+"""
+Function definitions (per FunctionDefinitionFormat), visible parameters schemas and input
+validators of functions, computed once per function version and cached in process memory.
+
+Entries are keyed by the function's id and updated_at, so an updated function gets new entries
+(the old ones are evicted as least recently used) and there is nothing to invalidate.
+The cached objects are shared between requests and must not be modified.
+"""
+
+import math
+from datetime import datetime
+from uuid import UUID
+
+import jsonschema
+from jsonschema.exceptions import best_match
+from jsonschema.protocols import Validator
+
+from aci.common import processor
+from aci.common.cache import TTLCache
+from aci.common.catalog_index import IndexedFunction
+from aci.common.db.sql_models import Function
+from aci.common.enums import FunctionDefinitionFormat
+from aci.common.exceptions import InvalidFunctionDefinitionFormat
+from aci.common.schemas.function import (
+    AnthropicFunctionDefinition,
+    BasicFunctionDefinition,
+    OpenAIFunction,
+    OpenAIFunctionDefinition,
+    OpenAIResponsesFunctionDefinition,
+)
+from aci.server import config
+
+FunctionDefinition = (
+    BasicFunctionDefinition
+    | OpenAIFunctionDefinition
+    | OpenAIResponsesFunctionDefinition
+    | AnthropicFunctionDefinition
+)
+
+# the keys are versioned, so the entries never expire
+_visible_parameters_cache: TTLCache[tuple[UUID, datetime], dict] = TTLCache(
+    maxsize=config.FUNCTION_DEFINITION_CACHE_MAX_SIZE, ttl=math.inf
+)
+_function_definitions_cache: TTLCache[
+    tuple[UUID, datetime, FunctionDefinitionFormat], FunctionDefinition
+] = TTLCache(maxsize=config.FUNCTION_DEFINITION_CACHE_MAX_SIZE, ttl=math.inf)
+_input_validators_cache: TTLCache[tuple[UUID, datetime], Validator] = TTLCache(
+    maxsize=config.FUNCTION_DEFINITION_CACHE_MAX_SIZE, ttl=math.inf
+)
+
+
+def get_visible_parameters(function: Function | IndexedFunction) -> dict:
+    """The function's parameters schema with only the visible properties."""
+    key = (function.id, function.updated_at)
+    visible_parameters = _visible_parameters_cache.get(key)
+    if visible_parameters is None:
+        visible_parameters = processor.filter_visible_properties(function.parameters)
+        _visible_parameters_cache.set(key, visible_parameters)
+
+    return visible_parameters
+
+
+def validate_function_input(function: Function | IndexedFunction, function_input: dict) -> None:
+    """
+    Validate the input against the function's visible parameters schema, same as
+    jsonschema.validate but without checking the schema against its meta schema and looking up the
+    validator class on every call.
+
+    Raises:
+        jsonschema.ValidationError: If the input is invalid (the most relevant error)
+        jsonschema.SchemaError: If the function's parameters schema is invalid
+    """
+    key = (function.id, function.updated_at)
+    validator = _input_validators_cache.get(key)
+    if validator is None:
+        schema = get_visible_parameters(function)
+        validator_class = jsonschema.validators.validator_for(schema)
+        validator_class.check_schema(schema)
+        validator = validator_class(schema)
+        _input_validators_cache.set(key, validator)
+
+    error = best_match(validator.iter_errors(function_input))
+    if error is not None:
+        raise error
+
+
+def format_function_definition(
+    function: Function | IndexedFunction, format: FunctionDefinitionFormat
+) -> FunctionDefinition:
+    key = (function.id, function.updated_at, format)
+    function_definition = _function_definitions_cache.get(key)
+    if function_definition is None:
+        function_definition = _format_function_definition(function, format)
+        _function_definitions_cache.set(key, function_definition)
+
+    return function_definition
+
+
+def _format_function_definition(
+    function: Function | IndexedFunction, format: FunctionDefinitionFormat
+) -> FunctionDefinition:
+    match format:
+        case FunctionDefinitionFormat.BASIC:
+            return BasicFunctionDefinition(
+                name=function.name,
+                description=function.description,
+            )
+        case FunctionDefinitionFormat.OPENAI:
+            return OpenAIFunctionDefinition(
+                function=OpenAIFunction(
+                    name=function.name,
+                    description=function.description,
+                    parameters=get_visible_parameters(function),
+                )
+            )
+        case FunctionDefinitionFormat.OPENAI_RESPONSES:
+            # Create a properly formatted OpenAIResponsesFunctionDefinition
+            # This format is used by the OpenAI chat completions API
+            return OpenAIResponsesFunctionDefinition(
+                type="function",
+                name=function.name,
+                description=function.description,
+                parameters=get_visible_parameters(function),
+            )
+        case FunctionDefinitionFormat.ANTHROPIC:
+            return AnthropicFunctionDefinition(
+                name=function.name,
+                description=function.description,
+                input_schema=get_visible_parameters(function),
+            )
+        case _:
+            raise InvalidFunctionDefinitionFormat(f"Invalid format: {format}")
@@ -8,6 +8,7 @@ from aci.common.db.sql_models import Function, LinkedAccount
 from aci.common.exceptions import InvalidFunctionInput
 from aci.common.logging_setup import get_logger
 from aci.common.schemas.function import FunctionExecutionResult
+from aci.server.function_definitions import validate_function_input
 
 logger = get_logger(__name__)
 
@@ -28,7 +29,7 @@ class FunctionExecutor(ABC, Generic[TScheme, TCred]):
     # app_instance: AppBase = app_factory.get_app_instance(function_name)
     # app_instance.validate_input(function.parameters, function_execution_params.function_input)
     # return app_instance.execute(function_name, function_execution_params.function_input)
-    def execute(
+    async def execute(
         self,
         function: Function,
         function_input: dict,
@@ -45,15 +46,12 @@ class FunctionExecutor(ABC, Generic[TScheme, TCred]):
         )
         function_input = self._preprocess_function_input(function, function_input)
 
-        return self._execute(function, function_input, security_scheme, security_credentials)
+        return await self._execute(function, function_input, security_scheme, security_credentials)
 
     def _preprocess_function_input(self, function: Function, function_input: dict) -> dict:
         # validate user input against the "visible" parameters
         try:
-            jsonschema.validate(
-                instance=function_input,
-                schema=processor.filter_visible_properties(function.parameters),
-            )
+            validate_function_input(function, function_input)
         except jsonschema.ValidationError as e:
             logger.exception(
                 f"failed to validate function input, {e}",
@@ -84,7 +82,7 @@ class FunctionExecutor(ABC, Generic[TScheme, TCred]):
         return function_input
 
     @abstractmethod
-    def _execute(
+    async def _execute(
         self,
         function: Function,
         function_input: dict,
@@ -1,16 +1,19 @@
-import importlib
 from typing import Generic, override
 
 from aci.common.db.sql_models import Function
-from aci.common.exceptions import NoImplementationFound
 from aci.common.logging_setup import get_logger
 from aci.common.schemas.function import FunctionExecutionResult
 from aci.common.schemas.security_scheme import (
     TCred,
     TScheme,
 )
-from aci.server.app_connectors.base import AppConnectorBase
 from aci.server.function_executors.base_executor import FunctionExecutor
+from aci.server.function_executors.connector_instance_pool import connector_instance_pool
+from aci.server.function_executors.connector_registry import (
+    connector_registry,
+    get_connector_module_and_class_name,
+)
+from aci.server.function_executors.connector_thread_pools import connector_thread_pools
 
 logger = get_logger(__name__)
 
@@ -21,8 +24,7 @@ def parse_function_name(function_name: str) -> tuple[str, str, str]:
     e.g. "BRAVE_SEARCH__WEB_SEARCH" -> "aci.server.app_connectors.brave_search", "BraveSearch", "web_search"
     """
     app_name, method_name = function_name.split("__", 1)
-    module_name = f"aci.server.app_connectors.{app_name.lower()}"
-    class_name = "".join(word.capitalize() for word in app_name.split("_"))
+    module_name, class_name = get_connector_module_and_class_name(app_name)
     method_name = method_name.lower()
 
     return module_name, class_name, method_name
@@ -34,7 +36,7 @@ class ConnectorFunctionExecutor(FunctionExecutor[TScheme, TCred], Generic[TSchem
     """
 
     @override
-    def _execute(
+    async def _execute(
         self,
         function: Function,
         function_input: dict,
@@ -42,61 +44,24 @@ class ConnectorFunctionExecutor(FunctionExecutor[TScheme, TCred], Generic[TSchem
         security_credentials: TCred,
     ) -> FunctionExecutionResult:
         """
-        Execute a function by importing the connector module and calling the function.
+        Execute a function by calling the method of the (pooled) app connector instance.
         """
         logger.info(
             "executing connector function",
             extra={"function_name": function.name},
         )
-        module_name, class_name, method_name = parse_function_name(function.name)
-        logger.info(
-            "parsed function name",
-            extra={
-                "module_name": module_name,
-                "class_name": class_name,
-                "method_name": method_name,
-            },
-        )
-
-        app_connector_class = self._get_app_connector_class(module_name, class_name)
+        _, _, method_name = parse_function_name(function.name)
+        app_connector_class = connector_registry.get_connector_class(function.app.name)
         logger.info(
             "got app connector class",
-            extra={"app_connector_class": app_connector_class},
+            extra={"app_connector_class": app_connector_class, "method_name": method_name},
         )
-        # TODO: caching? singleton per app per enduser account? executing in a thread pool?
-        # another tricky thing is the access token expiration if using long-live cached objects
-        app_connector_instance = app_connector_class(
-            self.linked_account, security_scheme, security_credentials
+        # reusable connectors are pooled per linked account and credentials version, so a refreshed
+        # access token gets a new instance instead of the cached one with the expired token
+        app_connector_instance = connector_instance_pool.get_instance(
+            app_connector_class, self.linked_account, security_scheme, security_credentials
+        )
+        # connectors use blocking sdks, which must not run on the event loop
+        return await connector_thread_pools.run(
+            function.app.name, app_connector_instance.execute, method_name, function_input
         )
-        return app_connector_instance.execute(method_name, function_input)
-
-    def _get_app_connector_class(self, module_name: str, class_name: str) -> type[AppConnectorBase]:
-        """
-        Get the app connector class.
-
-        Returns:
-            The app connector class.
-
-        Raises:
-            NoImplementationFound: If the app connector class is not found.
-        """
-
-        try:
-            app_connector_class: type[AppConnectorBase] = getattr(
-                importlib.import_module(module_name), class_name
-            )
-            logger.debug(
-                "found app connector class",
-                extra={
-                    "module_name": module_name,
-                    "class_name": class_name,
-                    "app_connector_class": app_connector_class,
-                },
-            )
-            return app_connector_class
-        except (ImportError, AttributeError) as e:
-            logger.exception(
-                "failed to find app connector class",
-                extra={"module_name": module_name, "class_name": class_name},
-            )
-            raise NoImplementationFound("no app connector class found") from e
@@ -0,0 +1,91 @@
+"""
+Bounded LRU pool of app connector instances, so that the executions of a linked account reuse the
+connector (and the SDK clients it holds, e.g., the Gmail service objects) instead of building a new
+one every time.
+
+Only reusable connectors (see AppConnectorBase.reusable) are pooled. Instances are keyed by linked
+account and by a digest of the security scheme and credentials, so refreshed or updated credentials
+(e.g., a new OAuth2 access token) get a new instance, and the stale one is evicted as least recently
+used or when its ttl expires.
+"""
+
+import hashlib
+from uuid import UUID
+
+from aci.common.cache import TTLCache
+from aci.common.db.sql_models import LinkedAccount
+from aci.common.logging_setup import get_logger
+from aci.common.schemas.security_scheme import (
+    APIKeyScheme,
+    APIKeySchemeCredentials,
+    NoAuthScheme,
+    NoAuthSchemeCredentials,
+    OAuth2Scheme,
+    OAuth2SchemeCredentials,
+)
+from aci.server import config
+from aci.server.app_connectors.base import AppConnectorBase
+
+logger = get_logger(__name__)
+
+
+class ConnectorInstancePool:
+    def __init__(self, maxsize: int, ttl: float):
+        # (connector class, linked account id, credentials version) -> instance
+        self._instances: TTLCache[tuple[type[AppConnectorBase], UUID, str], AppConnectorBase] = (
+            TTLCache(maxsize=maxsize, ttl=ttl)
+        )
+
+    def get_instance(
+        self,
+        connector_class: type[AppConnectorBase],
+        linked_account: LinkedAccount,
+        security_scheme: OAuth2Scheme | APIKeyScheme | NoAuthScheme,
+        security_credentials: OAuth2SchemeCredentials
+        | APIKeySchemeCredentials
+        | NoAuthSchemeCredentials,
+    ) -> AppConnectorBase:
+        """Get the pooled instance of a reusable connector, creating it if needed."""
+        if not connector_class.reusable:
+            return connector_class(linked_account, security_scheme, security_credentials)
+
+        key = (
+            connector_class,
+            linked_account.id,
+            _get_credentials_version(security_scheme, security_credentials),
+        )
+        instance = self._instances.get(key)
+        # no lock needed, the event loop is single-threaded and there is no await in between
+        if instance is None:
+            instance = connector_class(linked_account, security_scheme, security_credentials)
+            self._instances.set(key, instance)
+            logger.info(
+                "created pooled app connector instance",
+                extra={
+                    "app_connector_class": connector_class.__name__,
+                    "linked_account_id": linked_account.id,
+                },
+            )
+        return instance
+
+    def clear(self) -> None:
+        """Drop all instances, e.g., at server shutdown."""
+        self._instances.clear()
+
+
+def _get_credentials_version(
+    security_scheme: OAuth2Scheme | APIKeyScheme | NoAuthScheme,
+    security_credentials: OAuth2SchemeCredentials
+    | APIKeySchemeCredentials
+    | NoAuthSchemeCredentials,
+) -> str:
+    # a digest, so that the keys of the pool don't hold the secrets in plain text
+    return hashlib.sha256(
+        security_scheme.model_dump_json().encode() + security_credentials.model_dump_json().encode()
+    ).hexdigest()
+
+
+connector_instance_pool = ConnectorInstancePool(
+    maxsize=config.CONNECTOR_INSTANCE_POOL_MAX_SIZE,
+    ttl=config.CONNECTOR_INSTANCE_POOL_TTL_SECONDS,
+)
@@ -0,0 +1,89 @@
+"""
+Registry of the app connector classes, keyed by app name.
+
+The connector of an app lives in module aci.server.app_connectors.<app name in lower case>, as a
+class named after the app in camel case, e.g., "BRAVE_SEARCH" -> brave_search.BraveSearch. The
+classes are resolved once at server startup instead of importing the module on every execution.
+"""
+
+import importlib
+import pkgutil
+
+from aci.common.exceptions import NoImplementationFound
+from aci.common.logging_setup import get_logger
+from aci.server import app_connectors
+from aci.server.app_connectors.base import AppConnectorBase
+
+logger = get_logger(__name__)
+
+# modules of the package that are not the connector of an app
+_NON_CONNECTOR_MODULES = frozenset({"base"})
+
+
+def get_connector_module_and_class_name(app_name: str) -> tuple[str, str]:
+    """
+    Get the module name and class name of the connector of an app.
+    e.g. "BRAVE_SEARCH" -> "aci.server.app_connectors.brave_search", "BraveSearch"
+    """
+    module_name = f"{app_connectors.__name__}.{app_name.lower()}"
+    class_name = "".join(word.capitalize() for word in app_name.split("_"))
+    return module_name, class_name
+
+
+class ConnectorRegistry:
+    def __init__(self) -> None:
+        self._connector_classes: dict[str, type[AppConnectorBase]] = {}
+
+    def load(self) -> None:
+        """
+        Resolve the connectors of all apps, e.g., at server startup. A connector that fails to load
+        is logged and skipped, it's resolved again (and fails with NoImplementationFound) when used.
+        """
+        for module_info in pkgutil.iter_modules(app_connectors.__path__):
+            if module_info.name in _NON_CONNECTOR_MODULES:
+                continue
+            try:
+                self.get_connector_class(module_info.name.upper())
+            except NoImplementationFound:
+                continue
+        logger.info(
+            "loaded app connectors",
+            extra={"app_names": sorted(self._connector_classes)},
+        )
+
+    def get_connector_class(self, app_name: str) -> type[AppConnectorBase]:
+        """
+        Get the connector class of the app, resolving it on first use if it's not loaded yet.
+
+        Raises:
+            NoImplementationFound: If the app connector class is not found.
+        """
+        if app_name in self._connector_classes:
+            return self._connector_classes[app_name]
+
+        module_name, class_name = get_connector_module_and_class_name(app_name)
+        try:
+            connector_class: type[AppConnectorBase] = getattr(
+                importlib.import_module(module_name), class_name
+            )
+        except (ImportError, AttributeError) as e:
+            logger.exception(
+                "failed to find app connector class",
+                extra={"module_name": module_name, "class_name": class_name},
+            )
+            raise NoImplementationFound("no app connector class found") from e
+
+        logger.debug(
+            "found app connector class",
+            extra={
+                "module_name": module_name,
+                "class_name": class_name,
+                "app_connector_class": connector_class,
+            },
+        )
+        # no lock needed, a concurrent resolution of the same app just gets the same class
+        self._connector_classes[app_name] = connector_class
+        return connector_class
+
+
+connector_registry = ConnectorRegistry()
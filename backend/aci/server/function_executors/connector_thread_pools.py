@@ -0,0 +1,68 @@
+"""
+Bounded thread pools that run the blocking calls of connector functions (e.g., the sync SDKs of
+Gmail and E2B) off the event loop.
+
+One pool is kept per app, so that a slow upstream only queues up the calls of its own app (at most
+max_workers of them run at a time) instead of blocking the event loop or the calls of other apps.
+"""
+
+import asyncio
+import contextvars
+import functools
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import ParamSpec, TypeVar
+
+from aci.common.logging_setup import get_logger
+from aci.server import config
+
+logger = get_logger(__name__)
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+class ConnectorThreadPools:
+    def __init__(self, max_workers_per_app: int):
+        self._max_workers_per_app = max_workers_per_app
+        self._pools: dict[str, ThreadPoolExecutor] = {}
+
+    def get_pool(self, app_name: str) -> ThreadPoolExecutor:
+        """Get the pool of the app, creating it on first use."""
+        pool = self._pools.get(app_name)
+        # no lock needed, the event loop is single-threaded and there is no await in between
+        if pool is None:
+            pool = ThreadPoolExecutor(
+                max_workers=self._max_workers_per_app,
+                thread_name_prefix=f"connector-{app_name.lower()}",
+            )
+            self._pools[app_name] = pool
+            logger.info(
+                "created connector thread pool",
+                extra={"app_name": app_name, "max_workers": self._max_workers_per_app},
+            )
+        return pool
+
+    async def run(
+        self, app_name: str, func: Callable[P, R], *args: P.args, **kwargs: P.kwargs
+    ) -> R:
+        """
+        Run func in the pool of the app and wait for its result without blocking the event loop.
+        The context (e.g., the request id used by logging) is copied to the worker thread.
+        """
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            self.get_pool(app_name), functools.partial(context.run, func, *args, **kwargs)
+        )
+
+    def shutdown(self) -> None:
+        """Shut down all pools, e.g., at server shutdown. Pools are re-created on next use."""
+        pools = list(self._pools.values())
+        self._pools.clear()
+        for pool in pools:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+connector_thread_pools = ConnectorThreadPools(
+    max_workers_per_app=config.CONNECTOR_THREAD_POOL_MAX_WORKERS_PER_APP
+)
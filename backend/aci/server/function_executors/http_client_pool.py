@@ -0,0 +1,113 @@
+"""
+Long-lived async http clients used to execute REST functions.
+
+One httpx.AsyncClient is kept per upstream host (scheme + host + port of the function's server_url),
+so that keep-alive connections are reused across function executions and every upstream host gets
+its own connection limits, instead of one slow host exhausting the connections of all the others.
+HTTP/2 is negotiated (via ALPN) with upstreams that support it.
+
+The number of clients is bounded, as server_urls can be templated with per-account hosts (e.g.,
+"https://{subdomain}.example.com"): the least recently used clients are evicted, and closed as soon
+as no execution is using them anymore.
+
+The clients are shared by all projects and linked accounts, so they never store the cookies set by
+upstreams (which would be sent along with the requests of other tenants); the only cookies sent are
+the ones of the request, built from the function input and the security scheme.
+"""
+
+import asyncio
+import math
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from http.cookiejar import Cookie, CookieJar, DefaultCookiePolicy
+from urllib.request import Request
+
+import httpx
+
+from aci.common.cache import TTLCache
+from aci.common.logging_setup import get_logger
+from aci.server import config
+
+logger = get_logger(__name__)
+
+
+class _RejectAllCookiesPolicy(DefaultCookiePolicy):
+    def set_ok(self, cookie: Cookie, request: Request) -> bool:
+        return False
+
+
+def create_cookieless_jar() -> CookieJar:
+    """Create a cookie jar that doesn't store any cookie of the responses, for shared clients."""
+    return CookieJar(policy=_RejectAllCookiesPolicy())
+
+
+class _PooledClient:
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        # number of executions currently using the client
+        self.in_use = 0
+        self.evicted = False
+
+
+class HTTPClientPool:
+    def __init__(self, limits: httpx.Limits, timeout: httpx.Timeout, http2: bool, max_clients: int):
+        self._limits = limits
+        self._timeout = timeout
+        self._http2 = http2
+        # no ttl, idle connections are closed after the keep-alive expiry of the limits
+        self._clients: TTLCache[str, _PooledClient] = TTLCache(maxsize=max_clients, ttl=math.inf)
+
+    @asynccontextmanager
+    async def acquire(self, url: httpx.URL) -> AsyncIterator[httpx.AsyncClient]:
+        """
+        Use the client for the host of url, creating it on first use. The least recently used
+        clients are evicted beyond max_clients, and closed once the executions using them are done.
+        """
+        origin = f"{url.scheme}://{url.netloc.decode('ascii')}"
+        pooled = self._clients.get(origin)
+        # no lock needed, the event loop is single-threaded and there is no await in between
+        if pooled is None or pooled.client.is_closed:
+            pooled = _PooledClient(
+                httpx.AsyncClient(
+                    limits=self._limits,
+                    timeout=self._timeout,
+                    http2=self._http2,
+                    cookies=create_cookieless_jar(),
+                )
+            )
+            logger.info("created http client", extra={"origin": origin, "http2": self._http2})
+        evicted = self._clients.set(origin, pooled)
+        pooled.in_use += 1
+        try:
+            for evicted_pooled in evicted:
+                evicted_pooled.evicted = True
+                if evicted_pooled.in_use == 0:
+                    await evicted_pooled.client.aclose()
+            yield pooled.client
+        finally:
+            pooled.in_use -= 1
+            if pooled.evicted and pooled.in_use == 0:
+                await pooled.client.aclose()
+
+    async def aclose(self) -> None:
+        """Close all clients, e.g., at server shutdown. Clients are re-created on next use."""
+        pooled_clients = self._clients.pop_all()
+        await asyncio.gather(
+            *(pooled.client.aclose() for pooled in pooled_clients), return_exceptions=True
+        )
+
+
+http_client_pool = HTTPClientPool(
+    limits=httpx.Limits(
+        max_connections=config.HTTP_CLIENT_MAX_CONNECTIONS_PER_HOST,
+        max_keepalive_connections=config.HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS_PER_HOST,
+        keepalive_expiry=config.HTTP_CLIENT_KEEPALIVE_EXPIRY,
+    ),
+    timeout=httpx.Timeout(
+        config.HTTP_CLIENT_TIMEOUT,
+        read=config.HTTP_CLIENT_READ_TIMEOUT,
+        pool=config.HTTP_CLIENT_POOL_TIMEOUT,
+    ),
+    http2=config.HTTP_CLIENT_HTTP2,
+    max_clients=config.HTTP_CLIENT_POOL_MAX_CLIENTS,
+)
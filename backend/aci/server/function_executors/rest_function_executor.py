@@ -12,6 +12,7 @@ from aci.common.schemas.security_scheme import (
     TScheme,
 )
 from aci.server.function_executors.base_executor import FunctionExecutor
+from aci.server.function_executors.http_client_pool import http_client_pool
 
 logger = get_logger(__name__)
 
@@ -34,7 +35,7 @@ class RestFunctionExecutor(FunctionExecutor[TScheme, TCred], Generic[TScheme, TC
         pass
 
     @override
-    def _execute(
+    async def _execute(
         self,
         function: Function,
         function_input: dict,
@@ -60,46 +61,46 @@ class RestFunctionExecutor(FunctionExecutor[TScheme, TCred], Generic[TScheme, TC
             security_scheme, security_credentials, headers, query, body, cookies
         )
 
-        request = httpx.Request(
-            method=protocol_data.method,
-            url=url,
-            params=query if query else None,
-            headers=headers if headers else None,
-            cookies=cookies if cookies else None,
-            json=body if body else None,
-        )
-
-        logger.info(
-            "executing function via raw http request",
-            extra={
-                "function_name": function.name,
-                "method": request.method,
-                "url": str(request.url),
-            },
-        )
-
-        return self._send_request(request)
-
-    def _send_request(self, request: httpx.Request) -> FunctionExecutionResult:
-        # TODO: one client for all requests? cache the client? concurrency control? async client?
+        async with http_client_pool.acquire(httpx.URL(url)) as client:
+            request = client.build_request(
+                method=protocol_data.method,
+                url=url,
+                params=query if query else None,
+                headers=headers if headers else None,
+                cookies=cookies if cookies else None,
+                json=body if body else None,
+            )
+
+            logger.info(
+                "executing function via raw http request",
+                extra={
+                    "function_name": function.name,
+                    "method": request.method,
+                    "url": str(request.url),
+                },
+            )
+
+            return await self._send_request(client, request)
+
+    async def _send_request(
+        self, client: httpx.AsyncClient, request: httpx.Request
+    ) -> FunctionExecutionResult:
         # TODO: add retry
-        timeout = httpx.Timeout(10.0, read=30.0)
-        with httpx.Client(timeout=timeout) as client:
-            try:
-                response = client.send(request)
-            except Exception as e:
-                logger.exception(f"failed to send function execution http request, {e}")
-                return FunctionExecutionResult(success=False, error=str(e))
-
-            try:
-                response.raise_for_status()
-            except httpx.HTTPStatusError as e:
-                logger.exception(f"http error occurred for function execution, {e}")
-                return FunctionExecutionResult(
-                    success=False, error=self._get_error_message(response, e)
-                )
-
-            return FunctionExecutionResult(success=True, data=self._get_response_data(response))
+        try:
+            response = await client.send(request)
+        except Exception as e:
+            logger.exception(f"failed to send function execution http request, {e}")
+            return FunctionExecutionResult(success=False, error=str(e))
+
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            logger.exception(f"http error occurred for function execution, {e}")
+            return FunctionExecutionResult(
+                success=False, error=self._get_error_message(response, e)
+            )
+
+        return FunctionExecutionResult(success=True, data=self._get_response_data(response))
 
     def _get_response_data(self, response: httpx.Response) -> Any:
         """Get the response data from the response.
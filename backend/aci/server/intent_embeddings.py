@@ -0,0 +1,48 @@
+"""
+Embeddings of the search intents of /v1/apps/search and /v1/functions/search.
+
+Repeated intents are served from the embedding cache without calling the embedding provider, and
+cache misses use the provider's async path so that the event loop isn't blocked.
+"""
+
+from aci.common.db.vector_search import VectorSearchOptions
+from aci.common.embedding_cache import EmbeddingCache
+from aci.common.embeddings import create_embedding_provider
+from aci.server import config
+
+embedding_provider = create_embedding_provider(
+    config.EMBEDDING_PROVIDER,
+    config.OPENAI_API_KEY,
+    config.OPENAI_EMBEDDING_MODEL,
+    config.OPENAI_EMBEDDING_DIMENSION,
+)
+
+embedding_cache = EmbeddingCache(
+    maxsize=config.EMBEDDING_CACHE_MAX_SIZE,
+    ttl=config.EMBEDDING_CACHE_TTL_SECONDS,
+    disk_path=config.EMBEDDING_CACHE_DISK_PATH if config.EMBEDDING_CACHE_DISK_ENABLED else None,
+    disk_maxsize=config.EMBEDDING_CACHE_DISK_MAX_SIZE,
+)
+
+# used by the searches that order by similarity to the intent embedding
+vector_search_options = VectorSearchOptions(
+    ef_search=config.VECTOR_SEARCH_HNSW_EF_SEARCH,
+    iterative_scan=config.VECTOR_SEARCH_HNSW_ITERATIVE_SCAN,
+)
+
+
+async def _generate(intent: str) -> list[float]:
+    embeddings = await embedding_provider.embed_async([intent])
+    return embeddings[0]
+
+
+async def get_intent_embedding(intent: str) -> list[float]:
+    return await embedding_cache.get_or_generate(
+        intent, embedding_provider.model, embedding_provider.dimension, _generate
+    )
+
+
+async def aclose() -> None:
+    """Release the provider's and the cache's resources, e.g., at server shutdown."""
+    await embedding_provider.aclose()
+    embedding_cache.close()
@@ -1,3 +1,6 @@
+import asyncio
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager, suppress
 from typing import Any
 
 import logfire
@@ -10,14 +13,27 @@ from starlette.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 
+from aci.common.db.engine import (
+    DBPoolConfig,
+    configure_db_pool,
+    dispose_async_db_engines,
+    dispose_db_engines,
+)
 from aci.common.exceptions import ACIException
 from aci.common.logging_setup import setup_logging
-from aci.server import config
+from aci.server import config, intent_embeddings, search_index
 from aci.server import dependencies as deps
 from aci.server.acl import get_propelauth
 from aci.server.dependency_check import check_dependencies
+from aci.server.function_executors.connector_instance_pool import connector_instance_pool
+from aci.server.function_executors.connector_registry import connector_registry
+from aci.server.function_executors.connector_thread_pools import connector_thread_pools
+from aci.server.function_executors.http_client_pool import http_client_pool
 from aci.server.middleware.interceptor import InterceptorMiddleware, RequestIDLogFilter
 from aci.server.middleware.ratelimit import RateLimitMiddleware
+from aci.server.oauth2_client_pool import oauth2_client_pool
+from aci.server.oauth2_token_renewal import oauth2_token_renewer
+from aci.server.project_quota import project_quota_counter
 from aci.server.routes import (
     agent,
     analytics,
@@ -48,6 +64,44 @@ setup_logging(
 
 stripe.api_key = config.STRIPE_SECRET_KEY
 
+# the process-wide pooled engine is shared by the request path, app connectors, etc.
+configure_db_pool(
+    config.DB_FULL_URL,
+    DBPoolConfig(
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_POOL_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        pool_recycle=config.DB_POOL_RECYCLE,
+        pool_pre_ping=config.DB_POOL_PRE_PING,
+    ),
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+    connector_registry.load()
+    quota_flush_task = asyncio.create_task(project_quota_counter.run_periodic_flush())
+    catalog_index_refresh_task = (
+        asyncio.create_task(search_index.catalog_index.run_periodic_refresh(config.DB_FULL_URL))
+        if search_index.catalog_index is not None
+        else None
+    )
+    oauth2_token_renewal_task = asyncio.create_task(oauth2_token_renewer.run_periodic_renewal())
+    yield
+    for task in (quota_flush_task, catalog_index_refresh_task, oauth2_token_renewal_task):
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+    await project_quota_counter.flush()
+    dispose_db_engines()
+    await dispose_async_db_engines()
+    await http_client_pool.aclose()
+    await oauth2_client_pool.aclose()
+    connector_instance_pool.clear()
+    connector_thread_pools.shutdown()
+    await intent_embeddings.aclose()
+
 
 def custom_generate_unique_id(route: APIRoute) -> str:
     return f"{route.tags[0]}-{route.name}"
@@ -61,6 +115,7 @@ app = FastAPI(
     redoc_url=config.APP_REDOC_URL,
     openapi_url=config.APP_OPENAPI_URL,
     generate_unique_id_function=custom_generate_unique_id,
+    lifespan=lifespan,
 )
 
 auth = get_propelauth()
@@ -136,19 +191,27 @@ app.include_router(
     apps.router,
     prefix=config.ROUTER_PREFIX_APPS,
     tags=[config.ROUTER_PREFIX_APPS.split("/")[-1]],
-    dependencies=[Depends(deps.validate_api_key), Depends(deps.validate_project_quota)],
+    dependencies=[
+        Depends(deps.validate_api_key),
+        Depends(deps.validate_rate_limits),
+        Depends(deps.validate_project_quota),
+    ],
 )
 app.include_router(
     functions.router,
     prefix=config.ROUTER_PREFIX_FUNCTIONS,
     tags=[config.ROUTER_PREFIX_FUNCTIONS.split("/")[-1]],
-    dependencies=[Depends(deps.validate_api_key), Depends(deps.validate_project_quota)],
+    dependencies=[
+        Depends(deps.validate_api_key),
+        Depends(deps.validate_rate_limits),
+        Depends(deps.validate_project_quota),
+    ],
 )
 app.include_router(
     app_configurations.router,
     prefix=config.ROUTER_PREFIX_APP_CONFIGURATIONS,
     tags=[config.ROUTER_PREFIX_APP_CONFIGURATIONS.split("/")[-1]],
-    dependencies=[Depends(deps.validate_api_key)],
+    dependencies=[Depends(deps.validate_api_key), Depends(deps.validate_rate_limits)],
 )
 # TODO: project quota management for different routes
 # similar to auth, it contains a callback route so can't use global dependencies here
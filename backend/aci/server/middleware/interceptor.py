@@ -2,9 +2,10 @@ import logging
 import uuid
 from datetime import UTC, datetime
 
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from starlette.datastructures import MutableHeaders
 from starlette.requests import Request
-from starlette.responses import JSONResponse, Response
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from aci.common.logging_setup import get_logger
 from aci.server.context import request_id_ctx_var
@@ -12,17 +13,27 @@ from aci.server.context import request_id_ctx_var
 logger = get_logger(__name__)
 
 
-class InterceptorMiddleware(BaseHTTPMiddleware):
+class InterceptorMiddleware:
     """
     Middleware for logging structured analytics data for every request/response.
     It generates a unique request ID and logs some baseline details.
+    Implemented as a pure ASGI middleware instead of BaseHTTPMiddleware, which runs the rest of the
+    app in a separate task and pipes the response through memory streams on every request.
     """
 
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         start_time = datetime.now(UTC)
         request_id = str(uuid.uuid4())
         request_id_ctx_var.set(request_id)
 
+        request = Request(scope)
         request_log_data = {
             "method": request.method,
             "url": str(request.url),
@@ -33,29 +44,36 @@ class InterceptorMiddleware(BaseHTTPMiddleware):
         }
         logger.info("received request", extra=request_log_data)
 
+        response_log_data: dict = {}
+
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-Request-ID"] = request_id
+                response_log_data["status_code"] = message["status"]
+                response_log_data["content_length"] = headers.get("content-length")
+            await send(message)
+
         try:
-            response = await call_next(request)
+            await self.app(scope, receive, send_with_request_id)
         except Exception as e:
             logger.exception(
                 e,
                 extra={"duration": (datetime.now(UTC) - start_time).total_seconds()},
             )
-            return JSONResponse(
+            if response_log_data:
+                # the response has already started, can't send another one
+                raise
+            response = JSONResponse(
                 status_code=500,
                 content={"error": "Internal server error"},
             )
+            await response(scope, receive, send)
+            return
 
-        response_log_data = {
-            "status_code": response.status_code,
-            "duration": (datetime.now(UTC) - start_time).total_seconds(),
-            "content_length": response.headers.get("content-length"),
-        }
+        response_log_data["duration"] = (datetime.now(UTC) - start_time).total_seconds()
         logger.info("response sent", extra=response_log_data)
 
-        response.headers["X-Request-ID"] = request_id
-
-        return response
-
     def _get_client_ip(self, request: Request) -> str:
         """
         Get the actual client IP if the server is running behind a proxy.
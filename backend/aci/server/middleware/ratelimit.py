@@ -1,60 +1,69 @@
 import json
 
 from fastapi import status
-from limits import RateLimitItem, RateLimitItemPerDay, RateLimitItemPerSecond
-from limits.aio.storage import MemoryStorage
-from limits.aio.strategies import MovingWindowRateLimiter
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from limits import RateLimitItem
+from starlette.datastructures import MutableHeaders
 from starlette.requests import Request
 from starlette.responses import Response
-from starlette.types import ASGIApp
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from aci.common.logging_setup import get_logger
-from aci.server.config import RATE_LIMIT_IP_PER_DAY, RATE_LIMIT_IP_PER_SECOND
+from aci.server import rate_limiter
 
 logger = get_logger(__name__)
 
 
-# TODO: replace with redis storage
-class RateLimitMiddleware(BaseHTTPMiddleware):
+class RateLimitMiddleware:
+    """
+    Per ip rate limiting. Per api key and per project rate limits are enforced in the dependencies
+    where the api key is validated, see rate_limiter.py for the (shared) storage.
+    Implemented as a pure ASGI middleware, see InterceptorMiddleware.
+    """
+
     def __init__(self, app: ASGIApp) -> None:
-        super().__init__(app)
-        self.storage = MemoryStorage()
-        self.limiter = MovingWindowRateLimiter(self.storage)
-        self.rate_limits: dict[str, RateLimitItem] = {
-            "ip-per-second": RateLimitItemPerSecond(amount=RATE_LIMIT_IP_PER_SECOND),
-            "ip-per-day": RateLimitItemPerDay(amount=RATE_LIMIT_IP_PER_DAY),
-        }
+        self.app = app
+        self.limiter = rate_limiter.limiter
+        self.rate_limits: dict[str, RateLimitItem] = dict(rate_limiter.ip_rate_limits)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        # Determine the rate limit key based on authentication method
-        rate_limit_key = self._get_rate_limit_key(request)
+        rate_limit_key = self._get_rate_limit_key(Request(scope))
+        exceeded_rate_limit_name = None
         for rate_limit_name, rate_limit in self.rate_limits.items():
             if not await self.limiter.hit(rate_limit, rate_limit_key):
-                # NOTE: raising a custom ACIException here doesn't work as expected
-                logger.warning(
-                    "rate limit exceeded",
-                    extra={
-                        "rate_limit_name": rate_limit_name,
-                        "rate_limit_key": rate_limit_key,
-                    },
-                )
-                return Response(
-                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                    content=json.dumps({"error": f"Rate limit exceeded: {rate_limit_name}"}),
-                    headers=await self._get_rate_limit_headers(rate_limit_key),
-                )
-
-        response = await call_next(request)
+                exceeded_rate_limit_name = rate_limit_name
+                break
 
-        # Add rate limit headers for all limits
+        # computed once per request, used for both the 429 and the regular response
         headers = await self._get_rate_limit_headers(rate_limit_key)
-        response.headers.update(headers)
 
-        return response
+        if exceeded_rate_limit_name is not None:
+            # NOTE: raising a custom ACIException here doesn't work as expected
+            logger.warning(
+                "rate limit exceeded",
+                extra={
+                    "rate_limit_name": exceeded_rate_limit_name,
+                    "rate_limit_key": rate_limit_key,
+                },
+            )
+            response = Response(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                content=json.dumps({"error": f"Rate limit exceeded: {exceeded_rate_limit_name}"}),
+                headers=headers,
+            )
+            await response(scope, receive, send)
+            return
+
+        async def send_with_rate_limit_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).update(headers)
+            await send(message)
+
+        await self.app(scope, receive, send_with_rate_limit_headers)
 
-    # TODO: only do ip based rate limiting in middleware
-    # consider api key based rate limiting in dependencies where api key is validated
     def _get_rate_limit_key(self, request: Request) -> str:
         # Note: client.host will be set correctly (if running behind proxy like ALB) because of ProxyHeadersMiddleware.
         if request.client and request.client.host:
@@ -63,7 +72,7 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             logger.error("failed to generate rate limit key, request.client.host not set")
             return "ip:127.0.0.1"
 
-    async def _get_rate_limit_headers(self, key: str) -> dict:
+    async def _get_rate_limit_headers(self, key: str) -> dict[str, str]:
         headers = {}
         for rate_limit_name, rate_limit in self.rate_limits.items():
             window_stats = await self.limiter.get_window_stats(rate_limit, key)
@@ -0,0 +1,97 @@
+"""
+Long-lived authlib OAuth2 clients used to create authorization urls, fetch and refresh tokens.
+
+One AsyncOAuth2Client (an httpx.AsyncClient) is kept per OAuth2 client of an app, i.e., per
+(app, client_id, token endpoints, client authentication), so that keep-alive connections to the
+token endpoints are reused across token fetches and refreshes instead of paying a TLS handshake
+each time. The clients are only used with explicit tokens (code, refresh token), never with the
+token stored on the client, and never store the cookies of the token responses, so sharing them
+across linked accounts is safe.
+
+The pool is bounded: the least recently used clients are evicted, and so are clients unused for
+the ttl (e.g., the ones of a rotated client secret). Evicted clients aren't closed, as a token
+request may still be using them; their connections are released when they are garbage collected.
+"""
+
+import asyncio
+
+import httpx
+from authlib.integrations.httpx_client import AsyncOAuth2Client
+
+from aci.common.cache import TTLCache
+from aci.common.logging_setup import get_logger
+from aci.server import config
+from aci.server.function_executors.http_client_pool import create_cookieless_jar
+
+logger = get_logger(__name__)
+
+
+class OAuth2ClientPool:
+    def __init__(self, limits: httpx.Limits, timeout: httpx.Timeout, maxsize: int, ttl: float):
+        self._limits = limits
+        self._timeout = timeout
+        self._clients: TTLCache[tuple[str, ...], AsyncOAuth2Client] = TTLCache(
+            maxsize=maxsize, ttl=ttl
+        )
+
+    def get_client(
+        self,
+        app_name: str,
+        client_id: str,
+        client_secret: str,
+        access_token_url: str,
+        refresh_token_url: str,
+        token_endpoint_auth_method: str | None,
+    ) -> AsyncOAuth2Client:
+        """Get the client for the app's OAuth2 client, creating it on first use."""
+        # the secret is part of the key, so that a rotated secret gets a new client
+        key = (
+            app_name,
+            client_id,
+            client_secret,
+            access_token_url,
+            refresh_token_url,
+            token_endpoint_auth_method or "",
+        )
+        client = self._clients.get(key)
+        # no lock needed, the event loop is single-threaded and there is no await in between
+        if client is None or client.is_closed:
+            # NOTE: don't pass in scope here, otherwise it will be sent during refresh token request which is not needed
+            client = AsyncOAuth2Client(
+                client_id=client_id,
+                client_secret=client_secret,
+                token_endpoint_auth_method=token_endpoint_auth_method,
+                code_challenge_method="S256",  # only S256 is supported
+                update_token=None,
+                limits=self._limits,
+                timeout=self._timeout,
+                cookies=create_cookieless_jar(),
+            )
+            logger.info(
+                "created oauth2 client", extra={"app_name": app_name, "client_id": client_id}
+            )
+        # set on every use, so that only the clients unused for the ttl expire
+        self._clients.set(key, client)
+        return client
+
+    async def aclose(self) -> None:
+        """Close all clients, e.g., at server shutdown. Clients are re-created on next use."""
+        clients = self._clients.pop_all()
+        await asyncio.gather(*(client.aclose() for client in clients), return_exceptions=True)
+
+
+# token endpoints get the same connection limits and timeouts as the upstreams of REST functions
+oauth2_client_pool = OAuth2ClientPool(
+    limits=httpx.Limits(
+        max_connections=config.HTTP_CLIENT_MAX_CONNECTIONS_PER_HOST,
+        max_keepalive_connections=config.HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS_PER_HOST,
+        keepalive_expiry=config.HTTP_CLIENT_KEEPALIVE_EXPIRY,
+    ),
+    timeout=httpx.Timeout(
+        config.HTTP_CLIENT_TIMEOUT,
+        read=config.HTTP_CLIENT_READ_TIMEOUT,
+        pool=config.HTTP_CLIENT_POOL_TIMEOUT,
+    ),
+    maxsize=config.OAUTH2_CLIENT_POOL_MAX_SIZE,
+    ttl=config.OAUTH2_CLIENT_POOL_TTL_SECONDS,
+)
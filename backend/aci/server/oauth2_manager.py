@@ -3,11 +3,10 @@ import string
 import time
 from typing import Any, cast
 
-from authlib.integrations.httpx_client import AsyncOAuth2Client
-
 from aci.common.exceptions import OAuth2Error
 from aci.common.logging_setup import get_logger
 from aci.common.schemas.security_scheme import OAuth2SchemeCredentials
+from aci.server.oauth2_client_pool import oauth2_client_pool
 
 UNICODE_ASCII_CHARACTER_SET = string.ascii_letters + string.digits
 logger = get_logger(__name__)
@@ -49,16 +48,14 @@ class OAuth2Manager:
         self.refresh_token_url = refresh_token_url
         self.token_endpoint_auth_method = token_endpoint_auth_method
 
-        # TODO: need to close the client after use
-        # Add an aclose() helper (or implement __aenter__/__aexit__) and make callers invoke it during shutdown.
-        # NOTE: don't pass in scope here, otherwise it will be sent during refresh token request which is not needed
-        self.oauth2_client = AsyncOAuth2Client(
+        # pooled, shared by the managers of the same app's OAuth2 client
+        self.oauth2_client = oauth2_client_pool.get_client(
+            app_name=app_name,
             client_id=client_id,
             client_secret=client_secret,
+            access_token_url=access_token_url,
+            refresh_token_url=refresh_token_url,
             token_endpoint_auth_method=token_endpoint_auth_method,
-            code_challenge_method="S256",  # only S256 is supported
-            # TODO: use update_token callback to save tokens to the database
-            update_token=None,
         )
 
     # TODO: some app may not support "code_verifier"?
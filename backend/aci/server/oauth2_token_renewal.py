@@ -0,0 +1,127 @@
+"""
+Background renewal of the OAuth2 access tokens of linked accounts, shortly before they expire.
+
+Periodically, the tokens of the recently used linked accounts that expire within the renewal window
+are refreshed (single-flight, see security_credentials_manager.refresh_oauth2_credentials), so that
+function executions almost never have to wait on a refresh. Idle linked accounts are left alone and
+are refreshed on demand when they are used again.
+
+A linked account whose renewal fails (e.g., revoked refresh token, missing app configuration) is
+excluded from the renewals for an exponentially growing backoff, so that it can't be picked first
+(its token expires the soonest) by every renewal and starve the other linked accounts.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from uuid import UUID
+
+from aci.common import utils
+from aci.common.db import crud
+from aci.common.logging_setup import get_logger
+from aci.server import config
+from aci.server import security_credentials_manager as scm
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class _RenewalFailures:
+    count: int
+    # monotonic time before which the linked account is not renewed again
+    retry_at: float
+
+
+class OAuth2TokenRenewer:
+    def __init__(
+        self,
+        interval: float,
+        renewal_window: float,
+        max_idle: float,
+        batch_size: int,
+        max_backoff: float,
+    ) -> None:
+        self.interval = interval
+        self.renewal_window = renewal_window
+        self.max_idle = max_idle
+        self.batch_size = batch_size
+        self.max_backoff = max_backoff
+        # linked account id -> consecutive renewal failures, until a renewal succeeds
+        self._failures: dict[UUID, _RenewalFailures] = {}
+
+    async def renew_expiring_tokens(self) -> int:
+        """Refresh the tokens expiring within the renewal window, return the number refreshed."""
+        now = time.monotonic()
+        # forget the failures of linked accounts no longer selected (e.g., idle or deleted ones)
+        self._failures = {
+            linked_account_id: failures
+            for linked_account_id, failures in self._failures.items()
+            if failures.retry_at > now - self.max_backoff
+        }
+        backed_off_ids = [
+            linked_account_id
+            for linked_account_id, failures in self._failures.items()
+            if failures.retry_at > now
+        ]
+        async with utils.create_async_db_session(config.DB_FULL_URL) as db_session:
+            # the refreshes use their own sessions, so don't hold a connection meanwhile
+            rows = await crud.linked_accounts.get_oauth2_linked_accounts_expiring_before_async(
+                db_session,
+                expires_before=int(time.time() + self.renewal_window),
+                used_after=datetime.now(UTC) - timedelta(seconds=self.max_idle),
+                limit=self.batch_size,
+                excluded_ids=backed_off_ids,
+            )
+
+        renewed = 0
+        for linked_account, app_configuration in rows:
+            try:
+                oauth2_scheme = scm.get_app_configuration_oauth2_scheme(
+                    linked_account.app, app_configuration
+                )
+                await scm.refresh_oauth2_credentials(
+                    linked_account.app.name, oauth2_scheme, linked_account.id, self.renewal_window
+                )
+            except Exception:
+                # e.g., revoked refresh token, retried after the backoff until the token expires
+                failures = self._record_failure(linked_account.id)
+                logger.exception(
+                    "failed to renew access token",
+                    extra={
+                        "linked_account_id": linked_account.id,
+                        "app_name": linked_account.app.name,
+                        "consecutive_failures": failures.count,
+                    },
+                )
+                continue
+            self._failures.pop(linked_account.id, None)
+            renewed += 1
+        return renewed
+
+    def _record_failure(self, linked_account_id: UUID) -> _RenewalFailures:
+        failures = self._failures.get(linked_account_id, _RenewalFailures(count=0, retry_at=0))
+        failures.count += 1
+        backoff = min(self.interval * 2 ** (failures.count - 1), self.max_backoff)
+        failures.retry_at = time.monotonic() + backoff
+        self._failures[linked_account_id] = failures
+        return failures
+
+    async def run_periodic_renewal(self) -> None:
+        while True:
+            try:
+                renewed = await self.renew_expiring_tokens()
+                if renewed:
+                    logger.info("renewed access tokens", extra={"number_of_tokens": renewed})
+            except Exception:
+                logger.exception("failed to renew access tokens, will retry at next renewal")
+            await asyncio.sleep(self.interval)
+
+
+oauth2_token_renewer = OAuth2TokenRenewer(
+    interval=config.OAUTH2_TOKEN_RENEWAL_INTERVAL_SECONDS,
+    renewal_window=config.OAUTH2_TOKEN_RENEWAL_WINDOW_SECONDS,
+    max_idle=config.OAUTH2_TOKEN_RENEWAL_MAX_IDLE_SECONDS,
+    batch_size=config.OAUTH2_TOKEN_RENEWAL_BATCH_SIZE,
+    max_backoff=config.OAUTH2_TOKEN_RENEWAL_MAX_BACKOFF_SECONDS,
+)
@@ -0,0 +1,167 @@
+"""
+Write-behind accounting of the projects' daily quota.
+
+Usage is counted and enforced against PROJECT_DAILY_QUOTA in process memory, and the aggregated
+increments are periodically flushed to the db in a single batched UPDATE, instead of updating (and
+committing) the project's row on every request. After each flush, the counters of the flushed
+projects are re-read from the db to pick up the usage counted by other processes.
+
+The enforcement is approximate: with multiple server processes, a project can exceed its daily
+quota by at most the usage the other processes counted since their last flush.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from aci.common import utils
+from aci.common.db import crud
+from aci.common.exceptions import DailyQuotaExceeded, ProjectNotFound
+from aci.common.logging_setup import get_logger
+from aci.server import config
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class _ProjectQuotaUsage:
+    # as of the last read from the db
+    daily_quota_used: int
+    daily_quota_reset_at: datetime
+    # usage being written to the db by an ongoing flush
+    flushing: int = 0
+    # usage counted since the last flush
+    pending: int = 0
+
+    @property
+    def total_daily_quota_used(self) -> int:
+        return self.daily_quota_used + self.flushing + self.pending
+
+
+class ProjectQuotaCounter:
+    def __init__(self, daily_quota: int, flush_interval: float):
+        self.daily_quota = daily_quota
+        self.flush_interval = flush_interval
+        self._usages: dict[UUID, _ProjectQuotaUsage] = {}
+
+    async def consume(self, db_session: AsyncSession, project_id: UUID, units: int = 1) -> None:
+        """
+        Count units of usage (one per function call) for the project.
+        The project's counters are only read from the db the first time the project is seen (or
+        after it has been idle for a flush interval).
+
+        Raises:
+            DailyQuotaExceeded: If the project has used up its daily quota
+            ProjectNotFound: If the project doesn't exist
+        """
+        usage = self._usages.get(project_id)
+        if usage is None:
+            usage = await self._load(db_session, project_id)
+
+        now: datetime = datetime.now(UTC)
+        if now >= usage.daily_quota_reset_at + timedelta(days=1):
+            # the db counterpart is reset at the next flush
+            usage.daily_quota_used = 0
+            usage.daily_quota_reset_at = now
+
+        if usage.total_daily_quota_used + units > self.daily_quota:
+            logger.warning(
+                "daily quota exceeded",
+                extra={
+                    "project_id": project_id,
+                    "daily_quota_used": usage.total_daily_quota_used,
+                    "daily_quota": self.daily_quota,
+                },
+            )
+            raise DailyQuotaExceeded(
+                f"daily quota exceeded for project={project_id}, daily quota used={usage.total_daily_quota_used}, "
+                f"daily quota={self.daily_quota}"
+            )
+
+        usage.pending += units
+
+    async def flush(self) -> None:
+        """Write the usage counted since the last flush to the db, in one statement."""
+        # projects without usage since the last flush are dropped and re-read on next use,
+        # which also keeps the memory bounded by the number of recently active projects
+        self._usages = {
+            project_id: usage for project_id, usage in self._usages.items() if usage.pending
+        }
+        if not self._usages:
+            return
+
+        quota_usage_by_project_id: dict[UUID, int] = {}
+        for project_id, usage in self._usages.items():
+            usage.flushing, usage.pending = usage.pending, 0
+            quota_usage_by_project_id[project_id] = usage.flushing
+
+        try:
+            async with utils.create_async_db_session(config.DB_FULL_URL) as db_session:
+                await crud.projects.increase_projects_quota_usage_async(
+                    db_session, quota_usage_by_project_id
+                )
+                await db_session.commit()
+        except BaseException as e:
+            # put the usage back to be written by the next flush, also when cancelled at shutdown
+            for project_id in quota_usage_by_project_id:
+                usage = self._usages[project_id]
+                usage.pending, usage.flushing = usage.pending + usage.flushing, 0
+            if not isinstance(e, Exception):
+                raise
+            logger.exception(
+                "failed to flush project quota usage, will retry at next flush",
+                extra={"number_of_projects": len(quota_usage_by_project_id)},
+            )
+            return
+
+        for project_id in quota_usage_by_project_id:
+            usage = self._usages[project_id]
+            usage.daily_quota_used, usage.flushing = usage.daily_quota_used + usage.flushing, 0
+        logger.info(
+            "flushed project quota usage",
+            extra={"number_of_projects": len(quota_usage_by_project_id)},
+        )
+
+        # pick up the usage counted by other processes
+        try:
+            async with utils.create_async_db_session(config.DB_FULL_URL) as db_session:
+                projects = await crud.projects.get_projects_async(
+                    db_session, list(quota_usage_by_project_id)
+                )
+        except Exception:
+            logger.exception("failed to read project quota usage after flush")
+            return
+
+        for project in projects:
+            usage = self._usages[project.id]
+            usage.daily_quota_used = project.daily_quota_used
+            usage.daily_quota_reset_at = project.daily_quota_reset_at.replace(tzinfo=UTC)
+
+    async def run_periodic_flush(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def _load(self, db_session: AsyncSession, project_id: UUID) -> _ProjectQuotaUsage:
+        project = await crud.projects.get_project_async(db_session, project_id)
+        if not project:
+            logger.error("project not found", extra={"project_id": project_id})
+            raise ProjectNotFound(f"project={project_id} not found")
+
+        # another request might have loaded the project while we were waiting for the db
+        return self._usages.setdefault(
+            project_id,
+            _ProjectQuotaUsage(
+                daily_quota_used=project.daily_quota_used,
+                daily_quota_reset_at=project.daily_quota_reset_at.replace(tzinfo=UTC),
+            ),
+        )
+
+
+project_quota_counter = ProjectQuotaCounter(
+    daily_quota=config.PROJECT_DAILY_QUOTA,
+    flush_interval=config.PROJECT_QUOTA_FLUSH_INTERVAL_SECONDS,
+)
@@ -0,0 +1,98 @@
+"""
+Rate limiting shared by the RateLimitMiddleware (per ip) and the api key dependencies (per api key
+and per project).
+
+The storage is selected by SERVER_RATE_LIMIT_STORAGE_URI:
+- "async+memory://": in-process storage bounded to SERVER_RATE_LIMIT_MEMORY_STORAGE_MAX_KEYS keys,
+  limits are enforced per server process.
+- any other async storage uri supported by the "limits" package with moving window support, e.g.,
+  "async+redis://redis:6379" for a storage shared by all server processes.
+"""
+
+from collections import OrderedDict
+from typing import override
+
+from limits import RateLimitItem, RateLimitItemPerDay, RateLimitItemPerSecond
+from limits.aio.storage import MemoryStorage, Storage
+from limits.aio.strategies import MovingWindowRateLimiter
+from limits.storage import storage_from_string
+
+from aci.common.logging_setup import get_logger
+from aci.server import config
+
+logger = get_logger(__name__)
+
+
+class BoundedMemoryStorage(MemoryStorage):
+    """
+    In-process storage that keeps at most max_keys rate limit keys, evicting the least recently
+    hit key when full. An evicted key starts over with no hits, so eviction can only make the
+    limits more lenient, never stricter.
+    """
+
+    def __init__(self, max_keys: int) -> None:
+        super().__init__()
+        self.max_keys = max_keys
+        self._keys: OrderedDict[str, None] = OrderedDict()
+
+    @override
+    async def incr(
+        self, key: str, expiry: int, elastic_expiry: bool = False, amount: int = 1
+    ) -> int:
+        await self._touch(key)
+        return await super().incr(key, expiry, elastic_expiry, amount)
+
+    @override
+    async def acquire_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        await self._touch(key)
+        return await super().acquire_entry(key, limit, expiry, amount)
+
+    @override
+    async def clear(self, key: str) -> None:
+        self._keys.pop(key, None)
+        await super().clear(key)
+
+    @override
+    async def reset(self) -> int | None:
+        self._keys.clear()
+        return await super().reset()
+
+    async def _touch(self, key: str) -> None:
+        self._keys[key] = None
+        self._keys.move_to_end(key)
+        while len(self._keys) > self.max_keys:
+            evicted_key, _ = self._keys.popitem(last=False)
+            await super().clear(evicted_key)
+
+
+def create_storage(storage_uri: str, memory_storage_max_keys: int) -> Storage:
+    if storage_uri.startswith("async+memory://"):
+        return BoundedMemoryStorage(max_keys=memory_storage_max_keys)
+
+    storage = storage_from_string(storage_uri)
+    if not isinstance(storage, Storage):
+        raise ValueError(f"rate limit storage must be async, got {storage_uri=}")
+    return storage
+
+
+storage = create_storage(config.RATE_LIMIT_STORAGE_URI, config.RATE_LIMIT_MEMORY_STORAGE_MAX_KEYS)
+limiter = MovingWindowRateLimiter(storage)
+
+ip_rate_limits: dict[str, RateLimitItem] = {
+    "ip-per-second": RateLimitItemPerSecond(amount=config.RATE_LIMIT_IP_PER_SECOND),
+    "ip-per-day": RateLimitItemPerDay(amount=config.RATE_LIMIT_IP_PER_DAY),
+}
+api_key_rate_limits: dict[str, RateLimitItem] = {
+    "api-key-per-second": RateLimitItemPerSecond(amount=config.RATE_LIMIT_API_KEY_PER_SECOND),
+}
+project_rate_limits: dict[str, RateLimitItem] = {
+    "project-per-second": RateLimitItemPerSecond(amount=config.RATE_LIMIT_PROJECT_PER_SECOND),
+}
+
+
+async def hit(rate_limits: dict[str, RateLimitItem], key: str) -> str | None:
+    """Hit all rate limits for key, return the name of the first exceeded rate limit if any."""
+    for rate_limit_name, rate_limit in rate_limits.items():
+        if not await limiter.hit(rate_limit, key):
+            return rate_limit_name
+    return None
@@ -18,7 +18,7 @@ from aci.common.schemas.app_configurations import (
     AppConfigurationsList,
     AppConfigurationUpdate,
 )
-from aci.server import config
+from aci.server import auth_cache, config
 from aci.server import dependencies as deps
 
 router = APIRouter()
@@ -174,6 +174,7 @@ async def delete_app_configuration(
     )
 
     context.db_session.commit()
+    auth_cache.invalidate_project(context.project.id)
 
 
 @router.patch(
@@ -1,10 +1,8 @@
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, Query
-from openai import OpenAI
 
 from aci.common.db import crud
-from aci.common.embeddings import generate_embedding
 from aci.common.enums import Visibility
 from aci.common.exceptions import AppNotFound
 from aci.common.logging_setup import get_logger
@@ -16,13 +14,11 @@ from aci.common.schemas.app import (
 )
 from aci.common.schemas.function import BasicFunctionDefinition, FunctionDetails
 from aci.common.schemas.security_scheme import SecuritySchemesPublic
-from aci.server import config
 from aci.server import dependencies as deps
+from aci.server import intent_embeddings, search_index
 
 logger = get_logger(__name__)
 router = APIRouter()
-# TODO: will this be a bottleneck and problem if high concurrent requests from users?
-openai_client = OpenAI(api_key=config.OPENAI_API_KEY)
 
 
 @router.get("", response_model_exclude_none=True)
@@ -92,12 +88,7 @@ async def search_apps(
         },
     )
     intent_embedding = (
-        generate_embedding(
-            openai_client,
-            config.OPENAI_EMBEDDING_MODEL,
-            config.OPENAI_EMBEDDING_DIMENSION,
-            query_params.intent,
-        )
+        await intent_embeddings.get_intent_embedding(query_params.intent)
         if query_params.intent
         else None
     )
@@ -109,28 +100,57 @@ async def search_apps(
     # None means no filtering
     apps_to_filter = context.agent.allowed_apps if query_params.allowed_apps_only else None
 
-    apps_with_scores = crud.apps.search_apps(
-        context.db_session,
-        context.project.visibility_access == Visibility.PUBLIC,
-        True,
-        apps_to_filter,
-        query_params.categories,
-        intent_embedding,
-        query_params.limit,
-        query_params.offset,
-    )
-
     apps: list[AppBasic] = []
-
-    for app, _ in apps_with_scores:
-        if query_params.include_functions:
-            functions = [
-                BasicFunctionDefinition(name=function.name, description=function.description)
-                for function in app.functions
-            ]
-            apps.append(AppBasic(name=app.name, description=app.description, functions=functions))
-        else:
-            apps.append(AppBasic(name=app.name, description=app.description))
+    catalog_index = search_index.get_ready_catalog_index()
+    if catalog_index is not None:
+        indexed_apps_with_scores = catalog_index.search_apps(
+            context.project.visibility_access == Visibility.PUBLIC,
+            True,
+            apps_to_filter,
+            query_params.categories,
+            intent_embedding,
+            query_params.limit,
+            query_params.offset,
+        )
+        for indexed_app, _ in indexed_apps_with_scores:
+            functions = (
+                [
+                    BasicFunctionDefinition(name=function.name, description=function.description)
+                    for function in catalog_index.get_app_functions(indexed_app.id)
+                ]
+                if query_params.include_functions
+                else None
+            )
+            apps.append(
+                AppBasic(
+                    name=indexed_app.name,
+                    description=indexed_app.description,
+                    functions=functions,
+                )
+            )
+    else:
+        apps_with_scores = crud.apps.search_apps(
+            context.db_session,
+            context.project.visibility_access == Visibility.PUBLIC,
+            True,
+            apps_to_filter,
+            query_params.categories,
+            intent_embedding,
+            query_params.limit,
+            query_params.offset,
+            intent_embeddings.vector_search_options,
+        )
+        for app, _ in apps_with_scores:
+            if query_params.include_functions:
+                functions = [
+                    BasicFunctionDefinition(name=function.name, description=function.description)
+                    for function in app.functions
+                ]
+                apps.append(
+                    AppBasic(name=app.name, description=app.description, functions=functions)
+                )
+            else:
+                apps.append(AppBasic(name=app.name, description=app.description))
 
     logger.info("search apps response", extra={"app_names": [app.name for app in apps]})
 
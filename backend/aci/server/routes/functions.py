@@ -1,23 +1,30 @@
+import asyncio
+import contextlib
+from collections.abc import Callable, Coroutine
+from dataclasses import dataclass
 from datetime import UTC, datetime
-from typing import Annotated
+from typing import Annotated, Any
+from uuid import UUID
 
 from fastapi import APIRouter, Depends, Query
-from openai import OpenAI
+from openai import AsyncOpenAI
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from aci.common import processor
+from aci.common import hybrid_search
+from aci.common.catalog_index import IndexedFunction
 from aci.common.db import crud
-from aci.common.db.sql_models import Agent, Function, Project
-from aci.common.embeddings import generate_embedding
+from aci.common.db.sql_models import Agent, Function, LinkedAccount, Project
 from aci.common.enums import FunctionDefinitionFormat, Visibility
 from aci.common.exceptions import (
+    ACIException,
     AppConfigurationDisabled,
     AppConfigurationNotFound,
     AppNotAllowedForThisAgent,
     FunctionNotFound,
-    InvalidFunctionDefinitionFormat,
     LinkedAccountDisabled,
     LinkedAccountNotFound,
+    UnexpectedError,
 )
 from aci.common.logging_setup import get_logger
 from aci.common.schemas.function import (
@@ -25,24 +32,34 @@ from aci.common.schemas.function import (
     BasicFunctionDefinition,
     FunctionDetails,
     FunctionExecute,
+    FunctionExecuteBatch,
+    FunctionExecuteBatchItem,
     FunctionExecutionResult,
     FunctionsList,
     FunctionsSearch,
-    OpenAIFunction,
     OpenAIFunctionDefinition,
     OpenAIResponsesFunctionDefinition,
 )
-from aci.server import config, custom_instructions
+from aci.server import (
+    config,
+    custom_instruction_rules,
+    custom_instructions,
+    intent_embeddings,
+    search_index,
+)
 from aci.server import dependencies as deps
 from aci.server import security_credentials_manager as scm
+from aci.server.execution_context import load_execution_context
+from aci.server.function_definitions import format_function_definition
 from aci.server.function_executors import get_executor
+from aci.server.project_quota import project_quota_counter
 from aci.server.security_credentials_manager import SecurityCredentialsResponse
 
 router = APIRouter()
 logger = get_logger(__name__)
 # TODO: will this be a bottleneck and problem if high concurrent requests from users?
 # TODO: should probably be a singleton and inject into routes, shared access with Apps route
-openai_client = OpenAI(api_key=config.OPENAI_API_KEY)
+openai_client = AsyncOpenAI(api_key=config.OPENAI_API_KEY)
 
 
 @router.get("", response_model=list[FunctionDetails])
@@ -84,21 +101,6 @@ async def search_functions(
         "search functions",
         extra={"function_search": query_params.model_dump(exclude_none=True)},
     )
-    intent_embedding = (
-        generate_embedding(
-            openai_client,
-            config.OPENAI_EMBEDDING_MODEL,
-            config.OPENAI_EMBEDDING_DIMENSION,
-            query_params.intent,
-        )
-        if query_params.intent
-        else None
-    )
-    logger.debug(
-        "generated intent embedding",
-        extra={"intent": query_params.intent, "intent_embedding": intent_embedding},
-    )
-
     # get the apps to filter (or not) based on the allowed_apps_only and app_names query params
     if query_params.allowed_apps_only:
         if query_params.app_names is None:
@@ -111,15 +113,45 @@ async def search_functions(
         else:
             apps_to_filter = query_params.app_names
 
-    functions = crud.functions.search_functions(
-        context.db_session,
-        context.project.visibility_access == Visibility.PUBLIC,
-        True,
-        apps_to_filter,
-        intent_embedding,
-        query_params.limit,
-        query_params.offset,
-    )
+    functions: list[Function] | list[IndexedFunction] | None = None
+    # fast path for short intents and names, which doesn't need an embedding of the intent
+    if query_params.intent and hybrid_search.is_lexical_intent(
+        query_params.intent, config.FUNCTION_SEARCH_LEXICAL_MAX_WORDS
+    ):
+        functions = _search_functions(
+            context,
+            apps_to_filter,
+            query_params.intent,
+            None,
+            query_params.limit,
+            query_params.offset,
+        )
+        # fall back to the hybrid search if nothing matches the intent lexically
+        if not functions and (
+            query_params.offset == 0
+            or not _search_functions(context, apps_to_filter, query_params.intent, None, 1, 0)
+        ):
+            functions = None
+
+    if functions is None:
+        intent_embedding = (
+            await intent_embeddings.get_intent_embedding(query_params.intent)
+            if query_params.intent
+            else None
+        )
+        logger.debug(
+            "generated intent embedding",
+            extra={"intent": query_params.intent, "intent_embedding": intent_embedding},
+        )
+        functions = _search_functions(
+            context,
+            apps_to_filter,
+            query_params.intent,
+            intent_embedding,
+            query_params.limit,
+            query_params.offset,
+        )
+
     logger.info(
         "search functions result",
         extra={"function_names": [function.name for function in functions]},
@@ -131,6 +163,40 @@ async def search_functions(
     return function_definitions
 
 
+def _search_functions(
+    context: deps.RequestContext,
+    app_names: list[str] | None,
+    lexical_query: str | None,
+    intent_embedding: list[float] | None,
+    limit: int,
+    offset: int,
+) -> list[Function] | list[IndexedFunction]:
+    """Search in the catalog index if it's loaded, otherwise in the db."""
+    catalog_index = search_index.get_ready_catalog_index()
+    if catalog_index is not None:
+        return catalog_index.search_functions(
+            context.project.visibility_access == Visibility.PUBLIC,
+            True,
+            app_names,
+            intent_embedding,
+            limit,
+            offset,
+            lexical_query,
+        )
+
+    return crud.functions.search_functions(
+        context.db_session,
+        context.project.visibility_access == Visibility.PUBLIC,
+        True,
+        app_names,
+        intent_embedding,
+        limit,
+        offset,
+        intent_embeddings.vector_search_options,
+        lexical_query,
+    )
+
+
 # TODO: have "structured_outputs" flag ("structured_outputs_if_possible") to support openai's structured outputs function calling?
 # which need "strict: true" and only support a subset of json schema and a bunch of other restrictions like "All fields must be required"
 # If you turn on Structured Outputs by supplying strict: true and call the API with an unsupported JSON Schema, you will receive an error.
@@ -141,7 +207,7 @@ async def search_functions(
     response_model_exclude_none=True,  # having this to exclude "strict" field in openai's function definition if not set
 )
 async def get_function_definition(
-    context: Annotated[deps.RequestContext, Depends(deps.get_request_context)],
+    context: Annotated[deps.AsyncRequestContext, Depends(deps.get_async_request_context)],
     function_name: str,
     format: FunctionDefinitionFormat = Query(  # noqa: B008 # TODO: need to fix this later
         default=FunctionDefinitionFormat.OPENAI,
@@ -165,7 +231,7 @@ async def get_function_definition(
             "format": format,
         },
     )
-    function: Function | None = crud.functions.get_function(
+    function: Function | None = await crud.functions.get_function_async(
         context.db_session,
         function_name,
         context.project.visibility_access == Visibility.PUBLIC,
@@ -199,7 +265,7 @@ async def get_function_definition(
     response_model_exclude_none=True,
 )
 async def execute(
-    context: Annotated[deps.RequestContext, Depends(deps.get_request_context)],
+    context: Annotated[deps.AsyncRequestContext, Depends(deps.get_async_request_context)],
     function_name: str,
     body: FunctionExecute,
 ) -> FunctionExecutionResult:
@@ -225,68 +291,62 @@ async def execute(
     return result
 
 
-# TODO: move to agent/tools.py or a util function
-def format_function_definition(
-    function: Function, format: FunctionDefinitionFormat
-) -> (
-    BasicFunctionDefinition
-    | OpenAIFunctionDefinition
-    | OpenAIResponsesFunctionDefinition
-    | AnthropicFunctionDefinition
-):
-    match format:
-        case FunctionDefinitionFormat.BASIC:
-            return BasicFunctionDefinition(
-                name=function.name,
-                description=function.description,
-            )
-        case FunctionDefinitionFormat.OPENAI:
-            return OpenAIFunctionDefinition(
-                function=OpenAIFunction(
-                    name=function.name,
-                    description=function.description,
-                    parameters=processor.filter_visible_properties(function.parameters),
-                )
-            )
-        case FunctionDefinitionFormat.OPENAI_RESPONSES:
-            # Create a properly formatted OpenAIResponsesFunctionDefinition
-            # This format is used by the OpenAI chat completions API
-            return OpenAIResponsesFunctionDefinition(
-                type="function",
-                name=function.name,
-                description=function.description,
-                parameters=processor.filter_visible_properties(function.parameters),
-            )
-        case FunctionDefinitionFormat.ANTHROPIC:
-            return AnthropicFunctionDefinition(
-                name=function.name,
-                description=function.description,
-                input_schema=processor.filter_visible_properties(function.parameters),
-            )
-        case _:
-            raise InvalidFunctionDefinitionFormat(f"Invalid format: {format}")
+@router.post(
+    "/execute-batch",
+    response_model=list[FunctionExecutionResult],
+    response_model_exclude_none=True,
+)
+async def execute_batch(
+    context: Annotated[deps.AsyncRequestContext, Depends(deps.get_async_request_context)],
+    body: FunctionExecuteBatch,
+) -> list[FunctionExecutionResult]:
+    """
+    Execute multiple functions in one request, e.g., the independent tool calls of an agent turn.
+    The results are in the order of the items, an item's error is returned as its result.
+    """
+    logger.info(
+        "execute function batch",
+        extra={"function_execute_batch": body.model_dump(exclude_none=True)},
+    )
+
+    return await execute_functions(
+        db_session=context.db_session,
+        project=context.project,
+        agent=context.agent,
+        items=body.items,
+        openai_client=openai_client,
+    )
+
+
+@dataclass
+class PreparedFunctionExecution:
+    function: Function
+    linked_account: LinkedAccount
+    security_credentials_response: SecurityCredentialsResponse
+    # whether the custom instruction check already ran (concurrently with the credentials)
+    custom_instruction_checked: bool = False
 
 
 async def execute_function(
-    db_session: Session,
+    db_session: AsyncSession,
     project: Project,
     agent: Agent,
     function_name: str,
     function_input: dict,
     linked_account_owner_id: str,
-    openai_client: OpenAI,
+    openai_client: AsyncOpenAI,
 ) -> FunctionExecutionResult:
     """
     Execute a function with the given parameters.
 
     Args:
-        db_session: Database session
+        db_session: Async database session
         project: Project object
         agent: Agent object
         function_name: Name of the function to execute
         function_input: Input parameters for the function
         linked_account_owner_id: ID of the linked account owner
-        openai_client: Optional OpenAI client for custom instructions validation
+        openai_client: Async OpenAI client for custom instructions validation
 
     Returns:
         FunctionExecutionResult: Result of the function execution
@@ -298,15 +358,138 @@ async def execute_function(
         AppNotAllowedForThisAgent: If the app is not allowed for the agent
         LinkedAccountNotFound: If the linked account is not found
         LinkedAccountDisabled: If the linked account is disabled
+        CustomInstructionViolation: If the function input violates the agent's custom instruction
     """
-    # Get the function
-    function = crud.functions.get_function(
+    check_custom_instruction: Callable[[Function], Coroutine[Any, Any, None]] | None = None
+    if config.CUSTOM_INSTRUCTION_CHECK_CONCURRENTLY:
+
+        async def check_custom_instruction(function: Function) -> None:
+            await _check_custom_instructions(openai_client, agent, function, function_input)
+
+    prepared_execution = await _prepare_function_execution(
         db_session,
+        project,
+        agent,
         function_name,
-        project.visibility_access == Visibility.PUBLIC,
-        True,
+        linked_account_owner_id,
+        check_custom_instruction,
     )
-    if not function:
+    execution_result = await _run_function_execution(
+        prepared_execution, function_input, agent, openai_client
+    )
+    await _update_linked_accounts_last_used_at(db_session, [prepared_execution.linked_account])
+
+    return execution_result
+
+
+async def execute_functions(
+    db_session: AsyncSession,
+    project: Project,
+    agent: Agent,
+    items: list[FunctionExecuteBatchItem],
+    openai_client: AsyncOpenAI,
+) -> list[FunctionExecutionResult]:
+    """
+    Execute a batch of functions, the results are in the order of the items.
+
+    The functions, app configurations, linked accounts and security credentials are resolved once
+    per distinct (function name, linked account owner id), concurrently with the executions: at most
+    FUNCTION_EXECUTE_BATCH_MAX_CONCURRENCY preparations and executions run at a time, and the
+    queries on the shared db session are serialized. Any error of an item is returned as its
+    (unsuccessful) result, without failing the other items.
+
+    Raises:
+        DailyQuotaExceeded: If the batch exceeds the project's daily quota
+    """
+    # the first item is counted by the quota validation of the request
+    if len(items) > 1:
+        await project_quota_counter.consume(db_session, project.id, units=len(items) - 1)
+
+    semaphore = asyncio.Semaphore(config.FUNCTION_EXECUTE_BATCH_MAX_CONCURRENCY)
+    db_session_lock = asyncio.Lock()
+    used_linked_accounts: dict[UUID, LinkedAccount] = {}
+
+    async def prepare(
+        function_name: str, linked_account_owner_id: str
+    ) -> PreparedFunctionExecution:
+        async with semaphore:
+            return await _prepare_function_execution(
+                db_session,
+                project,
+                agent,
+                function_name,
+                linked_account_owner_id,
+                db_session_lock=db_session_lock,
+            )
+
+    prepare_tasks: dict[tuple[str, str], asyncio.Task[PreparedFunctionExecution]] = {}
+    for item in items:
+        key = (item.function_name, item.linked_account_owner_id)
+        if key not in prepare_tasks:
+            prepare_tasks[key] = asyncio.create_task(prepare(*key))
+
+    async def run(item: FunctionExecuteBatchItem) -> FunctionExecutionResult:
+        try:
+            prepared_execution = await prepare_tasks[
+                (item.function_name, item.linked_account_owner_id)
+            ]
+            async with semaphore:
+                execution_result = await _run_function_execution(
+                    prepared_execution, item.function_input, agent, openai_client
+                )
+        except ACIException as e:
+            return _error_result(e)
+        except Exception:
+            logger.exception(
+                "failed to execute function of batch",
+                extra={
+                    "function_name": item.function_name,
+                    "linked_account_owner_id": item.linked_account_owner_id,
+                },
+            )
+            return _error_result(UnexpectedError())
+        linked_account = prepared_execution.linked_account
+        used_linked_accounts[linked_account.id] = linked_account
+        return execution_result
+
+    try:
+        execution_results = await asyncio.gather(*(run(item) for item in items))
+    finally:
+        # e.g., when the request is cancelled
+        for prepare_task in prepare_tasks.values():
+            prepare_task.cancel()
+    await _update_linked_accounts_last_used_at(db_session, list(used_linked_accounts.values()))
+
+    return list(execution_results)
+
+
+async def _prepare_function_execution(
+    db_session: AsyncSession,
+    project: Project,
+    agent: Agent,
+    function_name: str,
+    linked_account_owner_id: str,
+    check_custom_instruction: Callable[[Function], Coroutine[Any, Any, None]] | None = None,
+    db_session_lock: asyncio.Lock | None = None,
+) -> PreparedFunctionExecution:
+    """
+    Check that the function can be executed by the agent with the linked account and get the
+    security credentials (refreshed and saved if needed). See execute_function for the errors.
+    If check_custom_instruction is given, it runs concurrently with getting the credentials,
+    which can take a while when the access token needs to be refreshed. If either fails, the other
+    is cancelled. If db_session_lock is given, it's held while querying db_session, so that
+    concurrent preparations can share the session.
+    """
+    # Get the function, app configuration and linked account in one round trip
+    async with db_session_lock or contextlib.nullcontext():
+        execution_context = await load_execution_context(
+            db_session,
+            project.id,
+            function_name,
+            project.visibility_access == Visibility.PUBLIC,
+            linked_account_owner_id,
+        )
+    if not execution_context:
         logger.error(
             "failed to execute function, function not found",
             extra={
@@ -315,11 +498,10 @@ async def execute_function(
             },
         )
         raise FunctionNotFound(f"function={function_name} not found")
+    function = execution_context.function
 
     # Check if the App (that this function belongs to) is configured
-    app_configuration = crud.app_configurations.get_app_configuration(
-        db_session, project.id, function.app.name
-    )
+    app_configuration = execution_context.app_configuration
     if not app_configuration:
         logger.error(
             "failed to execute function, app configuration not found",
@@ -360,12 +542,7 @@ async def execute_function(
         )
 
     # Check if the linked account status (configured, enabled, etc.)
-    linked_account = crud.linked_accounts.get_linked_account(
-        db_session,
-        project.id,
-        function.app.name,
-        linked_account_owner_id,
-    )
+    linked_account = execution_context.linked_account
     if not linked_account:
         logger.error(
             "failed to execute function, linked account not found",
@@ -395,9 +572,24 @@ async def execute_function(
             f"please enable the account for this app here: {config.DEV_PORTAL_URL}/appconfigs/{function.app.name}"
         )
 
-    security_credentials_response: SecurityCredentialsResponse = await scm.get_security_credentials(
+    get_security_credentials = scm.get_security_credentials(
         app_configuration.app, app_configuration, linked_account
     )
+    security_credentials_response: SecurityCredentialsResponse
+    if check_custom_instruction is None:
+        security_credentials_response = await get_security_credentials
+    else:
+        check_task = asyncio.create_task(check_custom_instruction(function))
+        credentials_task = asyncio.create_task(get_security_credentials)
+        try:
+            await asyncio.gather(check_task, credentials_task)
+        except BaseException:
+            # e.g., on a custom instruction violation, don't keep fetching (and refreshing) the
+            # credentials of a call that already failed
+            check_task.cancel()
+            credentials_task.cancel()
+            raise
+        security_credentials_response = credentials_task.result()
 
     logger.info(
         "fetched security credentials for function execution",
@@ -411,29 +603,28 @@ async def execute_function(
         },
     )
 
-    if security_credentials_response.is_updated:
-        if security_credentials_response.is_app_default_credentials:
-            crud.apps.update_app_default_security_credentials(
-                db_session,
-                function.app,
-                linked_account.security_scheme,
-                security_credentials_response.credentials.model_dump(),
-            )
-        else:
-            crud.linked_accounts.update_linked_account_credentials(
-                db_session,
-                linked_account,
-                security_credentials=security_credentials_response.credentials,
-            )
-        db_session.commit()
-
-    custom_instructions.check_for_violation(
-        openai_client,
-        function,
-        function_input,
-        agent.custom_instructions,
+    return PreparedFunctionExecution(
+        function=function,
+        linked_account=linked_account,
+        security_credentials_response=security_credentials_response,
+        custom_instruction_checked=check_custom_instruction is not None,
     )
 
+
+async def _run_function_execution(
+    prepared_execution: PreparedFunctionExecution,
+    function_input: dict,
+    agent: Agent,
+    openai_client: AsyncOpenAI,
+) -> FunctionExecutionResult:
+    function = prepared_execution.function
+    function_name = function.name
+    linked_account = prepared_execution.linked_account
+    security_credentials_response = prepared_execution.security_credentials_response
+
+    if not prepared_execution.custom_instruction_checked:
+        await _check_custom_instructions(openai_client, agent, function, function_input)
+
     function_executor = get_executor(function.protocol, linked_account)
     logger.info(
         "instantiated function executor",
@@ -441,21 +632,13 @@ async def execute_function(
     )
 
     # Execute the function
-    execution_result = function_executor.execute(
+    execution_result = await function_executor.execute(
         function,
         function_input,
         security_credentials_response.scheme,
         security_credentials_response.credentials,
     )
 
-    last_used_at: datetime = datetime.now(UTC)
-    crud.linked_accounts.update_linked_account_last_used_at(
-        db_session,
-        last_used_at,
-        linked_account,
-    )
-    db_session.commit()
-
     if not execution_result.success:
         logger.error(
             "function execution result error",
@@ -468,6 +651,36 @@ async def execute_function(
     return execution_result
 
 
+async def _check_custom_instructions(
+    openai_client: AsyncOpenAI, agent: Agent, function: Function, function_input: dict
+) -> None:
+    # the local rules first, the LLM judge is only asked about the free-text instruction
+    custom_instruction_rules.check_for_violation(agent, function, function_input)
+    await custom_instructions.check_for_violation(
+        openai_client, agent.id, function, function_input, agent.custom_instructions
+    )
+
+
+async def _update_linked_accounts_last_used_at(
+    db_session: AsyncSession, linked_accounts: list[LinkedAccount]
+) -> None:
+    last_used_at: datetime = datetime.now(UTC)
+    for linked_account in linked_accounts:
+        await db_session.run_sync(
+            crud.linked_accounts.update_linked_account_last_used_at,
+            last_used_at,
+            linked_account,
+        )
+    await db_session.commit()
+
+
+def _error_result(e: ACIException) -> FunctionExecutionResult:
+    # same error message as the http error response of the exception
+    return FunctionExecutionResult(
+        success=False, error=f"{e.title}, {e.message}" if e.message else e.title
+    )
+
+
 async def get_functions_definitions(
     db_session: Session,
     function_names: list[str],
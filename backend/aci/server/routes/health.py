@@ -1,6 +1,10 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
+from aci.common.db.engine import DBPoolStats, get_db_pool_stats
+from aci.common.embedding_cache import EmbeddingCacheStats
 from aci.common.logging_setup import get_logger
+from aci.server import dependencies as deps
+from aci.server import intent_embeddings
 
 logger = get_logger(__name__)
 router = APIRouter()
@@ -10,3 +14,21 @@ router = APIRouter()
 @router.get("", include_in_schema=False)
 async def health() -> bool:
     return True
+
+
+@router.get(
+    "/db-pool", include_in_schema=False, dependencies=[Depends(deps.validate_metrics_token)]
+)
+async def db_pool() -> list[DBPoolStats]:
+    """Connection pool metrics of this server process, useful for sizing the pool."""
+    return get_db_pool_stats()
+
+
+@router.get(
+    "/embedding-cache",
+    include_in_schema=False,
+    dependencies=[Depends(deps.validate_metrics_token)],
+)
+async def embedding_cache() -> EmbeddingCacheStats:
+    """Hit/miss metrics of this server process's cache of search intent embeddings."""
+    return intent_embeddings.embedding_cache.stats()
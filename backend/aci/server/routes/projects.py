@@ -12,7 +12,7 @@ from aci.common.exceptions import AgentNotFound, ProjectNotFound
 from aci.common.logging_setup import get_logger
 from aci.common.schemas.agent import AgentCreate, AgentPublic, AgentUpdate
 from aci.common.schemas.project import ProjectCreate, ProjectPublic
-from aci.server import acl, quota_manager
+from aci.server import acl, auth_cache, quota_manager
 from aci.server import dependencies as deps
 
 # Create router instance
@@ -100,6 +100,7 @@ async def create_agent(
         body.description,
         body.allowed_apps,
         body.custom_instructions,
+        body.custom_instruction_rules,
     )
     db_session.commit()
     logger.info(
@@ -165,6 +166,7 @@ async def update_agent(
 
     crud.projects.update_agent(db_session, agent, body)
     db_session.commit()
+    auth_cache.invalidate_agent(agent.id)
 
     return agent
 
@@ -208,5 +210,6 @@ async def delete_agent(
 
     crud.projects.delete_agent(db_session, agent)
     db_session.commit()
+    auth_cache.invalidate_agent(agent_id)
 
     return {"message": f"Agent={agent.name} deleted successfully"}
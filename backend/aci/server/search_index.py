@@ -0,0 +1,19 @@
+"""
+The in-process catalog index used by /v1/apps/search and /v1/functions/search, if enabled.
+Until the index is loaded (or if it's disabled), the searches are done in the db.
+"""
+
+from aci.common.catalog_index import CatalogIndex
+from aci.server import config
+
+catalog_index = (
+    CatalogIndex(refresh_interval=config.CATALOG_INDEX_REFRESH_INTERVAL_SECONDS)
+    if config.CATALOG_INDEX_ENABLED
+    else None
+)
+
+
+def get_ready_catalog_index() -> CatalogIndex | None:
+    if catalog_index is not None and catalog_index.ready:
+        return catalog_index
+    return None
@@ -1,10 +1,14 @@
+import asyncio
 import time
+from uuid import UUID
 
 from pydantic import BaseModel
 
+from aci.common import utils
+from aci.common.db import crud
 from aci.common.db.sql_models import App, AppConfiguration, LinkedAccount
 from aci.common.enums import SecurityScheme
-from aci.common.exceptions import NoImplementationFound, OAuth2Error
+from aci.common.exceptions import LinkedAccountNotFound, NoImplementationFound, OAuth2Error
 from aci.common.logging_setup import get_logger
 from aci.common.schemas.security_scheme import (
     APIKeyScheme,
@@ -15,10 +19,14 @@ from aci.common.schemas.security_scheme import (
     OAuth2SchemeCredentials,
     SecuritySchemeOverrides,
 )
+from aci.server import config
 from aci.server.oauth2_manager import OAuth2Manager
 
 logger = get_logger(__name__)
 
+# ongoing access token refreshes by linked account id, see refresh_oauth2_credentials
+_oauth2_refresh_tasks: dict[UUID, asyncio.Task[OAuth2SchemeCredentials]] = {}
+
 
 # TODO: only pass necessary data to the functions
 class SecurityCredentialsResponse(BaseModel):
@@ -55,14 +63,16 @@ async def _get_oauth2_credentials(
     app: App, app_configuration: AppConfiguration, linked_account: LinkedAccount
 ) -> SecurityCredentialsResponse:
     """Get OAuth2 credentials from linked account or app's default credentials.
-    If the access token is expired, it will be refreshed.
+    If the access token is expired (or about to), it will be refreshed and saved.
     """
     is_updated = False
     oauth2_scheme = get_app_configuration_oauth2_scheme(app_configuration.app, app_configuration)
     oauth2_scheme_credentials = OAuth2SchemeCredentials.model_validate(
         linked_account.security_credentials
     )
-    if _access_token_is_expired(oauth2_scheme_credentials):
+    if _access_token_is_expired(
+        oauth2_scheme_credentials, config.OAUTH2_TOKEN_REFRESH_LEEWAY_SECONDS
+    ):
         logger.warning(
             "access token expired, trying to refresh",
             extra={
@@ -71,38 +81,11 @@ async def _get_oauth2_credentials(
                 "app": app.name,
             },
         )
-        token_response = await _refresh_oauth2_access_token(
-            app.name, oauth2_scheme, oauth2_scheme_credentials
-        )
-        # TODO: refactor parsing to _refresh_oauth2_access_token
-        expires_at: int | None = None
-        if "expires_at" in token_response:
-            expires_at = int(token_response["expires_at"])
-        elif "expires_in" in token_response:
-            expires_at = int(time.time()) + int(token_response["expires_in"])
-
-        if not token_response.get("access_token") or not expires_at:
-            logger.error(
-                "failed to refresh access token",
-                extra={
-                    "token_response": token_response,
-                    "app": app.name,
-                    "linked_account": linked_account.id,
-                    "security_scheme": linked_account.security_scheme,
-                },
-            )
-            raise OAuth2Error("failed to refresh access token")
-
-        fields_to_update = {
-            "access_token": token_response["access_token"],
-            "expires_at": expires_at,
-        }
-        # NOTE: some app's refresh token can only be used once, so we need to update the refresh token (if returned)
-        if token_response.get("refresh_token"):
-            fields_to_update["refresh_token"] = token_response["refresh_token"]
-
-        oauth2_scheme_credentials = oauth2_scheme_credentials.model_copy(
-            update=fields_to_update,
+        oauth2_scheme_credentials = await refresh_oauth2_credentials(
+            app.name,
+            oauth2_scheme,
+            linked_account.id,
+            config.OAUTH2_TOKEN_REFRESH_LEEWAY_SECONDS,
         )
         is_updated = True
 
@@ -114,9 +97,71 @@ async def _get_oauth2_credentials(
     )
 
 
+async def refresh_oauth2_credentials(
+    app_name: str, oauth2_scheme: OAuth2Scheme, linked_account_id: UUID, leeway: float
+) -> OAuth2SchemeCredentials:
+    """
+    Refresh the access token of the linked account if it expires within leeway seconds, save the
+    new credentials, and return the linked account's (possibly refreshed) credentials.
+
+    Refreshes are single-flight: concurrent calls for a linked account in this process share one
+    refresh, and the refreshes of different processes are serialized by an advisory lock on the
+    linked account, after which the credentials are re-read. So a token is refreshed once instead
+    of once per caller, which also matters for apps whose refresh tokens can only be used once.
+    """
+    refresh_task = _oauth2_refresh_tasks.get(linked_account_id)
+    if refresh_task is None:
+        refresh_task = asyncio.create_task(
+            _refresh_and_save_oauth2_credentials(app_name, oauth2_scheme, linked_account_id, leeway)
+        )
+        _oauth2_refresh_tasks[linked_account_id] = refresh_task
+        refresh_task.add_done_callback(lambda _: _oauth2_refresh_tasks.pop(linked_account_id, None))
+    # a caller being cancelled (e.g., client disconnected) doesn't cancel the refresh of the others
+    return await asyncio.shield(refresh_task)
+
+
+async def _refresh_and_save_oauth2_credentials(
+    app_name: str, oauth2_scheme: OAuth2Scheme, linked_account_id: UUID, leeway: float
+) -> OAuth2SchemeCredentials:
+    # uses its own session, as it's shared by the callers and outlives the one that started it
+    async with utils.create_async_db_session(config.DB_FULL_URL) as db_session:
+        await crud.linked_accounts.lock_linked_account_async(db_session, linked_account_id)
+        linked_account = await crud.linked_accounts.get_linked_account_by_id_async(
+            db_session, linked_account_id
+        )
+        if linked_account is None:
+            raise LinkedAccountNotFound(f"linked account={linked_account_id} not found")
+
+        oauth2_scheme_credentials = OAuth2SchemeCredentials.model_validate(
+            linked_account.security_credentials
+        )
+        # refreshed by another process while waiting for the lock
+        if not _access_token_is_expired(oauth2_scheme_credentials, leeway):
+            return oauth2_scheme_credentials
+
+        oauth2_scheme_credentials = await _refresh_oauth2_access_token(
+            app_name, oauth2_scheme, oauth2_scheme_credentials
+        )
+        await db_session.run_sync(
+            crud.linked_accounts.update_linked_account_credentials,
+            linked_account,
+            security_credentials=oauth2_scheme_credentials,
+        )
+        await db_session.commit()
+        logger.info(
+            "refreshed access token",
+            extra={
+                "linked_account": linked_account_id,
+                "app": app_name,
+                "expires_at": oauth2_scheme_credentials.expires_at,
+            },
+        )
+        return oauth2_scheme_credentials
+
+
 async def _refresh_oauth2_access_token(
     app_name: str, oauth2_scheme: OAuth2Scheme, oauth2_scheme_credentials: OAuth2SchemeCredentials
-) -> dict:
+) -> OAuth2SchemeCredentials:
     refresh_token = oauth2_scheme_credentials.refresh_token
     if not refresh_token:
         raise OAuth2Error("no refresh token found")
@@ -134,7 +179,29 @@ async def _refresh_oauth2_access_token(
         token_endpoint_auth_method=oauth2_scheme.token_endpoint_auth_method,
     )
 
-    return await oauth2_manager.refresh_token(refresh_token)
+    token_response = await oauth2_manager.refresh_token(refresh_token)
+    expires_at: int | None = None
+    if "expires_at" in token_response:
+        expires_at = int(token_response["expires_at"])
+    elif "expires_in" in token_response:
+        expires_at = int(time.time()) + int(token_response["expires_in"])
+
+    if not token_response.get("access_token") or not expires_at:
+        logger.error(
+            "failed to refresh access token",
+            extra={"token_response": token_response, "app": app_name},
+        )
+        raise OAuth2Error("failed to refresh access token")
+
+    fields_to_update = {
+        "access_token": token_response["access_token"],
+        "expires_at": expires_at,
+    }
+    # NOTE: some app's refresh token can only be used once, so we need to update the refresh token (if returned)
+    if token_response.get("refresh_token"):
+        fields_to_update["refresh_token"] = token_response["refresh_token"]
+
+    return oauth2_scheme_credentials.model_copy(update=fields_to_update)
 
 
 def _get_api_key_credentials(
@@ -187,11 +254,13 @@ def _get_no_auth_credentials(
     )
 
 
-# TODO: consider adding leeway for expiration
-def _access_token_is_expired(oauth2_credentials: OAuth2SchemeCredentials) -> bool:
+def _access_token_is_expired(
+    oauth2_credentials: OAuth2SchemeCredentials, leeway: float = 0
+) -> bool:
+    """Whether the access token is expired, or expires within leeway seconds."""
     if oauth2_credentials.expires_at is None:
         return False
-    return oauth2_credentials.expires_at < int(time.time())
+    return oauth2_credentials.expires_at < time.time() + leeway
 
 
 def get_app_configuration_oauth2_scheme(
@@ -21,7 +21,11 @@ from aci.common.schemas.plans import PlanFeatures
 from aci.server import acl
 
 # override the rate limit to a high number for testing before importing aci modules
-with patch.dict("os.environ", {"SERVER_RATE_LIMIT_IP_PER_SECOND": "999"}):
+# disable the auth cache as many tests update agents/projects directly in the db between requests
+with patch.dict(
+    "os.environ",
+    {"SERVER_RATE_LIMIT_IP_PER_SECOND": "999", "SERVER_AUTH_CACHE_TTL_SECONDS": "0"},
+):
     from aci.common import utils
     from aci.common.db import crud
     from aci.common.db.sql_models import (
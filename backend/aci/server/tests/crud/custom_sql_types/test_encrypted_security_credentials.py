@@ -5,6 +5,8 @@ from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from aci.common import encryption
+from aci.common.db import crud
+from aci.common.db.custom_sql_types import ENCRYPTED_FIELDS_KEY
 from aci.common.db.sql_models import App, LinkedAccount, Project
 from aci.common.enums import SecurityScheme
 from aci.common.schemas.security_scheme import APIKeySchemeCredentials, OAuth2SchemeCredentials
@@ -57,13 +59,13 @@ def test_linked_account_table_security_credentials_column_api_key_encryption(
     assert raw_security_credentials is not None
     assert isinstance(raw_security_credentials, dict)
 
-    raw_secret_key = raw_security_credentials["secret_key"]
-    assert raw_secret_key is not None
-    assert raw_secret_key != expected_api_key
+    assert "secret_key" not in raw_security_credentials
+    raw_encrypted_fields = raw_security_credentials[ENCRYPTED_FIELDS_KEY]
+    assert expected_api_key not in raw_encrypted_fields
 
     # Then - Decrypt the value and verify it matches the original value
-    decrypted_secret_key = encryption.decrypt(base64.b64decode(raw_secret_key)).decode("utf-8")
-    assert decrypted_secret_key == expected_api_key
+    decrypted_encrypted_fields = encryption.decrypt(base64.b64decode(raw_encrypted_fields))
+    assert json.loads(decrypted_encrypted_fields) == {"secret_key": expected_api_key}
 
 
 def test_linked_account_table_security_credentials_column_oauth2_encryption(
@@ -128,43 +130,114 @@ def test_linked_account_table_security_credentials_column_oauth2_encryption(
     assert raw_security_credentials is not None
     assert isinstance(raw_security_credentials, dict)
 
-    # Then - Verify client_secret is encrypted and can be decrypted to the original value
-    raw_client_secret = raw_security_credentials["client_secret"]
-    assert raw_client_secret is not None
-    assert raw_client_secret != expected_client_secret
+    # Then - Verify the non-secret fields are stored in clear
+    assert raw_security_credentials["client_id"] == expected_client_id
+    assert raw_security_credentials["token_type"] == "Bearer"
 
-    decrypted_client_secret = encryption.decrypt(base64.b64decode(raw_client_secret)).decode(
-        "utf-8"
-    )
-    assert decrypted_client_secret == expected_client_secret
+    # Then - Verify the secret fields are encrypted together and can be decrypted to the
+    # original values
+    for field in ["client_secret", "access_token", "refresh_token", "raw_token_response"]:
+        assert field not in raw_security_credentials
+    raw_encrypted_fields = raw_security_credentials[ENCRYPTED_FIELDS_KEY]
+    assert expected_access_token not in raw_encrypted_fields
 
-    # Then - Verify access_token is encrypted and can be decrypted to the original value
-    raw_access_token = raw_security_credentials["access_token"]
-    assert raw_access_token is not None
-    assert raw_access_token != expected_access_token
+    decrypted_encrypted_fields = encryption.decrypt(base64.b64decode(raw_encrypted_fields))
+    assert json.loads(decrypted_encrypted_fields) == {
+        "client_secret": expected_client_secret,
+        "access_token": expected_access_token,
+        "refresh_token": expected_refresh_token,
+        "raw_token_response": expected_raw_token_response,
+    }
 
-    decrypted_access_token = encryption.decrypt(base64.b64decode(raw_access_token)).decode("utf-8")
-    assert decrypted_access_token == expected_access_token
 
-    # Then - Verify refresh_token is encrypted and can be decrypted to the original value
-    raw_refresh_token = raw_security_credentials["refresh_token"]
-    assert raw_refresh_token is not None
-    assert raw_refresh_token != expected_refresh_token
+def test_linked_account_table_security_credentials_column_legacy_format(
+    dummy_app_aci_test: App,
+    dummy_project_1: Project,
+    db_session: Session,
+) -> None:
+    """Test that LinkedAccount.security_credentials stored in the legacy format, where each secret
+    field is encrypted separately, can still be read, and is rewritten in the current format when
+    updated.
+    """
+    # Given - A LinkedAccount with security_credentials stored in the legacy format
+    expected_security_credentials = OAuth2SchemeCredentials(
+        client_id="test_client_id",
+        client_secret="test_client_secret",
+        scope="test",
+        access_token="test_access_token",
+        token_type="Bearer",
+        expires_at=1234567890,
+        refresh_token=None,
+        raw_token_response={"key": "value"},
+    ).model_dump()
 
-    decrypted_refresh_token = encryption.decrypt(base64.b64decode(raw_refresh_token)).decode(
-        "utf-8"
+    linked_account = LinkedAccount(
+        project_id=dummy_project_1.id,
+        app_id=dummy_app_aci_test.id,
+        linked_account_owner_id="test_owner",
+        security_scheme=SecurityScheme.OAUTH2,
+        security_credentials={},
+        enabled=True,
     )
-    assert decrypted_refresh_token == expected_refresh_token
+    db_session.add(linked_account)
+    db_session.commit()
+    linked_account_id = linked_account.id
 
-    # Then - Verify raw_token_response is encrypted and can be decrypted to the original value
-    raw_raw_token_response = raw_security_credentials["raw_token_response"]
-    assert raw_raw_token_response is not None
-    assert raw_raw_token_response != expected_raw_token_response
+    def _encrypt(value: str) -> str:
+        return base64.b64encode(encryption.encrypt(value.encode("utf-8"))).decode("utf-8")
 
-    decrypted_raw_token_response = encryption.decrypt(
-        base64.b64decode(raw_raw_token_response)
-    ).decode("utf-8")
-    assert json.loads(decrypted_raw_token_response) == expected_raw_token_response
+    legacy_security_credentials = {
+        **expected_security_credentials,
+        "client_secret": _encrypt("test_client_secret"),
+        "access_token": _encrypt("test_access_token"),
+        "raw_token_response": _encrypt(json.dumps({"key": "value"})),
+    }
+    db_session.execute(
+        text("UPDATE linked_accounts SET security_credentials = :value WHERE id = :id"),
+        {"value": json.dumps(legacy_security_credentials), "id": str(linked_account_id)},
+    )
+    db_session.commit()
+
+    # When - Clear session and retrieve the LinkedAccount
+    db_session.expunge_all()
+    retrieved_linked_account = (
+        db_session.query(LinkedAccount).filter_by(id=linked_account_id).first()
+    )
+    assert retrieved_linked_account is not None
+
+    # Then - The legacy security credentials are decrypted
+    assert retrieved_linked_account.security_credentials == expected_security_credentials
+    assert crud.linked_accounts.get_linked_accounts_with_legacy_encrypted_credentials(
+        db_session, limit=10
+    ) == [retrieved_linked_account]
+
+    # When - The security credentials are updated
+    retrieved_linked_account.security_credentials["expires_at"] = 1234567891
+    db_session.commit()
+
+    # Then - They are rewritten in the current format
+    raw_query = text("SELECT security_credentials FROM linked_accounts WHERE id = :id")
+    result = db_session.execute(raw_query, {"id": str(linked_account_id)}).first()
+    raw_security_credentials = result[0] if result else None
+    assert raw_security_credentials is not None
+    assert ENCRYPTED_FIELDS_KEY in raw_security_credentials
+    assert "access_token" not in raw_security_credentials
+    assert (
+        crud.linked_accounts.get_linked_accounts_with_legacy_encrypted_credentials(
+            db_session, limit=10
+        )
+        == []
+    )
+
+    db_session.expunge_all()
+    retrieved_linked_account = (
+        db_session.query(LinkedAccount).filter_by(id=linked_account_id).first()
+    )
+    assert retrieved_linked_account is not None
+    assert retrieved_linked_account.security_credentials == {
+        **expected_security_credentials,
+        "expires_at": 1234567891,
+    }
 
 
 def test_linked_account_table_security_credentials_column_mutable_dict_detection(
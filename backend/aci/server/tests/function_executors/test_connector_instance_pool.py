@@ -0,0 +1,64 @@
+from aci.common.db.sql_models import LinkedAccount
+from aci.common.enums import SecurityScheme
+from aci.common.schemas.security_scheme import OAuth2Scheme, OAuth2SchemeCredentials
+from aci.server.app_connectors.mock_app_connector import MockAppConnector
+from aci.server.function_executors.connector_instance_pool import ConnectorInstancePool
+
+
+class ReusableMockAppConnector(MockAppConnector):
+    reusable = True
+
+
+def test_reusable_connector_is_pooled_per_credentials_version(
+    dummy_linked_account_oauth2_aci_test_project_1: LinkedAccount,
+) -> None:
+    linked_account = dummy_linked_account_oauth2_aci_test_project_1
+    security_scheme = OAuth2Scheme.model_validate(
+        linked_account.app.security_schemes[SecurityScheme.OAUTH2]
+    )
+    security_credentials = OAuth2SchemeCredentials.model_validate(
+        linked_account.security_credentials
+    )
+    pool = ConnectorInstancePool(maxsize=10, ttl=60)
+
+    instance = pool.get_instance(
+        ReusableMockAppConnector, linked_account, security_scheme, security_credentials
+    )
+    assert (
+        pool.get_instance(
+            ReusableMockAppConnector,
+            linked_account,
+            security_scheme,
+            security_credentials.model_copy(),
+        )
+        is instance
+    )
+
+    # a refreshed access token gets a new instance
+    refreshed_credentials = security_credentials.model_copy(
+        update={"access_token": "refreshed_access_token"}
+    )
+    refreshed_instance = pool.get_instance(
+        ReusableMockAppConnector, linked_account, security_scheme, refreshed_credentials
+    )
+    assert refreshed_instance is not instance
+    assert refreshed_instance.security_credentials == refreshed_credentials
+
+
+def test_non_reusable_connector_is_not_pooled(
+    dummy_linked_account_oauth2_aci_test_project_1: LinkedAccount,
+) -> None:
+    linked_account = dummy_linked_account_oauth2_aci_test_project_1
+    security_scheme = OAuth2Scheme.model_validate(
+        linked_account.app.security_schemes[SecurityScheme.OAUTH2]
+    )
+    security_credentials = OAuth2SchemeCredentials.model_validate(
+        linked_account.security_credentials
+    )
+    pool = ConnectorInstancePool(maxsize=10, ttl=60)
+
+    instances = [
+        pool.get_instance(MockAppConnector, linked_account, security_scheme, security_credentials)
+        for _ in range(2)
+    ]
+    assert instances[0] is not instances[1]
@@ -0,0 +1,19 @@
+import pytest
+
+from aci.common.exceptions import NoImplementationFound
+from aci.server.app_connectors.mock_app_connector import MockAppConnector
+from aci.server.function_executors.connector_registry import ConnectorRegistry
+
+
+def test_connector_classes_are_resolved_by_app_name() -> None:
+    registry = ConnectorRegistry()
+    registry.load()
+
+    assert registry.get_connector_class("MOCK_APP_CONNECTOR") is MockAppConnector
+
+
+def test_app_without_connector() -> None:
+    registry = ConnectorRegistry()
+
+    with pytest.raises(NoImplementationFound):
+        registry.get_connector_class("APP_WITHOUT_CONNECTOR")
@@ -0,0 +1,50 @@
+import asyncio
+import threading
+import time
+
+from aci.server.function_executors.connector_thread_pools import ConnectorThreadPools
+
+
+def test_calls_of_an_app_are_bounded_by_its_pool() -> None:
+    pools = ConnectorThreadPools(max_workers_per_app=2)
+    running = 0
+    max_running = 0
+    lock = threading.Lock()
+
+    def blocking_call() -> None:
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+
+    async def run() -> None:
+        await asyncio.gather(*(pools.run("GMAIL", blocking_call) for _ in range(6)))
+
+    try:
+        asyncio.run(run())
+    finally:
+        pools.shutdown()
+    assert max_running == 2
+
+
+def test_slow_app_does_not_block_other_apps_or_the_event_loop() -> None:
+    pools = ConnectorThreadPools(max_workers_per_app=1)
+    release_slow_call = threading.Event()
+
+    async def run() -> None:
+        slow_call = asyncio.create_task(pools.run("E2B", release_slow_call.wait, 5))
+        # the pool of E2B is saturated, the call of another app still runs right away
+        assert await pools.run("GMAIL", lambda: "sent") == "sent"
+        # and the event loop is free in the meantime
+        await asyncio.sleep(0)
+        assert not slow_call.done()
+        release_slow_call.set()
+        assert await slow_call is True
+
+    try:
+        asyncio.run(run())
+    finally:
+        pools.shutdown()
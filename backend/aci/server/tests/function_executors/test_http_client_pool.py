@@ -0,0 +1,59 @@
+import asyncio
+
+import httpx
+import respx
+
+from aci.server.function_executors.http_client_pool import HTTPClientPool
+
+
+@respx.mock
+def test_cookies_set_by_upstream_are_not_sent_with_later_requests() -> None:
+    pool = HTTPClientPool(
+        limits=httpx.Limits(), timeout=httpx.Timeout(5), http2=False, max_clients=10
+    )
+    route = respx.get("https://api.mock.aci.com/v1/me").mock(
+        return_value=httpx.Response(200, headers={"Set-Cookie": "session=userA; Path=/"})
+    )
+    url = httpx.URL("https://api.mock.aci.com/v1/me")
+
+    async def run() -> None:
+        try:
+            async with pool.acquire(url) as client:
+                # execution of the first tenant, which gets a session cookie from the upstream
+                await client.send(client.build_request("GET", url))
+            async with pool.acquire(url) as client:
+                # execution of another tenant, with its own cookie from the function input
+                await client.send(client.build_request("GET", url, cookies={"theme": "dark"}))
+            async with pool.acquire(url) as client:
+                # execution of another tenant, without cookies
+                await client.send(client.build_request("GET", url))
+        finally:
+            await pool.aclose()
+
+    asyncio.run(run())
+
+    assert route.call_count == 3
+    assert route.calls[1].request.headers.get("cookie") == "theme=dark"
+    assert "cookie" not in route.calls[2].request.headers
+
+
+def test_evicted_clients_are_closed_once_unused() -> None:
+    pool = HTTPClientPool(
+        limits=httpx.Limits(), timeout=httpx.Timeout(5), http2=False, max_clients=1
+    )
+
+    async def run() -> None:
+        async with pool.acquire(httpx.URL("https://a.mock.aci.com/v1")) as client_a:
+            # host b evicts the client of host a, which is still used by the execution
+            async with pool.acquire(httpx.URL("https://b.mock.aci.com/v1")) as client_b:
+                assert not client_a.is_closed
+            assert not client_a.is_closed
+        assert client_a.is_closed
+
+        # an unused client is closed as soon as it's evicted
+        async with pool.acquire(httpx.URL("https://c.mock.aci.com/v1")):
+            assert client_b.is_closed
+
+        await pool.aclose()
+
+    asyncio.run(run())
@@ -2,15 +2,26 @@ import json
 import logging
 from pathlib import Path
 
-from openai import OpenAI
+import pytest
 
 from aci.common import embeddings
+from aci.common.enums import EmbeddingProviderType
 from aci.common.schemas.app import AppEmbeddingFields, AppUpsert
 from aci.common.schemas.function import FunctionEmbeddingFields, FunctionUpsert
 from aci.server import config
 
 logger = logging.getLogger(__name__)
-openai_client = OpenAI(api_key=config.OPENAI_API_KEY)
+embedding_provider = embeddings.create_embedding_provider(
+    config.EMBEDDING_PROVIDER,
+    config.OPENAI_API_KEY,
+    config.OPENAI_EMBEDDING_MODEL,
+    config.OPENAI_EMBEDDING_DIMENSION,
+)
+# the local hashing embeddings only capture lexical similarity, not the meaning of the intents
+requires_semantic_embeddings = pytest.mark.skipif(
+    config.EMBEDDING_PROVIDER == EmbeddingProviderType.HASHING,
+    reason="search ranking by intent needs a semantic embedding provider",
+)
 DUMMY_APPS_DIR = Path(__file__).parent / "dummy_apps"
 REAL_APPS_DIR = Path(__file__).parent.parent.parent.parent / "apps"
 CONNECTOR_APPS = [
@@ -48,17 +59,9 @@ def prepare_dummy_apps_and_functions() -> list[
         for function_upsert in functions_upsert:
             assert function_upsert.name.startswith(app_upsert.name)
 
-        app_embedding = embeddings.generate_app_embedding(
-            app_embedding_fields,
-            openai_client,
-            config.OPENAI_EMBEDDING_MODEL,
-            config.OPENAI_EMBEDDING_DIMENSION,
-        )
+        app_embedding = embeddings.generate_app_embedding(app_embedding_fields, embedding_provider)
         function_embeddings = embeddings.generate_function_embeddings(
-            functions_embedding_fields,
-            openai_client,
-            config.OPENAI_EMBEDDING_MODEL,
-            config.OPENAI_EMBEDDING_DIMENSION,
+            functions_embedding_fields, embedding_provider
         )
         results.append((app_upsert, functions_upsert, app_embedding, function_embeddings))
     return results
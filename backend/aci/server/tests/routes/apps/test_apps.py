@@ -9,8 +9,10 @@ from aci.common.enums import Visibility
 from aci.common.schemas.app import AppBasic, AppsSearch
 from aci.common.schemas.app_configurations import AppConfigurationPublic
 from aci.server import config
+from aci.server.tests.helper import requires_semantic_embeddings
 
 
+@requires_semantic_embeddings
 @pytest.mark.parametrize("include_functions", [True, False])
 def test_search_apps_with_intent(
     test_client: TestClient,
@@ -100,6 +102,7 @@ def test_search_apps_with_categories(
     assert apps[0].name == dummy_app_aci_test.name
 
 
+@requires_semantic_embeddings
 @pytest.mark.parametrize("include_functions", [True, False])
 def test_search_apps_with_categories_and_intent(
     test_client: TestClient,
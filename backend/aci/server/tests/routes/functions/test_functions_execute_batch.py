@@ -0,0 +1,152 @@
+from unittest.mock import patch
+
+import httpx
+import respx
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from aci.common.db.sql_models import Agent, Function, LinkedAccount
+from aci.common.schemas.function import (
+    FunctionExecuteBatch,
+    FunctionExecuteBatchItem,
+    FunctionExecutionResult,
+)
+from aci.server import config
+
+NON_EXISTENT_FUNCTION_NAME = "non_existent_function_name"
+
+
+@respx.mock
+def test_execute_batch(
+    test_client: TestClient,
+    dummy_agent_1_with_all_apps_allowed: Agent,
+    dummy_function_aci_test__hello_world_no_args: Function,
+    dummy_function_aci_test__hello_world_with_args: Function,
+    dummy_linked_account_default_api_key_aci_test_project_1: LinkedAccount,
+) -> None:
+    no_args_request = respx.get("https://api.mock.aci.com/v1/hello_world_no_args").mock(
+        return_value=httpx.Response(200, json={"message": "no args"})
+    )
+    with_args_request = respx.post("https://api.mock.aci.com/v1/greet/John?lang=en").mock(
+        return_value=httpx.Response(200, json={"message": "with args"})
+    )
+    linked_account_owner_id = (
+        dummy_linked_account_default_api_key_aci_test_project_1.linked_account_owner_id
+    )
+    function_execute_batch = FunctionExecuteBatch(
+        items=[
+            FunctionExecuteBatchItem(
+                function_name=dummy_function_aci_test__hello_world_with_args.name,
+                function_input={
+                    "path": {"userId": "John"},
+                    "query": {"lang": "en"},
+                    "body": {"name": "John"},
+                },
+                linked_account_owner_id=linked_account_owner_id,
+            ),
+            FunctionExecuteBatchItem(
+                function_name=NON_EXISTENT_FUNCTION_NAME,
+                linked_account_owner_id=linked_account_owner_id,
+            ),
+            FunctionExecuteBatchItem(
+                function_name=dummy_function_aci_test__hello_world_no_args.name,
+                linked_account_owner_id=linked_account_owner_id,
+            ),
+            FunctionExecuteBatchItem(
+                function_name=dummy_function_aci_test__hello_world_with_args.name,
+                function_input={"path": {"random_key": "random_value"}},
+                linked_account_owner_id=linked_account_owner_id,
+            ),
+        ]
+    )
+
+    response = test_client.post(
+        f"{config.ROUTER_PREFIX_FUNCTIONS}/execute-batch",
+        json=function_execute_batch.model_dump(mode="json"),
+        headers={"x-api-key": dummy_agent_1_with_all_apps_allowed.api_keys[0].key},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    results = [FunctionExecutionResult.model_validate(result) for result in response.json()]
+    assert len(results) == 4
+    # results are in the order of the items, with the errors of the failed items
+    assert results[0].success and results[0].data == {"message": "with args"}
+    assert not results[1].success
+    assert str(results[1].error).startswith("Function not found")
+    assert results[2].success and results[2].data == {"message": "no args"}
+    assert not results[3].success
+    assert str(results[3].error).startswith("Invalid function input")
+    assert with_args_request.call_count == 1
+    assert no_args_request.call_count == 1
+
+
+@respx.mock
+def test_execute_batch_with_unexpected_error(
+    test_client: TestClient,
+    dummy_agent_1_with_all_apps_allowed: Agent,
+    dummy_function_aci_test__hello_world_no_args: Function,
+    dummy_function_aci_test__hello_world_with_args: Function,
+    dummy_linked_account_default_api_key_aci_test_project_1: LinkedAccount,
+) -> None:
+    no_args_request = respx.get("https://api.mock.aci.com/v1/hello_world_no_args").mock(
+        return_value=httpx.Response(200, json={"message": "no args"})
+    )
+    with_args_request = respx.post("https://api.mock.aci.com/v1/greet/John?lang=en").mock(
+        return_value=httpx.Response(200, json={"message": "with args"})
+    )
+    linked_account_owner_id = (
+        dummy_linked_account_default_api_key_aci_test_project_1.linked_account_owner_id
+    )
+    function_execute_batch = FunctionExecuteBatch(
+        items=[
+            FunctionExecuteBatchItem(
+                function_name=dummy_function_aci_test__hello_world_no_args.name,
+                linked_account_owner_id=linked_account_owner_id,
+            ),
+            FunctionExecuteBatchItem(
+                function_name=dummy_function_aci_test__hello_world_with_args.name,
+                function_input={
+                    "path": {"userId": "John"},
+                    "query": {"lang": "en"},
+                    "body": {"name": "John"},
+                },
+                linked_account_owner_id=linked_account_owner_id,
+            ),
+        ]
+    )
+
+    def fail_for_no_args_function(agent: Agent, function: Function, function_input: dict) -> None:
+        if function.name == dummy_function_aci_test__hello_world_no_args.name:
+            raise RuntimeError("unexpected error")
+
+    with patch(
+        "aci.server.routes.functions.custom_instruction_rules.check_for_violation",
+        side_effect=fail_for_no_args_function,
+    ):
+        response = test_client.post(
+            f"{config.ROUTER_PREFIX_FUNCTIONS}/execute-batch",
+            json=function_execute_batch.model_dump(mode="json"),
+            headers={"x-api-key": dummy_agent_1_with_all_apps_allowed.api_keys[0].key},
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    results = [FunctionExecutionResult.model_validate(result) for result in response.json()]
+    # the unexpected error of an item doesn't fail the other items
+    assert not results[0].success
+    assert str(results[0].error).startswith("Unexpected error")
+    assert results[1].success and results[1].data == {"message": "with args"}
+    assert no_args_request.call_count == 0
+    assert with_args_request.call_count == 1
+
+
+def test_execute_batch_with_no_items(
+    test_client: TestClient,
+    dummy_agent_1_with_all_apps_allowed: Agent,
+) -> None:
+    response = test_client.post(
+        f"{config.ROUTER_PREFIX_FUNCTIONS}/execute-batch",
+        json={"items": []},
+        headers={"x-api-key": dummy_agent_1_with_all_apps_allowed.api_keys[0].key},
+    )
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -181,3 +181,46 @@ def test_execute_function_with_app_default_api_key(
 
         # Verify request content for cases with args
         assert mock_request.calls.last.request.content == expected_content
+
+
+@respx.mock
+def test_execute_function_after_function_update(
+    db_session: Session,
+    test_client: TestClient,
+    dummy_agent_1_with_all_apps_allowed: Agent,
+    dummy_function_aci_test__hello_world_no_args: Function,
+    dummy_linked_account_default_api_key_aci_test_project_1: LinkedAccount,
+) -> None:
+    """
+    Test that an updated function is executed with its new version, not a cached one
+    """
+    old_request = respx.get("https://api.mock.aci.com/v1/hello_world_no_args").mock(
+        return_value=httpx.Response(200, json={"message": "old"})
+    )
+    new_request = respx.get("https://api.mock.aci.com/v1/hello_world_no_args_v2").mock(
+        return_value=httpx.Response(200, json={"message": "new"})
+    )
+    function_execute = FunctionExecute(
+        linked_account_owner_id=dummy_linked_account_default_api_key_aci_test_project_1.linked_account_owner_id,
+    )
+
+    def execute() -> FunctionExecutionResult:
+        response = test_client.post(
+            f"{config.ROUTER_PREFIX_FUNCTIONS}/{dummy_function_aci_test__hello_world_no_args.name}/execute",
+            json=function_execute.model_dump(mode="json"),
+            headers={"x-api-key": dummy_agent_1_with_all_apps_allowed.api_keys[0].key},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        return FunctionExecutionResult.model_validate(response.json())
+
+    assert execute().data == {"message": "old"}
+
+    # Note: nested update is not supported (won't trigger the onupdate event) in SQLAlchemy
+    protocol_data = dummy_function_aci_test__hello_world_no_args.protocol_data.copy()
+    protocol_data["path"] = "/hello_world_no_args_v2"
+    dummy_function_aci_test__hello_world_no_args.protocol_data = protocol_data
+    db_session.commit()
+
+    assert execute().data == {"message": "new"}
+    assert old_request.call_count == 1
+    assert new_request.call_count == 1
@@ -1,3 +1,5 @@
+import json
+
 import httpx
 import pytest
 import respx
@@ -5,7 +7,7 @@ from fastapi import status
 from fastapi.testclient import TestClient
 
 from aci.common.db.sql_models import Agent, Function, LinkedAccount
-from aci.common.schemas.agent import AgentUpdate
+from aci.common.schemas.agent import AgentUpdate, InputRule
 from aci.common.schemas.function import FunctionExecute
 from aci.server import config
 from aci.server.tests.conftest import DummyUser
@@ -80,3 +82,145 @@ def test_execute_github_function_with_custom_instructions(
         assert response.status_code == status.HTTP_403_FORBIDDEN
         assert str(response.json()["error"]).startswith("Custom instruction violation")
         assert custom_instruction in str(response.json()["error"])
+
+
+@respx.mock
+def test_custom_instruction_verdicts_are_cached(
+    test_client: TestClient,
+    dummy_user: DummyUser,
+    dummy_agent_1_with_all_apps_allowed: Agent,
+    dummy_function_github__create_repository: Function,
+    dummy_linked_account_api_key_github_project_1: LinkedAccount,
+) -> None:
+    openai_request = respx.post("https://api.openai.com/v1/chat/completions").mock(
+        return_value=httpx.Response(
+            200,
+            json={
+                "id": "chatcmpl-1",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "gpt-4o-mini",
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {
+                            "role": "assistant",
+                            "content": json.dumps(
+                                {"is_violated": False, "justification": "the name is fine"}
+                            ),
+                        },
+                    }
+                ],
+            },
+        )
+    )
+    respx.post("https://api.github.com/repositories").mock(
+        return_value=httpx.Response(201, json={"repo_name": "good repo"})
+    )
+
+    agent_update = AgentUpdate(
+        custom_instructions={
+            dummy_function_github__create_repository.name: "you can NOT create repo with an offensive name"
+        }
+    )
+    agent_update_response = test_client.patch(
+        f"{config.ROUTER_PREFIX_PROJECTS}/{dummy_agent_1_with_all_apps_allowed.project_id}/agents/{dummy_agent_1_with_all_apps_allowed.id}",
+        json=agent_update.model_dump(mode="json"),
+        headers={"Authorization": f"Bearer {dummy_user.access_token}"},
+    )
+    assert agent_update_response.status_code == status.HTTP_200_OK
+
+    # the same input, with the keys in a different order
+    function_inputs = [
+        {"body": {"name": "good repo", "description": "a repo", "private": True}},
+        {"body": {"private": True, "description": "a repo", "name": "good repo"}},
+    ]
+    for function_input in function_inputs:
+        response = test_client.post(
+            f"{config.ROUTER_PREFIX_FUNCTIONS}/{dummy_function_github__create_repository.name}/execute",
+            json=FunctionExecute(
+                linked_account_owner_id=dummy_linked_account_api_key_github_project_1.linked_account_owner_id,
+                function_input=function_input,
+            ).model_dump(mode="json"),
+            headers={"x-api-key": dummy_agent_1_with_all_apps_allowed.api_keys[0].key},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["success"]
+
+    # the verdict of the first execution is reused
+    assert openai_request.call_count == 1
+
+
+@pytest.mark.parametrize(
+    ("repo_name", "private", "function_execution_should_succeed"),
+    [
+        ("team-repo", True, True),
+        ("personal-repo", True, False),
+        ("team-repo", False, False),
+    ],
+)
+@respx.mock
+def test_execute_github_function_with_custom_instruction_rules(
+    test_client: TestClient,
+    dummy_user: DummyUser,
+    dummy_agent_1_with_all_apps_allowed: Agent,
+    dummy_function_github__create_repository: Function,
+    dummy_linked_account_api_key_github_project_1: LinkedAccount,
+    repo_name: str,
+    private: bool,
+    function_execution_should_succeed: bool,
+) -> None:
+    # rules are checked locally, without asking the LLM judge
+    openai_request = respx.post("https://api.openai.com/v1/chat/completions")
+    github_request = respx.post("https://api.github.com/repositories").mock(
+        return_value=httpx.Response(201, json={"repo_name": repo_name})
+    )
+
+    agent_update = AgentUpdate(
+        custom_instruction_rules={
+            dummy_function_github__create_repository.name: [
+                InputRule(
+                    path="body.name",
+                    pattern="team-.*",
+                    description="repo names must start with team-",
+                ),
+                InputRule(path="body.private", allow=[True]),
+            ]
+        }
+    )
+    agent_update_response = test_client.patch(
+        f"{config.ROUTER_PREFIX_PROJECTS}/{dummy_agent_1_with_all_apps_allowed.project_id}/agents/{dummy_agent_1_with_all_apps_allowed.id}",
+        json=agent_update.model_dump(mode="json", exclude_none=True),
+        headers={"Authorization": f"Bearer {dummy_user.access_token}"},
+    )
+    assert agent_update_response.status_code == status.HTTP_200_OK
+    assert (
+        len(
+            agent_update_response.json()["custom_instruction_rules"][
+                dummy_function_github__create_repository.name
+            ]
+        )
+        == 2
+    )
+
+    response = test_client.post(
+        f"{config.ROUTER_PREFIX_FUNCTIONS}/{dummy_function_github__create_repository.name}/execute",
+        json=FunctionExecute(
+            linked_account_owner_id=dummy_linked_account_api_key_github_project_1.linked_account_owner_id,
+            function_input={
+                "body": {"name": repo_name, "description": "a repo", "private": private}
+            },
+        ).model_dump(mode="json"),
+        headers={"x-api-key": dummy_agent_1_with_all_apps_allowed.api_keys[0].key},
+    )
+
+    assert not openai_request.called
+    if function_execution_should_succeed:
+        assert github_request.called
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["success"]
+    else:
+        assert not github_request.called
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert str(response.json()["error"]).startswith("Custom instruction violation")
@@ -66,6 +66,30 @@ def test_get_function_definition_by_identifier(
             )
 
 
+def test_get_function_definition_after_function_update(
+    db_session: Session,
+    test_client: TestClient,
+    dummy_function_github__create_repository: Function,
+    dummy_api_key_1: str,
+) -> None:
+    def get_description() -> str:
+        response = test_client.get(
+            f"{config.ROUTER_PREFIX_FUNCTIONS}/{dummy_function_github__create_repository.name}/definition",
+            params={"format": FunctionDefinitionFormat.OPENAI},
+            headers={"x-api-key": dummy_api_key_1},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        return OpenAIFunctionDefinition.model_validate(response.json()).function.description
+
+    assert get_description() == dummy_function_github__create_repository.description
+
+    # the cached definition is of the previous version of the function
+    dummy_function_github__create_repository.description = "updated description"
+    db_session.commit()
+
+    assert get_description() == "updated description"
+
+
 def test_get_private_function(
     db_session: Session,
     test_client: TestClient,
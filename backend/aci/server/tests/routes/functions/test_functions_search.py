@@ -14,6 +14,7 @@ from aci.common.schemas.function import (
     OpenAIFunctionDefinition,
 )
 from aci.server import config
+from aci.server.tests.helper import requires_semantic_embeddings
 
 
 @pytest.mark.parametrize(
@@ -245,6 +246,7 @@ def test_search_functions_with_app_names(
     )
 
 
+@requires_semantic_embeddings
 @pytest.mark.parametrize(
     "format",
     [
@@ -344,6 +346,34 @@ def test_search_functions_with_app_names_and_intent(
     )
 
 
+def test_search_functions_with_function_name_as_intent(
+    test_client: TestClient,
+    dummy_functions: list[Function],
+    dummy_function_github__create_repository: Function,
+    dummy_api_key_1: str,
+) -> None:
+    # names are searched lexically, without an embedding of the intent
+    function_search = FunctionsSearch(
+        intent=dummy_function_github__create_repository.name.lower(),
+        limit=100,
+        offset=0,
+    )
+    response = test_client.get(
+        f"{config.ROUTER_PREFIX_FUNCTIONS}/search",
+        params=function_search.model_dump(exclude_none=True),
+        headers={"x-api-key": dummy_api_key_1},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    functions = [
+        BasicFunctionDefinition.model_validate(response_function)
+        for response_function in response.json()
+    ]
+    assert functions[0].name == dummy_function_github__create_repository.name
+    # only the functions that match the name's words lexically
+    assert len(functions) < len(dummy_functions)
+
+
 @pytest.mark.parametrize(
     "format",
     [
@@ -14,3 +14,43 @@ def test_health_check(test_client: TestClient) -> None:
     response = test_client.get(f"{config.ROUTER_PREFIX_HEALTH}")
     assert response.status_code == status.HTTP_200_OK
     assert response.json() is True
+
+
+def test_db_pool_stats(test_client: TestClient) -> None:
+    response = test_client.get(
+        f"{config.ROUTER_PREFIX_HEALTH}/db-pool",
+        headers={config.METRICS_TOKEN_HEADER_NAME: config.METRICS_TOKEN},
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    pool_stats = response.json()
+    # the server and the test fixtures share the same pooled engine
+    sync_pool_stats = [stats for stats in pool_stats if not stats["is_async"]]
+    assert len(sync_pool_stats) == 1
+    assert sync_pool_stats[0]["pool_size"] == config.DB_POOL_SIZE
+    assert sync_pool_stats[0]["total_checkouts"] > 0
+    for stats in pool_stats:
+        assert "db_url" not in stats
+
+
+def test_db_pool_stats_require_metrics_token(test_client: TestClient) -> None:
+    response = test_client.get(f"{config.ROUTER_PREFIX_HEALTH}/db-pool")
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    response = test_client.get(
+        f"{config.ROUTER_PREFIX_HEALTH}/db-pool",
+        headers={config.METRICS_TOKEN_HEADER_NAME: "invalid_metrics_token"},
+    )
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_embedding_cache_stats(test_client: TestClient) -> None:
+    response = test_client.get(f"{config.ROUTER_PREFIX_HEALTH}/embedding-cache")
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    response = test_client.get(
+        f"{config.ROUTER_PREFIX_HEALTH}/embedding-cache",
+        headers={config.METRICS_TOKEN_HEADER_NAME: config.METRICS_TOKEN},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert set(response.json()) == {"size", "memory_hits", "disk_hits", "misses", "disk_enabled"}
@@ -1,7 +1,13 @@
+from unittest.mock import patch
+
 from fastapi import status
 from fastapi.testclient import TestClient
 
-from aci.server import config
+from aci.common.cache import TTLCache
+from aci.common.db import crud
+from aci.common.db.sql_models import Agent
+from aci.server import auth_cache, config
+from aci.server.tests.conftest import DummyUser
 
 
 # sending a request without a valid api key in x-api-key header to /apps route should fail
@@ -36,3 +42,44 @@ def test_with_invalid_api_key(test_client: TestClient, dummy_api_key_1: str) ->
 
 
 # TODO: test disabled/deleted api key
+
+
+# the auth cache is disabled for tests by default, so enable it explicitly here
+def test_api_key_resolution_is_cached_and_invalidated_on_agent_update(
+    test_client: TestClient,
+    dummy_user: DummyUser,
+    dummy_agent_1_with_no_apps_allowed: Agent,
+    dummy_api_key_1: str,
+) -> None:
+    with (
+        patch.object(auth_cache, "_cache", TTLCache(maxsize=10, ttl=60)),
+        patch(
+            "aci.server.dependencies.crud.projects.get_api_key_async",
+            wraps=crud.projects.get_api_key_async,
+        ) as mock_get_api_key,
+    ):
+        for _ in range(2):
+            response = test_client.get(
+                f"{config.ROUTER_PREFIX_APPS}/search",
+                params={"limit": 1},
+                headers={"x-api-key": dummy_api_key_1},
+            )
+            assert response.status_code == status.HTTP_200_OK
+        assert mock_get_api_key.call_count == 1
+
+        # updating the agent should invalidate the cached resolution
+        response = test_client.patch(
+            f"{config.ROUTER_PREFIX_PROJECTS}/{dummy_agent_1_with_no_apps_allowed.project_id}"
+            f"/agents/{dummy_agent_1_with_no_apps_allowed.id}",
+            json={"name": "updated agent name"},
+            headers={"Authorization": f"Bearer {dummy_user.access_token}"},
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        response = test_client.get(
+            f"{config.ROUTER_PREFIX_APPS}/search",
+            params={"limit": 1},
+            headers={"x-api-key": dummy_api_key_1},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert mock_get_api_key.call_count == 2
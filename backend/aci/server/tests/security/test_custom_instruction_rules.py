@@ -0,0 +1,133 @@
+import time
+from typing import Any
+
+import pytest
+from pydantic import ValidationError
+
+from aci.common.schemas.agent import InputRule
+from aci.server.custom_instruction_rules import _compile, _find_values
+
+
+def _is_violated(rule: InputRule, function_input: dict) -> bool:
+    compiled_rule = _compile(rule)
+    return any(
+        compiled_rule.is_violated_by(value)
+        for value in _find_values(function_input, compiled_rule.path)
+    )
+
+
+@pytest.mark.parametrize(
+    ("value", "should_violate"),
+    [
+        ("main", True),
+        ("dev", False),
+        # a number is not the string of the deny list
+        (1, False),
+    ],
+)
+def test_deny(value: Any, should_violate: bool) -> None:
+    rule = InputRule(path="body.branch", deny=["main", "master"])
+
+    assert _is_violated(rule, {"body": {"branch": value}}) == should_violate
+
+
+@pytest.mark.parametrize(
+    ("value", "should_violate"),
+    [
+        (0, False),
+        (10, False),
+        (5.5, False),
+        (-1, True),
+        (10.1, True),
+        ("5", True),
+        # booleans are not numbers
+        (True, True),
+    ],
+)
+def test_minimum_and_maximum(value: Any, should_violate: bool) -> None:
+    rule = InputRule(path="query.limit", minimum=0, maximum=10)
+
+    assert _is_violated(rule, {"query": {"limit": value}}) == should_violate
+
+
+@pytest.mark.parametrize(
+    ("rule", "value", "should_violate"),
+    [
+        (InputRule(path="body.count", deny=[1]), True, False),
+        (InputRule(path="body.count", deny=[1]), 1, True),
+        (InputRule(path="body.count", deny=[1]), 1.0, True),
+        (InputRule(path="body.count", deny=[True]), 1, False),
+        (InputRule(path="body.count", deny=[True]), True, True),
+        (InputRule(path="body.count", allow=[True]), 1, True),
+        (InputRule(path="body.count", allow=[0]), False, True),
+    ],
+)
+def test_booleans_and_numbers_are_different_values(
+    rule: InputRule, value: Any, should_violate: bool
+) -> None:
+    assert _is_violated(rule, {"body": {"count": value}}) == should_violate
+
+
+@pytest.mark.parametrize(
+    ("function_input", "should_violate"),
+    [
+        ({"body": {"to": ["a@ourcompany.com", "b@ourcompany.com"]}}, False),
+        ({"body": {"to": ["a@ourcompany.com", "b@example.com"]}}, True),
+        ({"body": [{"to": "a@ourcompany.com"}, {"to": "b@example.com"}]}, True),
+        ({"body": [{"to": "a@ourcompany.com"}, {"cc": "b@example.com"}]}, False),
+        # a list or an object at the path is not a string
+        ({"body": {"to": [["a@ourcompany.com"]]}}, False),
+        ({"body": {"to": {"email": "a@ourcompany.com"}}}, True),
+    ],
+)
+def test_lists_along_the_path_are_traversed(function_input: dict, should_violate: bool) -> None:
+    rule = InputRule(path="body.to", pattern=r".*@ourcompany\.com")
+
+    assert _is_violated(rule, function_input) == should_violate
+
+
+@pytest.mark.parametrize(
+    "function_input",
+    [
+        {},
+        {"body": {}},
+        {"body": "to"},
+        {"body": {"cc": "b@example.com"}},
+        {"body": []},
+    ],
+)
+def test_rule_does_not_apply_to_missing_path(function_input: dict) -> None:
+    rule = InputRule(path="body.to", allow=["a@ourcompany.com"])
+
+    assert not _is_violated(rule, function_input)
+
+
+def test_pattern_is_fully_matched() -> None:
+    rule = InputRule(path="body.to", pattern=r"[a-z]+@ourcompany\.com")
+
+    assert not _is_violated(rule, {"body": {"to": "a@ourcompany.com"}})
+    assert _is_violated(rule, {"body": {"to": "a@ourcompany.com.evil.com"}})
+    assert _is_violated(rule, {"body": {"to": "evil.com?a@ourcompany.com"}})
+
+
+def test_pattern_matching_time_is_linear() -> None:
+    # backtracks exponentially with the re module
+    rule = InputRule(path="body.name", pattern=r"(a+)+")
+
+    start = time.monotonic()
+    assert _is_violated(rule, {"body": {"name": "a" * 100_000 + "!"}})
+    assert time.monotonic() - start < 1
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    [
+        # RE2 doesn't support backreferences and lookarounds
+        r"(a)\1",
+        r"(?=a)a",
+        r"[a-",
+    ],
+)
+def test_invalid_pattern(pattern: str) -> None:
+    with pytest.raises(ValidationError, match="invalid regex pattern"):
+        InputRule(path="body.name", pattern=pattern)
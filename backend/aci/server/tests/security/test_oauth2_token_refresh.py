@@ -0,0 +1,154 @@
+import asyncio
+import time
+from datetime import UTC, datetime
+
+import httpx
+import respx
+from sqlalchemy.orm import Session
+
+from aci.common.db import crud
+from aci.common.db.engine import dispose_async_db_engines
+from aci.common.db.sql_models import LinkedAccount
+from aci.common.enums import SecurityScheme
+from aci.common.schemas.security_scheme import OAuth2Scheme, OAuth2SchemeCredentials
+from aci.server import security_credentials_manager as scm
+from aci.server.oauth2_token_renewal import OAuth2TokenRenewer
+
+REFRESH_TOKEN_URL = "https://api.mock.aci.com/v1/oauth2/refresh"
+
+
+def _set_expires_at(db_session: Session, linked_account: LinkedAccount, expires_at: int) -> None:
+    credentials = OAuth2SchemeCredentials.model_validate(linked_account.security_credentials)
+    credentials.expires_at = expires_at
+    crud.linked_accounts.update_linked_account_credentials(
+        db_session, linked_account, security_credentials=credentials
+    )
+    db_session.commit()
+
+
+@respx.mock
+def test_concurrent_refreshes_of_linked_account_are_single_flight(
+    db_session: Session,
+    dummy_linked_account_oauth2_aci_test_project_1: LinkedAccount,
+) -> None:
+    linked_account = dummy_linked_account_oauth2_aci_test_project_1
+    _set_expires_at(db_session, linked_account, 0)
+    refresh_route = respx.post(REFRESH_TOKEN_URL).mock(
+        return_value=httpx.Response(
+            200, json={"access_token": "new_access_token", "expires_in": 3600}
+        )
+    )
+    oauth2_scheme = OAuth2Scheme.model_validate(
+        linked_account.app.security_schemes[SecurityScheme.OAUTH2]
+    )
+
+    async def run() -> list[OAuth2SchemeCredentials]:
+        try:
+            return await asyncio.gather(
+                *(
+                    scm.refresh_oauth2_credentials(
+                        linked_account.app.name, oauth2_scheme, linked_account.id, 60
+                    )
+                    for _ in range(5)
+                )
+            )
+        finally:
+            await dispose_async_db_engines()
+
+    results = asyncio.run(run())
+
+    assert refresh_route.call_count == 1
+    assert all(result.access_token == "new_access_token" for result in results)
+    db_session.refresh(linked_account)
+    assert linked_account.security_credentials["access_token"] == "new_access_token"
+
+    # the token no longer expires within the leeway, so it's not refreshed again
+    asyncio.run(run())
+    assert refresh_route.call_count == 1
+
+
+@respx.mock
+def test_renewal_of_expiring_tokens_of_recently_used_linked_accounts(
+    db_session: Session,
+    dummy_linked_account_oauth2_aci_test_project_1: LinkedAccount,
+) -> None:
+    linked_account = dummy_linked_account_oauth2_aci_test_project_1
+    _set_expires_at(db_session, linked_account, int(time.time()) + 120)
+    refresh_route = respx.post(REFRESH_TOKEN_URL).mock(
+        return_value=httpx.Response(
+            200, json={"access_token": "renewed_access_token", "expires_in": 3600}
+        )
+    )
+    renewer = OAuth2TokenRenewer(
+        interval=60, renewal_window=300, max_idle=3600, batch_size=10, max_backoff=3600
+    )
+
+    async def run() -> int:
+        try:
+            return await renewer.renew_expiring_tokens()
+        finally:
+            await dispose_async_db_engines()
+
+    # not used recently
+    assert asyncio.run(run()) == 0
+    assert not refresh_route.called
+
+    crud.linked_accounts.update_linked_account_last_used_at(
+        db_session, datetime.now(UTC), linked_account
+    )
+    db_session.commit()
+
+    assert asyncio.run(run()) == 1
+    assert refresh_route.call_count == 1
+    db_session.refresh(linked_account)
+    assert linked_account.security_credentials["access_token"] == "renewed_access_token"
+
+    # renewed, no longer expires within the renewal window
+    assert asyncio.run(run()) == 0
+    assert refresh_route.call_count == 1
+
+
+@respx.mock
+def test_failing_renewal_is_backed_off_and_does_not_block_other_linked_accounts(
+    db_session: Session,
+    dummy_linked_account_oauth2_aci_test_project_1: LinkedAccount,
+    dummy_linked_account_oauth2_google_project_1: LinkedAccount,
+) -> None:
+    failing_linked_account = dummy_linked_account_oauth2_aci_test_project_1
+    linked_account = dummy_linked_account_oauth2_google_project_1
+    # the failing linked account expires first, so it's selected first
+    _set_expires_at(db_session, failing_linked_account, int(time.time()) + 60)
+    _set_expires_at(db_session, linked_account, int(time.time()) + 120)
+    for used_linked_account in (failing_linked_account, linked_account):
+        crud.linked_accounts.update_linked_account_last_used_at(
+            db_session, datetime.now(UTC), used_linked_account
+        )
+    db_session.commit()
+    failing_refresh_route = respx.post(REFRESH_TOKEN_URL).mock(
+        side_effect=httpx.ConnectError("connection refused")
+    )
+    refresh_route = respx.post("https://oauth2.googleapis.com/token").mock(
+        return_value=httpx.Response(
+            200, json={"access_token": "renewed_access_token", "expires_in": 3600}
+        )
+    )
+    renewer = OAuth2TokenRenewer(
+        interval=60, renewal_window=300, max_idle=3600, batch_size=1, max_backoff=3600
+    )
+
+    async def run() -> int:
+        try:
+            return await renewer.renew_expiring_tokens()
+        finally:
+            await dispose_async_db_engines()
+
+    # the failure doesn't abort the renewal
+    assert asyncio.run(run()) == 0
+    assert failing_refresh_route.call_count == 1
+
+    # the failing linked account is backed off, so the next one gets renewed
+    assert asyncio.run(run()) == 1
+    assert failing_refresh_route.call_count == 1
+    assert refresh_route.call_count == 1
+    db_session.refresh(linked_account)
+    assert linked_account.security_credentials["access_token"] == "renewed_access_token"
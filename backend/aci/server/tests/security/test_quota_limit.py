@@ -5,8 +5,11 @@ from uuid import uuid4
 
 from fastapi import status
 from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
 
+from aci.common.db.sql_models import Project
 from aci.server import config
+from aci.server.project_quota import project_quota_counter
 
 logger = logging.getLogger(__name__)
 
@@ -21,12 +24,9 @@ def test_validate_project_quota_valid(test_client: TestClient, dummy_api_key_1:
     project.daily_quota_reset_at = datetime.now(UTC)
     project.daily_quota_used = config.PROJECT_DAILY_QUOTA - 1
     project.id = uuid4()
-    with (
-        patch(
-            "aci.server.dependencies.crud.projects.get_project_by_api_key_id",
-            return_value=project,
-        ),
-        patch("aci.server.dependencies.crud.projects.increase_project_quota_usage"),
+    with patch(
+        "aci.server.dependencies.crud.projects.get_project_async",
+        return_value=project,
     ):
         response = test_client.get(
             f"{config.ROUTER_PREFIX_APPS}/search",
@@ -42,7 +42,7 @@ def test_validate_project_quota_exceeded(test_client: TestClient, dummy_api_key_
     project.daily_quota_used = config.PROJECT_DAILY_QUOTA
 
     with patch(
-        "aci.server.dependencies.crud.projects.get_project_by_api_key_id",
+        "aci.server.dependencies.crud.projects.get_project_async",
         return_value=project,
     ):
         response = test_client.get(
@@ -52,3 +52,27 @@ def test_validate_project_quota_exceeded(test_client: TestClient, dummy_api_key_
         )
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
         assert str(response.json()["error"]).startswith("Daily quota exceeded")
+
+
+def test_project_quota_usage_is_flushed_to_db(
+    test_client: TestClient,
+    db_session: Session,
+    dummy_project_1: Project,
+    dummy_api_key_1: str,
+) -> None:
+    for _ in range(3):
+        response = test_client.get(
+            f"{config.ROUTER_PREFIX_APPS}/search",
+            params={"limit": 1},
+            headers={"x-api-key": dummy_api_key_1},
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+    # usage is counted in memory and written to the db in batches, flush it now
+    # (in the app's event loop, which the pooled async db connections are bound to)
+    assert test_client.portal is not None
+    test_client.portal.call(project_quota_counter.flush)
+
+    db_session.refresh(dummy_project_1)
+    assert dummy_project_1.daily_quota_used == 3
+    assert dummy_project_1.total_quota_used == 3
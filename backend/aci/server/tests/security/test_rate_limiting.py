@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import time
 from typing import cast
@@ -6,10 +7,12 @@ from unittest.mock import patch
 from fastapi import FastAPI, status
 from fastapi.testclient import TestClient
 from limits import RateLimitItemPerDay, RateLimitItemPerSecond
+from limits.aio.strategies import MovingWindowRateLimiter
 
-from aci.server import config
+from aci.server import config, rate_limiter
 from aci.server.main import app as fastapi_app
 from aci.server.middleware.ratelimit import RateLimitMiddleware
+from aci.server.rate_limiter import BoundedMemoryStorage
 
 logger = logging.getLogger(__name__)
 
@@ -104,3 +107,41 @@ def test_rate_limiting_ip_per_day(test_client: TestClient, dummy_api_key_1: str)
             headers={"x-api-key": dummy_api_key_1},
         )
         assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+
+def test_rate_limiting_api_key_per_second(test_client: TestClient, dummy_api_key_1: str) -> None:
+    patched_rate_limits = {"api-key-per-second": RateLimitItemPerSecond(1)}
+
+    with patch.object(rate_limiter, "api_key_rate_limits", patched_rate_limits):
+        response = test_client.get(
+            f"{config.ROUTER_PREFIX_APPS}/search",
+            headers={"x-api-key": dummy_api_key_1},
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        response = test_client.get(
+            f"{config.ROUTER_PREFIX_APPS}/search",
+            headers={"x-api-key": dummy_api_key_1},
+        )
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert str(response.json()["error"]).startswith("Rate limit exceeded")
+
+
+def test_bounded_memory_storage_evicts_least_recently_hit_key() -> None:
+    async def run() -> None:
+        storage = BoundedMemoryStorage(max_keys=2)
+        limiter = MovingWindowRateLimiter(storage)
+        rate_limit = RateLimitItemPerSecond(1)
+
+        assert await limiter.hit(rate_limit, "a")
+        assert not await limiter.hit(rate_limit, "a")
+        assert await limiter.hit(rate_limit, "b")
+        # "a" is evicted to make room for "c"
+        assert await limiter.hit(rate_limit, "c")
+        assert len(storage.events) == 2
+
+        # the evicted key starts over
+        assert await limiter.hit(rate_limit, "a")
+        assert not await limiter.hit(rate_limit, "c")
+
+    asyncio.run(run())
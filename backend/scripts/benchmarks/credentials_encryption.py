@@ -0,0 +1,122 @@
+"""
+Benchmark of the stored size and decrypt latency of linked account security credentials,
+comparing:
+- legacy: each secret field encrypted separately, each with its own message header and data key
+- blob: all secret fields encrypted together as one sub-document (EncryptedSecurityCredentials)
+
+Rows are encrypted and decrypted with aci.common.encryption against the configured KMS key (e.g.,
+localstack), through the same type decorator the ORM uses. Note that with the data key cache
+enabled (COMMON_ENCRYPTION_CACHE_ENABLED) the measured latencies are mostly local crypto, disable it
+to include the KMS round trips.
+
+Usage:
+    docker compose exec runner python -m scripts.benchmarks.credentials_encryption --rows 100
+"""
+
+import argparse
+import json
+import statistics
+import time
+from typing import Any
+
+from sqlalchemy.dialects import postgresql
+
+from aci.common.db.custom_sql_types import (
+    EncryptedSecurityCredentials,
+    _encrypt_value,
+)
+from aci.common.schemas.security_scheme import APIKeySchemeCredentials, OAuth2SchemeCredentials
+
+DIALECT = postgresql.dialect()  # type: ignore[no-untyped-call]
+CREDENTIALS_TYPE = EncryptedSecurityCredentials()
+
+
+def _api_key_credentials() -> dict:
+    return APIKeySchemeCredentials(secret_key="sk-" + "x" * 48).model_dump(mode="json")
+
+
+def _oauth2_credentials() -> dict:
+    access_token = "ya29." + "a" * 200
+    refresh_token = "1//" + "r" * 100
+    return OAuth2SchemeCredentials(
+        client_id="1234567890-abcdefghijklmnop.apps.googleusercontent.com",
+        client_secret="GOCSPX-" + "s" * 28,
+        scope="openid email profile https://www.googleapis.com/auth/gmail.modify",
+        access_token=access_token,
+        token_type="Bearer",
+        expires_at=int(time.time()) + 3600,
+        refresh_token=refresh_token,
+        raw_token_response={
+            "access_token": access_token,
+            "expires_in": 3599,
+            "refresh_token": refresh_token,
+            "scope": "openid email profile https://www.googleapis.com/auth/gmail.modify",
+            "token_type": "Bearer",
+            "id_token": "eyJ" + "i" * 900,
+        },
+    ).model_dump(mode="json")
+
+
+def _encrypt_legacy(credentials: dict) -> dict:
+    """The per-field format EncryptedSecurityCredentials wrote before the blob format."""
+    row = dict(credentials)
+    secret_fields = (
+        ["secret_key"]
+        if "secret_key" in row
+        else ["client_secret", "access_token", "refresh_token", "raw_token_response"]
+    )
+    for field in secret_fields:
+        value = row.get(field)
+        if isinstance(value, dict):
+            value = json.dumps(value)
+        if isinstance(value, str):
+            row[field] = _encrypt_value(value)
+    return row
+
+
+def _encrypt_blob(credentials: dict) -> dict:
+    row = CREDENTIALS_TYPE.process_bind_param(credentials, DIALECT)
+    assert row is not None
+    return row
+
+
+def _measure_decrypt(rows: list[dict], expected: dict) -> list[float]:
+    """Return the latency (ms) of decrypting each row."""
+    latencies = []
+    for row in rows:
+        start = time.perf_counter()
+        decrypted = CREDENTIALS_TYPE.process_result_value(row, DIALECT)
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert decrypted == expected
+    return latencies
+
+
+def _print_result(name: str, rows: list[dict], latencies: list[float]) -> None:
+    size = statistics.mean(len(json.dumps(row).encode()) for row in rows)
+    print(
+        f"{name:>18}{size:>12.0f}{statistics.mean(latencies):>10.2f}"
+        f"{statistics.median(latencies):>10.2f}{statistics.quantiles(latencies, n=20)[-1]:>10.2f}"
+    )
+
+
+def main(rows: int) -> None:
+    print(f"{rows} rows each, row size in bytes (stored json), decrypt latencies in ms")
+    print(f"{'':>18}{'row size':>12}{'mean':>10}{'p50':>10}{'p95':>10}")
+    cases: list[tuple[str, Any]] = [
+        ("api_key", _api_key_credentials),
+        ("oauth2", _oauth2_credentials),
+    ]
+    for scheme, create_credentials in cases:
+        credentials = create_credentials()
+        for name, encrypt in (("legacy", _encrypt_legacy), ("blob", _encrypt_blob)):
+            encrypted_rows = [encrypt(credentials) for _ in range(rows)]
+            _print_result(
+                f"{scheme} {name}", encrypted_rows, _measure_decrypt(encrypted_rows, credentials)
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1] if __doc__ else None)
+    parser.add_argument("--rows", type=int, default=100)
+    args = parser.parse_args()
+    main(args.rows)
@@ -0,0 +1,130 @@
+"""
+Microbenchmark of the per-call latency of validating function inputs against the parameters
+schemas of the real functions in apps/*/functions.json, comparing:
+- uncached: filter_visible_properties + jsonschema.validate on every call (the previous behavior,
+  which also looks up the validator class and checks the schema against its meta schema)
+- cached: validate_function_input, with the visible schema and the validator compiled once per
+  function version
+
+The input of each function is generated from its visible schema (the required properties, with
+their default, first enum value, or a value of their type), so the validations succeed.
+
+Usage:
+    docker compose exec runner python -m scripts.benchmarks.function_input_validation --calls 20
+"""
+
+import argparse
+import json
+import statistics
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+from uuid import uuid4
+
+import jsonschema
+
+from aci.common import processor
+from aci.common.catalog_index import IndexedFunction
+from aci.common.enums import Visibility
+from aci.server.function_definitions import validate_function_input
+
+APPS_DIR = Path(__file__).resolve().parents[2] / "apps"
+VALUES_BY_TYPE: dict[str, Any] = {
+    "string": "value",
+    "integer": 1,
+    "number": 1.5,
+    "boolean": True,
+    "array": [],
+    "null": None,
+}
+
+
+def _sample_input(schema: dict) -> Any:
+    if "default" in schema:
+        return schema["default"]
+    if "enum" in schema:
+        return schema["enum"][0]
+
+    schema_type = schema.get("type")
+    if isinstance(schema_type, list):
+        schema_type = schema_type[0]
+    if schema_type == "object":
+        properties = schema.get("properties", {})
+        return {
+            name: _sample_input(properties[name])
+            for name in schema.get("required", [])
+            if name in properties
+        }
+    return VALUES_BY_TYPE.get(schema_type or "string", "value")
+
+
+def _load_functions() -> list[IndexedFunction]:
+    functions = []
+    for functions_file in sorted(APPS_DIR.glob("*/functions.json")):
+        for function_data in json.loads(functions_file.read_text()):
+            functions.append(
+                IndexedFunction(
+                    id=uuid4(),
+                    app_id=uuid4(),
+                    name=function_data["name"],
+                    description=function_data["description"],
+                    tags=function_data.get("tags", []),
+                    parameters=function_data.get("parameters", {}),
+                    visibility=Visibility.PUBLIC,
+                    active=True,
+                    updated_at=datetime.now(UTC),
+                )
+            )
+    return functions
+
+
+def _measure(validate: Any, cases: list[tuple[IndexedFunction, dict]], calls: int) -> list[float]:
+    """Return the mean latency (us) of validating each case."""
+    latencies = []
+    for function, function_input in cases:
+        start = time.perf_counter()
+        for _ in range(calls):
+            validate(function, function_input)
+        latencies.append((time.perf_counter() - start) / calls * 1_000_000)
+    return latencies
+
+
+def _validate_uncached(function: IndexedFunction, function_input: dict) -> None:
+    jsonschema.validate(
+        instance=function_input,
+        schema=processor.filter_visible_properties(function.parameters),
+    )
+
+
+def main(calls: int) -> None:
+    functions = _load_functions()
+    cases = []
+    for function in functions:
+        function_input = _sample_input(processor.filter_visible_properties(function.parameters))
+        try:
+            _validate_uncached(function, function_input)
+        except jsonschema.ValidationError:
+            # e.g., schemas with constraints the generated input doesn't satisfy
+            continue
+        cases.append((function, function_input))
+    print(f"{len(cases)} of {len(functions)} functions, {calls} calls each, latencies in us")
+
+    # the first call of each function compiles its validator
+    for function, function_input in cases:
+        validate_function_input(function, function_input)
+
+    print(f"{'':>10}{'mean':>10}{'p50':>10}{'p95':>10}{'max':>10}")
+    for name, validate in (("uncached", _validate_uncached), ("cached", validate_function_input)):
+        latencies = _measure(validate, cases, calls)
+        print(
+            f"{name:>10}{statistics.mean(latencies):>10.1f}{statistics.median(latencies):>10.1f}"
+            f"{statistics.quantiles(latencies, n=20)[-1]:>10.1f}{max(latencies):>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1] if __doc__ else None)
+    parser.add_argument("--calls", type=int, default=20)
+    args = parser.parse_args()
+    main(args.calls)
@@ -0,0 +1,158 @@
+"""
+Microbenchmark of the per-request overhead of the server's middlewares (InterceptorMiddleware and
+RateLimitMiddleware), comparing the pure ASGI implementations with the previous
+BaseHTTPMiddleware based ones (kept below, trimmed to what affects the overhead).
+
+The apps are called directly through the ASGI interface (no network, no http client) with logging
+disabled. The in-memory rate limit storage is reset every RESET_STORAGE_EVERY requests: its
+periodic expiry scan is linear in the number of stored hits, and would otherwise dominate the
+numbers. What remains is mostly the cost of the middleware machinery itself.
+
+Usage:
+    docker compose exec runner python -m scripts.benchmarks.middleware_overhead --requests 10000
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+import uuid
+
+from limits import RateLimitItem, RateLimitItemPerDay, RateLimitItemPerSecond
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from starlette.types import ASGIApp, Message
+
+from aci.server import rate_limiter
+from aci.server.context import request_id_ctx_var
+from aci.server.middleware.interceptor import InterceptorMiddleware
+from aci.server.middleware.ratelimit import RateLimitMiddleware
+
+# high enough to never be exceeded, the benchmark measures the happy path
+RATE_LIMITS: dict[str, RateLimitItem] = {
+    "ip-per-second": RateLimitItemPerSecond(amount=1_000_000),
+    "ip-per-day": RateLimitItemPerDay(amount=1_000_000),
+}
+RESET_STORAGE_EVERY = 100
+
+
+class LegacyInterceptorMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        request_id = str(uuid.uuid4())
+        request_id_ctx_var.set(request_id)
+        try:
+            response = await call_next(request)
+        except Exception:
+            return JSONResponse(status_code=500, content={"error": "Internal server error"})
+        response.headers["X-Request-ID"] = request_id
+        return response
+
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app: ASGIApp) -> None:
+        super().__init__(app)
+        self.limiter = rate_limiter.limiter
+        self.rate_limits = RATE_LIMITS
+
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        rate_limit_key = f"ip:{request.client.host if request.client else '127.0.0.1'}"
+        for rate_limit_name, rate_limit in self.rate_limits.items():
+            if not await self.limiter.hit(rate_limit, rate_limit_key):
+                return Response(
+                    status_code=429,
+                    content=json.dumps({"error": f"Rate limit exceeded: {rate_limit_name}"}),
+                )
+
+        response = await call_next(request)
+        for rate_limit_name, rate_limit in self.rate_limits.items():
+            stats = await self.limiter.get_window_stats(rate_limit, rate_limit_key)
+            response.headers[f"X-RateLimit-Limit-{rate_limit_name}"] = str(rate_limit.amount)
+            response.headers[f"X-RateLimit-Remaining-{rate_limit_name}"] = str(stats.remaining)
+            response.headers[f"X-RateLimit-Reset-{rate_limit_name}"] = str(stats.reset_time)
+        return response
+
+
+async def endpoint(request: Request) -> Response:
+    return JSONResponse({"status": "ok"})
+
+
+def build_app() -> Starlette:
+    return Starlette(routes=[Route("/", endpoint)])
+
+
+def build_asgi_stack() -> ASGIApp:
+    rate_limit_middleware = RateLimitMiddleware(build_app())
+    rate_limit_middleware.rate_limits = RATE_LIMITS
+    return InterceptorMiddleware(rate_limit_middleware)
+
+
+def build_legacy_stack() -> ASGIApp:
+    return LegacyInterceptorMiddleware(LegacyRateLimitMiddleware(build_app()))
+
+
+async def call(app: ASGIApp) -> None:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/",
+        "raw_path": b"/",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"localhost")],
+        "client": ("127.0.0.1", 12345),
+        "server": ("localhost", 80),
+    }
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message) -> None:
+        pass
+
+    await app(scope, receive, send)
+
+
+async def measure(app: ASGIApp, number_of_requests: int) -> float:
+    """Return the mean time per request in microseconds."""
+    for _ in range(RESET_STORAGE_EVERY):
+        await call(app)
+
+    elapsed = 0.0
+    for batch_start in range(0, number_of_requests, RESET_STORAGE_EVERY):
+        await rate_limiter.storage.reset()
+        start = time.perf_counter()
+        for _ in range(min(RESET_STORAGE_EVERY, number_of_requests - batch_start)):
+            await call(app)
+        elapsed += time.perf_counter() - start
+    return elapsed / number_of_requests * 1_000_000
+
+
+async def main(number_of_requests: int) -> None:
+    logging.disable(logging.CRITICAL)
+
+    baseline = await measure(build_app(), number_of_requests)
+    legacy = await measure(build_legacy_stack(), number_of_requests)
+    asgi = await measure(build_asgi_stack(), number_of_requests)
+
+    print(f"requests: {number_of_requests}")
+    print(f"{'stack':<20}{'us/request':>12}{'overhead us':>14}")
+    for name, mean in [
+        ("no middleware", baseline),
+        ("BaseHTTPMiddleware", legacy),
+        ("pure ASGI", asgi),
+    ]:
+        print(f"{name:<20}{mean:>12.1f}{mean - baseline:>14.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1] if __doc__ else None)
+    parser.add_argument("--requests", type=int, default=10_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
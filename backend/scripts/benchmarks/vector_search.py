@@ -0,0 +1,127 @@
+"""
+Benchmark of the similarity search (top k by cosine distance, as in app/function search) latency
+against the catalog size, with a sequential scan vs the HNSW index at different ef_search values,
+and the recall of the HNSW results vs the exact results of the sequential scan.
+
+The embeddings are random (clustered around per-app centroids, like the functions of an app) and
+live in a temporary table, the data in the db is not touched.
+
+Usage:
+    docker compose exec runner python -m scripts.benchmarks.vector_search --sizes 1000 10000 50000
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+import psycopg
+
+from aci.common.db.sql_models import EMBEDDING_DIMENSION, EMBEDDING_HNSW_INDEX_PARAMS
+from aci.server import config
+
+FUNCTIONS_PER_APP = 20
+NUMBER_OF_QUERIES = 100
+
+
+def _to_vector_literal(vector: np.ndarray) -> str:
+    return "[" + ",".join(f"{value:.6f}" for value in vector) + "]"
+
+
+def _random_embeddings(
+    rng: np.random.Generator, centroids: np.ndarray, size: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return (app index, embedding) of size random embeddings around the centroids."""
+    app_indexes = rng.integers(0, len(centroids), size)
+    embeddings = centroids[app_indexes] + rng.normal(0, 0.5, (size, EMBEDDING_DIMENSION))
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return app_indexes, embeddings
+
+
+def _search(
+    cursor: psycopg.Cursor, queries: list[str], top_k: int
+) -> tuple[list[float], list[list[int]]]:
+    latencies: list[float] = []
+    results: list[list[int]] = []
+    for query in queries:
+        start = time.perf_counter()
+        cursor.execute(
+            "SELECT id FROM bench_embeddings ORDER BY embedding <=> %s::vector LIMIT %s",
+            (query, top_k),
+        )
+        rows = cursor.fetchall()
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append([row[0] for row in rows])
+    return latencies, results
+
+
+def _recall(results: list[list[int]], exact_results: list[list[int]]) -> float:
+    return statistics.mean(
+        len(set(result) & set(exact)) / len(exact)
+        for result, exact in zip(results, exact_results, strict=True)
+    )
+
+
+def _print_row(size: int, mode: str, latencies: list[float], recall: float) -> None:
+    p50 = statistics.median(latencies)
+    p95 = statistics.quantiles(latencies, n=20)[-1]
+    print(f"{size:>10}{mode:>22}{p50:>10.2f}{p95:>10.2f}{recall:>10.3f}")
+
+
+def main(sizes: list[int], ef_searches: list[int], top_k: int) -> None:
+    rng = np.random.default_rng(42)
+    db_url = config.DB_FULL_URL.replace("postgresql+psycopg://", "postgresql://")
+
+    with psycopg.connect(db_url, autocommit=True) as connection, connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE bench_embeddings "
+            f"(id integer PRIMARY KEY, app_name text NOT NULL, "
+            f"embedding vector({EMBEDDING_DIMENSION}) NOT NULL)"
+        )
+
+        print(f"top_k={top_k}, queries={NUMBER_OF_QUERIES}, latencies in ms")
+        print(f"{'size':>10}{'mode':>22}{'p50':>10}{'p95':>10}{'recall':>10}")
+        for size in sizes:
+            centroids = rng.normal(0, 1, (max(size // FUNCTIONS_PER_APP, 1), EMBEDDING_DIMENSION))
+            app_indexes, embeddings = _random_embeddings(rng, centroids, size)
+            _, query_embeddings = _random_embeddings(rng, centroids, NUMBER_OF_QUERIES)
+            queries = [_to_vector_literal(query) for query in query_embeddings]
+
+            cursor.execute("DROP INDEX IF EXISTS bench_embeddings_hnsw")
+            cursor.execute("TRUNCATE bench_embeddings")
+            with cursor.copy("COPY bench_embeddings (id, app_name, embedding) FROM STDIN") as copy:
+                for i, (app_index, embedding) in enumerate(
+                    zip(app_indexes, embeddings, strict=True)
+                ):
+                    copy.write_row((i, f"APP_{app_index}", _to_vector_literal(embedding)))
+            cursor.execute("ANALYZE bench_embeddings")
+
+            # exact results, without the index
+            latencies, exact_results = _search(cursor, queries, top_k)
+            _print_row(size, "sequential scan", latencies, 1.0)
+
+            start = time.perf_counter()
+            index_params = ", ".join(
+                f"{name} = {value}" for name, value in EMBEDDING_HNSW_INDEX_PARAMS.items()
+            )
+            cursor.execute(
+                "CREATE INDEX bench_embeddings_hnsw ON bench_embeddings "
+                f"USING hnsw (embedding vector_cosine_ops) WITH ({index_params})"
+            )
+            print(f"{size:>10}{'hnsw build (s)':>22}{time.perf_counter() - start:>10.1f}")
+
+            for ef_search in ef_searches:
+                cursor.execute("SELECT set_config('hnsw.ef_search', %s, false)", (str(ef_search),))
+                latencies, results = _search(cursor, queries, top_k)
+                _print_row(
+                    size, f"hnsw ef_search={ef_search}", latencies, _recall(results, exact_results)
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1] if __doc__ else None)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[40, 100, 200])
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+    main(args.sizes, args.ef_search, args.top_k)